@@ -37,6 +37,10 @@ try:
     import pwd
 except ImportError:
     pwd = None
+try:
+    import queue
+except ImportError:
+    import Queue as queue  # Python 2
 
 from . import _common
 from ._common import deprecated_method
@@ -205,7 +209,8 @@ __all__ = [
     "SUNOS", "WINDOWS", "AIX",
 
     # classes
-    "Process", "Popen",
+    "Process", "Popen", "ProcessTable", "Sampler", "CpuPercentTracker",
+    "DiskIORateTracker", "NetIORateTracker",
 
     # functions
     "pid_exists", "pids", "process_iter", "wait_procs",             # proc
@@ -213,10 +218,10 @@ __all__ = [
     "cpu_times", "cpu_percent", "cpu_times_percent", "cpu_count",   # cpu
     "cpu_stats",  # "cpu_freq",
     "net_io_counters", "net_connections", "net_if_addrs",           # network
-    "net_if_stats",
+    "net_if_stats", "net_connection_stats", "net_connections_iter",
     "disk_io_counters", "disk_partitions", "disk_usage",            # disk
     # "sensors_temperatures", "sensors_battery", "sensors_fans"     # sensors
-    "users", "boot_time",                                           # others
+    "users", "boot_time", "oneshot", "system_snapshot",             # others
 ]
 __all__.extend(_psplatform.__extra__all__)
 __author__ = "Giampaolo Rodola'"
@@ -456,6 +461,7 @@ class Process(object):
         self._exe = None
         self._create_time = None
         self._gone = False
+        self._watched = False
         self._hash = None
         self._lock = threading.RLock()
         # used for caching on Windows only (on POSIX ppid may change)
@@ -668,6 +674,13 @@ class Process(object):
         """
         if self._gone:
             return False
+        if self._watched:
+            # The file descriptors kept open by watch() refer to this
+            # very process so there's no need to verify its identity.
+            if self._proc.watched_is_running():
+                return True
+            self._gone = True
+            return False
         try:
             # Checking if PID is alive is not enough as the PID might
             # have been reused by another process: we also want to
@@ -683,6 +696,46 @@ class Process(object):
             self._gone = True
             return False
 
+    # Linux only
+    if hasattr(_psplatform.Process, "watch"):
+
+        def watch(self):
+            """Keep the files used by cpu_times(), memory_info() and
+            other methods parsing the same files open until unwatch()
+            is called, re-reading them instead of re-opening them
+            every time. This is useful for long-lived processes which
+            are sampled periodically.
+            The file descriptors are bound to this very process: once
+            it's gone is_running() returns False and the other methods
+            raise NoSuchProcess, even if the PID has been reused, so
+            is_running() becomes nearly free.
+            """
+            with self._lock:
+                if self._watched:
+                    return
+                if self._gone:
+                    raise NoSuchProcess(self.pid, self._name)
+                self._proc.watch()
+                # The PID might have been reused before the files
+                # were opened.
+                if self._create_time is not None:
+                    try:
+                        ctime = self._proc.create_time()
+                    except Error:
+                        self._proc.unwatch()
+                        raise
+                    if ctime != self._create_time:
+                        self._proc.unwatch()
+                        self._gone = True
+                        raise NoSuchProcess(self.pid, self._name)
+                self._watched = True
+
+        def unwatch(self):
+            """Close the file descriptors opened by watch()."""
+            with self._lock:
+                self._proc.unwatch()
+                self._watched = False
+
     # --- actual API
 
     @memoize_when_activated
@@ -788,15 +841,15 @@ class Process(object):
                 # might happen if python was installed from sources
                 raise ImportError(
                     "requires pwd module shipped with standard python")
-            real_uid = self.uids().real
-            try:
-                return pwd.getpwuid(real_uid).pw_name
-            except KeyError:
-                # the uid can't be resolved by the system
-                return str(real_uid)
+            # uid -> name mappings are cached, see _psposix.get_username
+            return _psposix.get_username(self.uids().real)
         else:
             return self._proc.username()
 
+    if POSIX:
+        username.cache_clear = _psposix.get_username.cache_clear
+        username.cache_info = _psposix.get_username.cache_info
+
     def create_time(self):
         """The process creation time as a floating point number
         expressed in seconds since the epoch, in UTC.
@@ -1217,21 +1270,39 @@ class Process(object):
             entity and the namedtuple will also include the mapped region's
             address space ('addr') and permission set ('perms').
             """
-            it = self._proc.memory_maps()
             if grouped:
+                if hasattr(self._proc, "memory_maps_iter"):
+                    # Sum mapped regions up as they are parsed.
+                    it = self._proc.memory_maps_iter()
+                else:
+                    it = self._proc.memory_maps()
                 d = {}
                 for tupl in it:
                     path = tupl[2]
                     nums = tupl[3:]
                     try:
-                        d[path] = map(lambda x, y: x + y, d[path], nums)
+                        d[path] = list(map(lambda x, y: x + y, d[path], nums))
                     except KeyError:
                         d[path] = nums
                 nt = _psplatform.pmmap_grouped
                 return [nt(path, *d[path]) for path in d]  # NOQA
             else:
                 nt = _psplatform.pmmap_ext
-                return [nt(*x) for x in it]
+                return [nt(*x) for x in self._proc.memory_maps()]
+
+    if hasattr(_psplatform.Process, "memory_maps_iter"):
+
+        def memory_maps_iter(self):
+            """Same as memory_maps(grouped=False) but return a generator
+            yielding one mapped region at a time. Memory maps are parsed
+            incrementally, which is useful for processes having a lot
+            of them.
+            """
+            nt = _psplatform.pmmap_ext
+            # the file is opened here so that NoSuchProcess and
+            # AccessDenied are raised immediately
+            it = self._proc.memory_maps_iter()
+            return (nt(*x) for x in it)
 
     def open_files(self):
         """Return files opened by process as a list of
@@ -1465,7 +1536,8 @@ _as_dict_attrnames = set(
     [x for x in dir(Process) if not x.startswith('_') and x not in
      ['send_signal', 'suspend', 'resume', 'terminate', 'kill', 'wait',
       'is_running', 'as_dict', 'parent', 'children', 'rlimit',
-      'memory_info_ex', 'oneshot']])
+      'memory_info_ex', 'oneshot', 'memory_maps_iter', 'watch',
+      'unwatch']])
 
 
 # =====================================================================
@@ -1499,7 +1571,42 @@ def pid_exists(pid):
 _pmap = {}
 
 
-def process_iter(attrs=None, ad_value=None):
+def _as_dict_threaded(procs, attrs, ad_value, workers):
+    """Call Process.as_dict() for all *procs* by using a pool of
+    *workers* threads and yield (proc, info, exception) tuples as
+    soon as they are available.
+    """
+    def worker():
+        while not stop.is_set():
+            try:
+                proc = jobs.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                info = proc.as_dict(attrs=attrs, ad_value=ad_value)
+            except Exception as err:
+                results.put((proc, None, err))
+            else:
+                results.put((proc, info, None))
+
+    jobs = queue.Queue()
+    results = queue.Queue()
+    stop = threading.Event()
+    for proc in procs:
+        jobs.put(proc)
+    for x in range(min(workers, len(procs))):
+        t = threading.Thread(target=worker)
+        t.daemon = True
+        t.start()
+    try:
+        for x in range(len(procs)):
+            yield results.get()
+    finally:
+        # in case the generator is not consumed entirely
+        stop.set()
+
+
+def process_iter(attrs=None, ad_value=None, workers=None):
     """Return a generator yielding a Process instance for all
     running processes.
 
@@ -1519,7 +1626,41 @@ def process_iter(attrs=None, ad_value=None):
     to returned Process instance.
     If *attrs* is an empty list it will retrieve all process info
     (slow).
+
+    If *workers* is specified as_dict() is called in parallel by a
+    pool of *workers* threads and processes are yielded as soon as
+    their info is collected (hence not sorted by PID). This is useful
+    when retrieving slow attrs such as "memory_full_info" or
+    "open_files" on systems with a lot of processes. *workers*
+    requires *attrs*.
     """
+    # Arguments are checked here rather than in the generators below
+    # so that errors are raised on call instead of on first iteration.
+    if workers is None:
+        return _process_iter(attrs, ad_value)
+    if attrs is None:
+        raise ValueError("workers requires attrs to be specified")
+    if workers < 1:
+        raise ValueError("workers must be a positive integer (got %r)"
+                         % workers)
+    return _process_iter_threaded(attrs, ad_value, workers)
+
+
+def _process_iter_threaded(attrs, ad_value, workers):
+    procs = list(_process_iter())
+    for proc, info, err in _as_dict_threaded(
+            procs, attrs, ad_value, workers):
+        if err is None:
+            proc.info = info
+            yield proc
+        elif isinstance(err, NoSuchProcess):
+            if _pmap.get(proc.pid) is proc:
+                _pmap.pop(proc.pid, None)
+        else:
+            raise err
+
+
+def _process_iter(attrs=None, ad_value=None):
     def add(pid):
         proc = Process(pid)
         if attrs is not None:
@@ -1530,10 +1671,22 @@ def process_iter(attrs=None, ad_value=None):
     def remove(pid):
         _pmap.pop(pid, None)
 
+    def is_running(proc):
+        if proc.pid in ctimes and proc._create_time is not None:
+            return ctimes[proc.pid] == proc._create_time
+        return proc.is_running()
+
     a = set(pids())
     b = set(_pmap.keys())
     new_pids = a - b
     gone_pids = b - a
+    if b and hasattr(_psplatform, "create_time_map"):
+        # Faster version (Linux): the creation time of all cached
+        # processes is retrieved in one shot and used to detect
+        # reused PIDs.
+        ctimes = _psplatform.create_time_map(a & b)
+    else:
+        ctimes = {}
 
     for pid in gone_pids:
         remove(pid)
@@ -1543,9 +1696,9 @@ def process_iter(attrs=None, ad_value=None):
             if proc is None:  # new process
                 yield add(pid)
             else:
-                # use is_running() to check whether PID has been reused by
-                # another process in which case yield a new Process instance
-                if proc.is_running():
+                # check whether PID has been reused by another process
+                # in which case yield a new Process instance
+                if is_running(proc):
                     if attrs is not None:
                         proc.info = proc.as_dict(
                             attrs=attrs, ad_value=ad_value)
@@ -1569,6 +1722,146 @@ def process_iter(attrs=None, ad_value=None):
                 raise
 
 
+class ProcessTable(object):
+    """A table of running processes which is updated incrementally
+    on every refresh() call.
+
+    Differently from process_iter() the PIDs listing is diffed
+    against the previous one so that Process instances are only
+    created for new processes; the cached ones are checked for PID
+    reuse (on Linux the creation time of all of them is retrieved
+    in one shot).
+
+    After every refresh() the following sets of PIDs are available:
+
+     - added: processes which appeared since the previous refresh
+     - removed: processes which disappeared since the previous refresh
+     - alive: all running processes
+
+    A PID which has been reused by another process is included both
+    in *added* and *removed*. Process instances can be retrieved by
+    PID via table[pid] or by iterating over the table, in which case
+    they are yielded sorted by PID.
+
+    >>> import psutil
+    >>> table = psutil.ProcessTable()
+    >>> table.refresh()
+    >>> table.added, table.removed
+    ({4312}, {4297})
+    >>> table[4312]
+    psutil.Process(pid=4312, name='bash', started='10:42:01')
+    >>>
+    """
+
+    def __init__(self):
+        self._procs = {}
+        self.added = set()
+        self.removed = set()
+        self.alive = set()
+        self.refresh()
+
+    def __repr__(self):
+        return "<%s.%s(alive=%s) at %s>" % (
+            self.__class__.__module__, self.__class__.__name__,
+            len(self._procs), id(self))
+
+    def __len__(self):
+        return len(self._procs)
+
+    def __contains__(self, pid):
+        return pid in self._procs
+
+    def __getitem__(self, pid):
+        return self._procs[pid]
+
+    def __iter__(self):
+        procs = self._procs
+        for pid in sorted(procs):
+            yield procs[pid]
+
+    def refresh(self):
+        """Update the table and the *added*, *removed* and *alive*
+        sets of PIDs.
+        """
+        procs = self._procs
+        current = set(pids())
+        cached = set(procs)
+        added = current - cached
+        removed = cached - current
+        for pid in removed:
+            del procs[pid]
+
+        # check whether the cached PIDs have been reused by another
+        # process
+        survivors = cached & current
+        if survivors and hasattr(_psplatform, "create_time_map"):
+            ctimes = _psplatform.create_time_map(survivors)
+        else:
+            ctimes = {}
+        for pid in survivors:
+            proc = procs[pid]
+            if pid in ctimes and proc._create_time is not None:
+                running = ctimes[pid] == proc._create_time
+            else:
+                running = proc.is_running()
+            if not running:
+                del procs[pid]
+                removed.add(pid)
+                added.add(pid)
+
+        for pid in list(added):
+            try:
+                procs[pid] = Process(pid)
+            except NoSuchProcess:
+                added.discard(pid)
+
+        self.added = added
+        self.removed = removed
+        self.alive = set(procs)
+
+
+if hasattr(_psplatform, "proc_snapshot"):
+
+    def process_snapshot(attrs=None, ad_value=None):
+        """Return information about all running processes as a
+        "columnar" table, that is a {attr: [value, ...], ...} dict
+        where the N-th element of every list refers to the same
+        process.
+
+        Differently from process_iter() no Process instance is
+        created: the info is collected in one pass over /proc, making
+        this considerably faster when dealing with a lot of processes.
+        The downside is that process identity is not checked over time.
+
+        *attrs* is a list of column names (by default all of them are
+        returned). Available columns are: 'pid', 'ppid', 'name',
+        'status', 'nice', 'num_threads', 'cpu_num', 'user_time',
+        'system_time', 'create_time', 'rss', 'vms', 'uid' and 'gid'.
+        *ad_value* is the value used in case of AccessDenied.
+
+        >>> import psutil
+        >>> t = psutil.process_snapshot(['pid', 'name', 'rss'])
+        >>> list(zip(t['pid'], t['name'], t['rss']))[:2]
+        [(1, 'systemd', 9457664), (2, 'kthreadd', 0)]
+        >>>
+        """
+        valid_names = _psplatform.SNAPSHOT_ATTRS
+        if attrs is None:
+            attrs = sorted(valid_names)
+        else:
+            if not isinstance(attrs, (list, tuple, set, frozenset)):
+                raise TypeError("invalid attrs type %s" % type(attrs))
+            invalid_names = set(attrs) - set(valid_names)
+            if invalid_names:
+                raise ValueError("invalid attr name%s %s" % (
+                    "s" if len(invalid_names) > 1 else "",
+                    ", ".join(map(repr, invalid_names))))
+            attrs = list(attrs)
+        return _psplatform.proc_snapshot(attrs, ad_value=ad_value)
+
+    __all__.append("process_snapshot")
+
+
 def wait_procs(procs, timeout=None, callback=None):
     """Convenience function which waits for a list of processes to
     terminate.
@@ -1782,7 +2075,108 @@ def _cpu_times_deltas(t1, t2):
     return _psplatform.scputimes(*field_deltas)
 
 
-def cpu_percent(interval=None, percpu=False):
+def _cpu_busy_percent(t1, t2):
+    """Given two cpu_times() ntuples calculate the CPU utilization
+    percentage in between them (see cpu_percent()).
+    """
+    times_delta = _cpu_times_deltas(t1, t2)
+
+    all_delta = _cpu_tot_time(times_delta)
+    busy_delta = _cpu_busy_time(times_delta)
+
+    try:
+        busy_perc = (busy_delta / all_delta) * 100
+    except ZeroDivisionError:
+        return 0.0
+    else:
+        return round(busy_perc, 1)
+
+
+def _cpu_fields_percent(t1, t2):
+    """Given two cpu_times() ntuples calculate the utilization
+    percentage of every CPU time in between them (see
+    cpu_times_percent()).
+    """
+    nums = []
+    times_delta = _cpu_times_deltas(t1, t2)
+    all_delta = _cpu_tot_time(times_delta)
+    # "scale" is the value to multiply each delta with to get percentages.
+    # We use "max" to avoid division by zero (if all_delta is 0, then all
+    # fields are 0 so percentages will be 0 too. all_delta cannot be a
+    # fraction because cpu times are integers)
+    scale = 100.0 / max(1, all_delta)
+    for field_delta in times_delta:
+        field_perc = field_delta * scale
+        field_perc = round(field_perc, 1)
+        # make sure we don't return negative values or values over 100%
+        field_perc = min(max(0.0, field_perc), 100.0)
+        nums.append(field_perc)
+    return _psplatform.scputimes(*nums)
+
+
+def _per_cpu_times_array():
+    """Return per-CPU times as a 2-D (CPUs x fields) NumPy array or,
+    if NumPy is not installed, as a list of lists.
+    """
+    if hasattr(_psplatform, "per_cpu_times_raw"):
+        # Linux: clock ticks as ints, which is faster.
+        rows = _psplatform.per_cpu_times_raw()
+    else:
+        rows = [list(x) for x in _psplatform.per_cpu_times()]
+    try:
+        import numpy
+    except ImportError:
+        return rows
+    return numpy.array(rows, dtype=numpy.float64)
+
+
+def _cpu_array_percent(t1, t2, times_percent=False):
+    """Vectorized version of cpu_percent() and cpu_times_percent()
+    calculations for the per-CPU times returned by
+    _per_cpu_times_array().
+    """
+    fields = _psplatform.scputimes._fields
+    # See _cpu_tot_time() and _cpu_busy_time().
+    guest = [fields.index(x) for x in ('guest', 'guest_nice')
+             if LINUX and x in fields]
+    idle = [fields.index(x) for x in ('idle', 'iowait') if x in fields]
+    if isinstance(t2, list):
+        # pure python version
+        ret = []
+        for row1, row2 in zip(t1, t2):
+            deltas = [max(0, y - x) for x, y in zip(row1, row2)]
+            tot = sum(deltas) - sum([deltas[i] for i in guest])
+            if times_percent:
+                ret.append([min(max(0.0, round(x * 100.0 / tot, 1)), 100.0)
+                            if tot else 0.0 for x in deltas])
+            else:
+                busy = tot - sum([deltas[i] for i in idle])
+                ret.append(round(busy * 100.0 / tot, 1) if tot else 0.0)
+        return ret
+
+    import numpy
+    if t1.shape != t2.shape:
+        # the number of CPUs changed in the meantime
+        t1 = t2
+    # Trim negative deltas to zero, see _cpu_times_deltas().
+    deltas = numpy.maximum(t2 - t1, 0)
+    tot = deltas.sum(axis=1)
+    if guest:
+        tot -= deltas[:, guest].sum(axis=1)
+    # If the total is 0 all deltas are 0 as well.
+    scale = 100.0 / numpy.where(tot > 0, tot, 1)
+    if times_percent:
+        return numpy.clip(
+            numpy.round(deltas * scale[:, None], 1), 0.0, 100.0)
+    busy = tot - deltas[:, idle].sum(axis=1)
+    return numpy.round(busy * scale, 1)
+
+
+# Set on first use so that NumPy does not get imported on import.
+_last_cpu_array = None
+
+
+def cpu_percent(interval=None, percpu=False, as_array=False):
     """Return a float representing the current system-wide CPU
     utilization as a percentage.
 
@@ -1802,6 +2196,11 @@ def cpu_percent(interval=None, percpu=False):
     to second CPU and so on.
     The order of the list is consistent across calls.
 
+    When *as_array* is True (requires *percpu*) per-CPU times are
+    collected into a 2-D buffer and percentages are calculated in a
+    vectorized fashion, returning a NumPy array, or a list if NumPy
+    is not installed. This is faster on systems with many CPUs.
+
     Examples:
 
       >>> # blocking, system-wide
@@ -1819,22 +2218,24 @@ def cpu_percent(interval=None, percpu=False):
     """
     global _last_cpu_times
     global _last_per_cpu_times
+    global _last_cpu_array
     blocking = interval is not None and interval > 0.0
     if interval is not None and interval < 0:
         raise ValueError("interval is not positive (got %r)" % interval)
+    if as_array and not percpu:
+        raise ValueError("as_array requires percpu=True")
 
-    def calculate(t1, t2):
-        times_delta = _cpu_times_deltas(t1, t2)
-
-        all_delta = _cpu_tot_time(times_delta)
-        busy_delta = _cpu_busy_time(times_delta)
-
-        try:
-            busy_perc = (busy_delta / all_delta) * 100
-        except ZeroDivisionError:
-            return 0.0
+    # per-cpu usage (vectorized)
+    if as_array:
+        if blocking:
+            t1 = _per_cpu_times_array()
+            time.sleep(interval)
         else:
-            return round(busy_perc, 1)
+            t1 = _last_cpu_array
+            if t1 is None:
+                t1 = _per_cpu_times_array()
+        _last_cpu_array = _per_cpu_times_array()
+        return _cpu_array_percent(t1, _last_cpu_array)
 
     # system-wide usage
     if not percpu:
@@ -1849,7 +2250,7 @@ def cpu_percent(interval=None, percpu=False):
                 # https://github.com/giampaolo/psutil/pull/715
                 t1 = cpu_times()
         _last_cpu_times = cpu_times()
-        return calculate(t1, _last_cpu_times)
+        return _cpu_busy_percent(t1, _last_cpu_times)
     # per-cpu usage
     else:
         ret = []
@@ -1865,7 +2266,7 @@ def cpu_percent(interval=None, percpu=False):
                 tot1 = cpu_times(percpu=True)
         _last_per_cpu_times = cpu_times(percpu=True)
         for t1, t2 in zip(tot1, _last_per_cpu_times):
-            ret.append(calculate(t1, t2))
+            ret.append(_cpu_busy_percent(t1, t2))
         return ret
 
 
@@ -1874,9 +2275,10 @@ def cpu_percent(interval=None, percpu=False):
 # the same program.
 _last_cpu_times_2 = _last_cpu_times
 _last_per_cpu_times_2 = _last_per_cpu_times
+_last_cpu_array_2 = None
 
 
-def cpu_times_percent(interval=None, percpu=False):
+def cpu_times_percent(interval=None, percpu=False, as_array=False):
     """Same as cpu_percent() but provides utilization percentages
     for each specific CPU time as is returned by cpu_times().
     For instance, on Linux we'll get:
@@ -1886,31 +2288,31 @@ def cpu_times_percent(interval=None, percpu=False):
                  irq=0.0, softirq=0.0, steal=0.0, guest=0.0, guest_nice=0.0)
       >>>
 
-    *interval* and *percpu* arguments have the same meaning as in
-    cpu_percent().
+    *interval*, *percpu* and *as_array* arguments have the same
+    meaning as in cpu_percent(). With *as_array* a 2-D (CPUs x fields)
+    array is returned, whose columns are in the same order as the
+    cpu_times() fields.
     """
     global _last_cpu_times_2
     global _last_per_cpu_times_2
+    global _last_cpu_array_2
     blocking = interval is not None and interval > 0.0
     if interval is not None and interval < 0:
         raise ValueError("interval is not positive (got %r)" % interval)
+    if as_array and not percpu:
+        raise ValueError("as_array requires percpu=True")
 
-    def calculate(t1, t2):
-        nums = []
-        times_delta = _cpu_times_deltas(t1, t2)
-        all_delta = _cpu_tot_time(times_delta)
-        # "scale" is the value to multiply each delta with to get percentages.
-        # We use "max" to avoid division by zero (if all_delta is 0, then all
-        # fields are 0 so percentages will be 0 too. all_delta cannot be a
-        # fraction because cpu times are integers)
-        scale = 100.0 / max(1, all_delta)
-        for field_delta in times_delta:
-            field_perc = field_delta * scale
-            field_perc = round(field_perc, 1)
-            # make sure we don't return negative values or values over 100%
-            field_perc = min(max(0.0, field_perc), 100.0)
-            nums.append(field_perc)
-        return _psplatform.scputimes(*nums)
+    # per-cpu usage (vectorized)
+    if as_array:
+        if blocking:
+            t1 = _per_cpu_times_array()
+            time.sleep(interval)
+        else:
+            t1 = _last_cpu_array_2
+            if t1 is None:
+                t1 = _per_cpu_times_array()
+        _last_cpu_array_2 = _per_cpu_times_array()
+        return _cpu_array_percent(t1, _last_cpu_array_2, times_percent=True)
 
     # system-wide usage
     if not percpu:
@@ -1925,7 +2327,7 @@ def cpu_times_percent(interval=None, percpu=False):
                 # https://github.com/giampaolo/psutil/pull/715
                 t1 = cpu_times()
         _last_cpu_times_2 = cpu_times()
-        return calculate(t1, _last_cpu_times_2)
+        return _cpu_fields_percent(t1, _last_cpu_times_2)
     # per-cpu usage
     else:
         ret = []
@@ -1941,10 +2343,66 @@ def cpu_times_percent(interval=None, percpu=False):
                 tot1 = cpu_times(percpu=True)
         _last_per_cpu_times_2 = cpu_times(percpu=True)
         for t1, t2 in zip(tot1, _last_per_cpu_times_2):
-            ret.append(calculate(t1, t2))
+            ret.append(_cpu_fields_percent(t1, t2))
         return ret
 
 
+def _cpu_times_all():
+    """Return a (cpu_times(), cpu_times(percpu=True)) tuple, reading
+    the system only once if the platform supports it.
+    """
+    if hasattr(_psplatform, "cpu_times_all"):
+        return _psplatform.cpu_times_all()
+    return _psplatform.cpu_times(), _psplatform.per_cpu_times()
+
+
+class CpuPercentTracker(object):
+    """Calculate CPU utilization percentages in between update()
+    calls, same as cpu_percent() and cpu_times_percent() with
+    interval=None, except that the baseline ("last call") is held by
+    the instance instead of module globals, so that different callers
+    don't affect each other. It's thread-safe.
+
+    Every update() reads CPU times only once (on Linux /proc/stat is
+    read once for both system-wide and per-CPU times) and returns all
+    percentages together.
+
+    >>> import psutil
+    >>> tracker = psutil.CpuPercentTracker()
+    >>> # ...some time later
+    >>> tracker.update()
+    scpupercent(percent=3.5, percpu=[2.0, 5.0], times_percent=scputimes(
+        user=2.5, system=1.0, idle=96.5, ...), percpu_times_percent=[...])
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last = _cpu_times_all()
+
+    def __repr__(self):
+        return "<%s.%s at %s>" % (
+            self.__class__.__module__, self.__class__.__name__, id(self))
+
+    def update(self):
+        """Return CPU utilization percentages since the previous
+        call (or since the instance was created) as a namedtuple
+        including:
+
+         - percent: same as cpu_percent()
+         - percpu: same as cpu_percent(percpu=True)
+         - times_percent: same as cpu_times_percent()
+         - percpu_times_percent: same as cpu_times_percent(percpu=True)
+        """
+        with self._lock:
+            total1, percpu1 = self._last
+            self._last = total2, percpu2 = _cpu_times_all()
+        return _common.scpupercent(
+            _cpu_busy_percent(total1, total2),
+            [_cpu_busy_percent(x, y) for x, y in zip(percpu1, percpu2)],
+            _cpu_fields_percent(total1, total2),
+            [_cpu_fields_percent(x, y) for x, y in zip(percpu1, percpu2)])
+
+
 def cpu_stats():
     """Return CPU statistics."""
     return _psplatform.cpu_stats()
@@ -2152,12 +2610,79 @@ disk_io_counters.cache_clear = functools.partial(
 disk_io_counters.cache_clear.__doc__ = "Clears nowrap argument cache"
 
 
+def _rates(t1, t2, elapsed):
+    """Given two namedtuples of counters taken *elapsed* seconds
+    apart return a namedtuple of the same type with the per-second
+    rate of every field.
+    """
+    return type(t2)(*[(y - x) / elapsed for x, y in zip(t1, t2)])
+
+
+class _RateTracker(object):
+    """Base class for trackers calculating per-second rates of I/O
+    counters in between update() calls.
+    """
+
+    def __init__(self, per_device=False):
+        self._per_device = per_device
+        self._lock = threading.Lock()
+        self._last = (_timer(), self._counters())
+
+    def __repr__(self):
+        return "<%s.%s at %s>" % (
+            self.__class__.__module__, self.__class__.__name__, id(self))
+
+    def _counters(self):
+        raise NotImplementedError("must be implemented in subclass")
+
+    def update(self):
+        """Return the per-second rates of all counters since the
+        previous call (or since the instance was created) as a
+        namedtuple of the same type returned by the counters function
+        or, if per-device rates were requested, as a dict of them.
+        Devices which appeared in the meantime are not included.
+        Return None if the counters are not available.
+        """
+        with self._lock:
+            ts1, counters1 = self._last
+            self._last = ts2, counters2 = (_timer(), self._counters())
+        elapsed = ts2 - ts1
+        if not counters1 or not counters2 or elapsed <= 0:
+            return {} if self._per_device else None
+        if not self._per_device:
+            return _rates(counters1, counters2, elapsed)
+        return dict([(name, _rates(counters1[name], value, elapsed))
+                     for name, value in counters2.items()
+                     if name in counters1])
+
+
+class DiskIORateTracker(_RateTracker):
+    """Calculate disk_io_counters() per-second rates (e.g. bytes
+    read per second) in between update() calls, holding its own
+    baseline. It's thread-safe. If *perdisk* is True update()
+    returns a dict of rates for every disk.
+
+    >>> import psutil
+    >>> tracker = psutil.DiskIORateTracker()
+    >>> # ...some time later
+    >>> tracker.update().read_bytes
+    12288.7
+    """
+
+    def __init__(self, perdisk=False):
+        _RateTracker.__init__(self, per_device=perdisk)
+
+    def _counters(self):
+        return disk_io_counters(perdisk=self._per_device)
+
+
 # =====================================================================
 # --- network related functions
 # =====================================================================
 
 
-def net_io_counters(pernic=False, nowrap=True):
+def net_io_counters(pernic=False, nowrap=True, netns=None, extended=False,
+                    nics=None):
     """Return network I/O statistics as a namedtuple including
     the following fields:
 
@@ -2182,26 +2707,93 @@ def net_io_counters(pernic=False, nowrap=True):
     but never decrease.
     "disk_io_counters.cache_clear()" can be used to invalidate the
     cache.
+
+    If *netns* is not None (Linux only) return the statistics of the
+    network interfaces of another network namespace, identified
+    either by the PID of a process living in it or by the path of a
+    namespace file (e.g. "/proc/1234/ns/net" or "/var/run/netns/name").
+    The namespace must have at least one process in it, else
+    ValueError is raised. See net_namespaces().
+
+    If *extended* is True (Linux only) 8 more fields are returned:
+    'fifoin', 'fifoout', 'framein', 'compressedin', 'compressedout',
+    'multicastin', 'collisionsout' and 'carrierout'.
+
+    *nics* can be a sequence of network interface names in order to
+    only return (or sum) those; non existent ones are ignored. On
+    Linux their statistics are read from /sys/class/net, which is a
+    lot cheaper than reading all interfaces on systems having many.
     """
-    rawdict = _psplatform.net_io_counters()
+    if isinstance(nics, str):
+        nics = (nics, )
+    if LINUX:
+        rawdict = _psplatform.net_io_counters(
+            netns=netns, extended=extended, nics=nics)
+        ntuple = _psplatform.snetioext if extended else _common.snetio
+    elif netns is not None:
+        raise NotImplementedError("netns is only supported on Linux")
+    elif extended:
+        raise NotImplementedError("extended=True is only supported on Linux")
+    else:
+        rawdict = _psplatform.net_io_counters()
+        if nics is not None:
+            nics = set(nics)
+            rawdict = dict([(k, v) for k, v in rawdict.items() if k in nics])
+        ntuple = _common.snetio
     if not rawdict:
         return {} if pernic else None
     if nowrap:
-        rawdict = _wrap_numbers(rawdict, 'psutil.net_io_counters')
+        if netns is None and not extended and nics is None:
+            cache_name = 'psutil.net_io_counters'
+        else:
+            # the dicts are not comparable across different arguments
+            cache_name = 'psutil.net_io_counters:%r' % (
+                (netns, extended, tuple(sorted(nics or ()))), )
+        rawdict = _wrap_numbers(rawdict, cache_name)
     if pernic:
         for nic, fields in rawdict.items():
-            rawdict[nic] = _common.snetio(*fields)
+            rawdict[nic] = ntuple(*fields)
         return rawdict
     else:
-        return _common.snetio(*[sum(x) for x in zip(*rawdict.values())])
+        return ntuple(*[sum(x) for x in zip(*rawdict.values())])
+
+
+def _net_io_counters_cache_clear():
+    """Clears nowrap argument cache"""
+    for name in list(_wrap_numbers.cache_info()[0]):
+        if name == 'psutil.net_io_counters' or \
+                name.startswith('psutil.net_io_counters:'):
+            _wrap_numbers.cache_clear(name)
+
+
+net_io_counters.cache_clear = _net_io_counters_cache_clear
+
+
+class NetIORateTracker(_RateTracker):
+    """Calculate net_io_counters() per-second rates (e.g. bytes
+    received per second) in between update() calls, holding its own
+    baseline. It's thread-safe. If *pernic* is True update() returns
+    a dict of rates for every network interface. *nics* has the same
+    meaning as in net_io_counters().
 
+    >>> import psutil
+    >>> tracker = psutil.NetIORateTracker(pernic=True)
+    >>> # ...some time later
+    >>> tracker.update()['eth0'].bytes_recv
+    10522.3
+    """
+
+    def __init__(self, pernic=False, nics=None):
+        self._nics = nics
+        _RateTracker.__init__(self, per_device=pernic)
 
-net_io_counters.cache_clear = functools.partial(
-    _wrap_numbers.cache_clear, 'psutil.net_io_counters')
-net_io_counters.cache_clear.__doc__ = "Clears nowrap argument cache"
+    def _counters(self):
+        return net_io_counters(pernic=self._per_device, nics=self._nics)
 
 
-def net_connections(kind='inet'):
+def net_connections(kind='inet', status=None, lport=None, rport=None,
+                    laddr=None, resolve_pids=True, extended=False,
+                    netns=None):
     """Return system-wide socket connections as a list of
     (fd, family, type, laddr, raddr, status, pid) namedtuples.
     In case of limited privileges 'fd' and 'pid' may be set to -1
@@ -2225,9 +2817,145 @@ def net_connections(kind='inet'):
     | all        | the sum of all the possible families and protocols |
     +------------+----------------------------------------------------+
 
+    The remaining parameters can be used to further restrict the
+    returned connections:
+
+     - status: a CONN_* constant (e.g. CONN_LISTEN) or a sequence of
+               them; UDP and UNIX sockets have status CONN_NONE.
+     - lport: the local port.
+     - rport: the remote port.
+     - laddr: the local IP address (or path for UNIX sockets).
+
+    On Linux they are applied while reading the sockets, so that the
+    ones being filtered out are never decoded.
+
+    On Linux mapping sockets to PIDs requires inspecting the fds of
+    all processes, which is by far the most expensive part. If
+    *resolve_pids* is False this is skipped ('fd' and 'pid' will be
+    set to -1 and None). An InodeIndex instance can also be passed,
+    in which case that is refreshed incrementally and reused.
+    Other platforms ignore this parameter.
+
+    If *extended* is True (Linux only) 5 more fields are returned:
+    'txqueue' and 'rxqueue' (bytes in the send and receive queues),
+    'retransmits' (unrecovered retransmission timeouts), 'rtt' and
+    'rttvar' (smoothed round trip time and its variance in
+    milliseconds). Those which are not available are set to None.
+
+    If *netns* is not None (Linux only) return the connections of
+    another network namespace, identified either by the PID of a
+    process living in it or by the path of a namespace file (e.g.
+    "/proc/1234/ns/net" or "/var/run/netns/name"); see
+    net_namespaces(). PIDs are still resolved system-wide. The
+    namespace must have at least one process in it, else ValueError
+    is raised.
+
     On macOS this function requires root privileges.
     """
-    return _psplatform.net_connections(kind)
+    status = _common.conn_statuses(status)
+    if LINUX:
+        return _psplatform.net_connections(
+            kind, status=status, lport=lport, rport=rport, laddr=laddr,
+            resolve_pids=resolve_pids, extended=extended, netns=netns)
+    if extended:
+        raise NotImplementedError("extended=True is only supported on Linux")
+    if netns is not None:
+        raise NotImplementedError("netns is only supported on Linux")
+    ret = _psplatform.net_connections(kind)
+    if status is None and lport is None and rport is None and \
+            laddr is None:
+        return ret
+    return [x for x in ret
+            if _common.conn_match(x, status, lport, rport, laddr)]
+
+
+def net_connections_iter(kind='inet', status=None, lport=None, rport=None,
+                         laddr=None, resolve_pids=True, extended=False,
+                         netns=None, dedup=False):
+    """Same as net_connections() but return a generator yielding
+    connections as they are read, so that the caller can stop early.
+    On Linux, if sockets are read from /proc/net/* rather than via
+    NETLINK_SOCK_DIAG, memory usage also does not grow with the number
+    of sockets (NETLINK_SOCK_DIAG fetches all the sockets of a given
+    family and type at once). Unless *dedup* is True the same connection may be
+    yielded more than once (e.g. UNIX sockets which can't be told
+    apart); de-duplicating requires keeping track of all the
+    connections yielded so far.
+    """
+    status = _common.conn_statuses(status)
+    if LINUX:
+        ret = _psplatform.net_connections_iter(
+            kind, status=status, lport=lport, rport=rport, laddr=laddr,
+            resolve_pids=resolve_pids, extended=extended, netns=netns)
+    else:
+        ret = iter(net_connections(
+            kind, status=status, lport=lport, rport=rport, laddr=laddr,
+            resolve_pids=resolve_pids, extended=extended, netns=netns))
+    if dedup:
+        ret = _unique_everseen(ret)
+    return ret
+
+
+def _unique_everseen(iterable):
+    seen = set()
+    for item in iterable:
+        if item not in seen:
+            seen.add(item)
+            yield item
+
+
+if hasattr(_psplatform, "InodeIndex"):
+    InodeIndex = _psplatform.InodeIndex
+    __all__.append("InodeIndex")
+
+
+if hasattr(_psplatform, "net_namespaces"):
+
+    def net_namespaces():
+        """Return the network namespaces in use by processes as a
+        {namespace_inode: [pid, ...]} dict. Any of those PIDs can be
+        passed as the *netns* argument of net_connections() and
+        net_io_counters(), so that every namespace is visited once.
+        Processes which can't be inspected due to limited privileges
+        are skipped (Linux only).
+        """
+        return _psplatform.net_namespaces()
+
+    __all__.append("net_namespaces")
+
+
+def net_connection_stats(kind='inet', group_by=('status', 'lport')):
+    """Return the number of sockets of the given *kind* (see
+    net_connections()) as a dict mapping a tuple of *group_by*
+    values to a count, e.g. for the default group_by:
+
+    {('LISTEN', 22): 1, ('ESTABLISHED', 22): 3, ...}
+
+    Valid group_by fields are 'family', 'type', 'status', 'laddr',
+    'lport', 'raddr', 'rport' and 'pid'. 'laddr' and 'raddr' refer to
+    the IP address (the path for UNIX sockets); values which are not
+    available (e.g. the remote port of a listening socket) are None.
+
+    This is a lot cheaper than counting the output of
+    net_connections(): on Linux no namedtuple is created, IP
+    addresses are decoded once per group and sockets are mapped to
+    PIDs only if grouping by 'pid'.
+    """
+    if isinstance(group_by, str):
+        group_by = (group_by, )
+    group_by = tuple(group_by)
+    if not group_by:
+        raise ValueError("group_by can't be empty")
+    invalid = [x for x in group_by if x not in _common.CONN_STATS_FIELDS]
+    if invalid:
+        raise ValueError("invalid group_by field %r; choose between %s" % (
+            invalid[0], ', '.join(_common.CONN_STATS_FIELDS)))
+    if hasattr(_psplatform, "net_connection_stats"):
+        return _psplatform.net_connection_stats(kind, group_by)
+    counts = collections.defaultdict(int)
+    for conn in net_connections(kind):
+        counts[_common.conn_group_key(conn, group_by)] += 1
+    return dict(counts)
 
 
 def net_if_addrs():
@@ -2367,11 +3095,330 @@ if hasattr(_psplatform, "sensors_battery"):
     __all__.append("sensors_battery")
 
 
+# =====================================================================
+# --- background sampling
+# =====================================================================
+
+
+class Sampler(object):
+    """Sample system metrics every *interval* seconds in a background
+    thread and keep the last *maxlen* samples of each one in a ring
+    buffer. Rates and percentages over any window covered by the
+    buffers can then be queried without reading the system again.
+    Every instance has its own buffers, so different consumers in the
+    same process don't interfere with each other as they do with
+    cpu_percent(interval=None).
+
+    *metrics* is a sequence of names among Sampler.METRICS:
+
+     - cpu_times: cpu_times()
+     - per_cpu_times: cpu_times(percpu=True)
+     - cpu_stats: cpu_stats()
+     - virtual_memory: virtual_memory()
+     - swap_memory: swap_memory()
+     - disk_io_counters: disk_io_counters()
+     - net_io_counters: net_io_counters()
+
+    >>> import psutil
+    >>> sampler = psutil.Sampler(interval=1, maxlen=300)
+    >>> sampler.start()
+    >>> # ...some time later
+    >>> sampler.cpu_percent(window=60)
+    12.5
+    >>> sampler.rate('net_io_counters', window=10).bytes_recv
+    10522.3
+    >>> sampler.stop()
+    """
+
+    METRICS = {
+        'cpu_times': lambda: cpu_times(),
+        'per_cpu_times': lambda: cpu_times(percpu=True),
+        'cpu_stats': lambda: cpu_stats(),
+        'virtual_memory': lambda: virtual_memory(),
+        'swap_memory': lambda: swap_memory(),
+        'disk_io_counters': lambda: disk_io_counters(),
+        'net_io_counters': lambda: net_io_counters(),
+    }
+
+    def __init__(self, metrics=('cpu_times', 'disk_io_counters',
+                                'net_io_counters'),
+                 interval=1.0, maxlen=60):
+        if isinstance(metrics, str):
+            metrics = (metrics, )
+        for name in metrics:
+            if name not in self.METRICS:
+                raise ValueError(
+                    "invalid metric %r; choose between %s" % (
+                        name, ', '.join(sorted(self.METRICS))))
+        if interval <= 0:
+            raise ValueError("interval must be > 0 (got %r)" % interval)
+        if maxlen < 2:
+            raise ValueError("maxlen must be >= 2 (got %r)" % maxlen)
+        self.metrics = tuple(metrics)
+        self.interval = interval
+        self.maxlen = maxlen
+        self._buffers = dict([(name, collections.deque(maxlen=maxlen))
+                              for name in self.metrics])
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        # {metric: exception} raised by the last failed sample taken
+        # by the thread; removed once the metric is sampled again
+        self.errors = {}
+
+    def __repr__(self):
+        return "<%s.%s(metrics=%r, interval=%r, running=%s) at %s>" % (
+            self.__class__.__module__, self.__class__.__name__,
+            list(self.metrics), self.interval, self.is_running(), id(self))
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    # --- sampling
+
+    def is_running(self):
+        """Return whether the sampling thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Take a first sample and start the sampling thread (a
+        daemon thread). It's a no-op if it's already running.
+        """
+        if self.is_running():
+            return
+        self.sample()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name="psutil-sampler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop the sampling thread; samples taken so far are kept."""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            self._stop_event.wait(self.interval)
+            if self._stop_event.is_set():
+                break
+            for name in self.metrics:
+                try:
+                    self._sample(name)
+                except Exception as err:
+                    # don't let the thread die on a transient error;
+                    # the sample is just missing
+                    with self._lock:
+                        self.errors[name] = err
+                else:
+                    if name in self.errors:
+                        with self._lock:
+                            self.errors.pop(name, None)
+
+    def _sample(self, name):
+        value = self.METRICS[name]()
+        ts = _timer()
+        with self._lock:
+            self._buffers[name].append((ts, value))
+
+    def sample(self):
+        """Take a sample of all metrics now. This is what the
+        sampling thread does every *interval* seconds.
+        """
+        for name in self.metrics:
+            self._sample(name)
+
+    def clear(self):
+        """Discard all samples."""
+        with self._lock:
+            for buf in self._buffers.values():
+                buf.clear()
+
+    # --- queries
+
+    def samples(self, metric):
+        """Return the samples of *metric* as a list of
+        (timestamp, value) tuples, from the oldest to the newest.
+        Timestamps are not related to the epoch and are only meant
+        to be compared with each other.
+        """
+        if metric not in self._buffers:
+            raise ValueError("%r metric is not being sampled" % metric)
+        with self._lock:
+            return list(self._buffers[metric])
+
+    def latest(self, metric):
+        """Return the most recent value of *metric* or None if there
+        are no samples yet.
+        """
+        samples = self.samples(metric)
+        return samples[-1][1] if samples else None
+
+    def _bounds(self, metric, window):
+        """Return the first and last (timestamp, value) samples
+        delimiting the last *window* seconds (all samples if None)
+        or None if there are less than 2 samples.
+        """
+        samples = self.samples(metric)
+        if len(samples) < 2:
+            return None
+        last = samples[-1]
+        if window is None:
+            return samples[0], last
+        # oldest sample within the window; use at least 2 samples
+        first = samples[-2]
+        for sample in reversed(samples[:-2]):
+            if last[0] - sample[0] > window:
+                break
+            first = sample
+        return first, last
+
+    def cpu_percent(self, window=None, percpu=False):
+        """Same as cpu_percent() but calculated over the last *window*
+        seconds of samples (all samples if None). Requires the
+        'cpu_times' metric ('per_cpu_times' if *percpu* is True).
+        Return None if less than 2 samples are available.
+        """
+        bounds = self._bounds(
+            'per_cpu_times' if percpu else 'cpu_times', window)
+        if bounds is None:
+            return None
+        (_, t1), (_, t2) = bounds
+        if percpu:
+            return [_cpu_busy_percent(x, y) for x, y in zip(t1, t2)]
+        return _cpu_busy_percent(t1, t2)
+
+    def cpu_times_percent(self, window=None, percpu=False):
+        """Same as cpu_times_percent() but calculated over the last
+        *window* seconds of samples; see cpu_percent().
+        """
+        bounds = self._bounds(
+            'per_cpu_times' if percpu else 'cpu_times', window)
+        if bounds is None:
+            return None
+        (_, t1), (_, t2) = bounds
+        if percpu:
+            return [_cpu_fields_percent(x, y) for x, y in zip(t1, t2)]
+        return _cpu_fields_percent(t1, t2)
+
+    def rate(self, metric, window=None):
+        """Return the per-second rate of change of every field of
+        *metric* (e.g. bytes received per second for
+        'net_io_counters') over the last *window* seconds of samples
+        (all samples if None), as a namedtuple of the same type.
+        Return None if less than 2 samples are available.
+        """
+        bounds = self._bounds(metric, window)
+        if bounds is None:
+            return None
+        (ts1, v1), (ts2, v2) = bounds
+        if v1 is None or v2 is None:
+            return None
+        elapsed = ts2 - ts1
+        if elapsed <= 0:
+            return None
+        return _rates(v1, v2, elapsed)
+
+
 # =====================================================================
 # --- other system related functions
 # =====================================================================
 
 
+@contextlib.contextmanager
+def oneshot():
+    """Utility context manager which considerably speeds up the
+    retrieval of multiple system-wide metrics at the same time.
+
+    Several functions parse the same underlying file: on Linux
+    cpu_times(), cpu_stats() and boot_time() all read /proc/stat
+    while virtual_memory() and swap_memory() both read
+    /proc/meminfo. Inside this context manager every such file is
+    read only once and its content is reused by all the functions
+    called from the same thread; it is discarded on exit.
+
+    >>> import psutil
+    >>> with psutil.oneshot():
+    ...     psutil.cpu_times()  # read /proc/stat
+    ...     psutil.cpu_stats()  # reuse cached /proc/stat content
+    ...     psutil.boot_time()  # reuse cached /proc/stat content
+    ...     psutil.virtual_memory()  # read /proc/meminfo
+    ...     psutil.swap_memory()  # reuse cached /proc/meminfo content
+    ...
+    >>>
+
+    Since values don't change inside the block, calling a blocking
+    cpu_percent(interval=...) within it is pointless.
+    On platforms other than Linux this does nothing.
+    """
+    if not hasattr(_psplatform, "oneshot_enter"):
+        yield
+        return
+    _psplatform.oneshot_enter()
+    try:
+        yield
+    finally:
+        _psplatform.oneshot_exit()
+
+
+def system_snapshot():
+    """Return the most common system-wide CPU and memory metrics at
+    once as a namedtuple including the following fields:
+
+     - cpu_times:      same as cpu_times()
+     - per_cpu_times:  same as cpu_times(percpu=True)
+     - cpu_stats:      same as cpu_stats()
+     - virtual_memory: same as virtual_memory()
+     - swap_memory:    same as swap_memory()
+     - loadavg:        same as os.getloadavg() (None if not available)
+     - boot_time:      same as boot_time()
+
+    This is faster than calling the single functions separately
+    because the underlying files are read only once (see oneshot()).
+    On Linux /proc/stat, /proc/meminfo, /proc/vmstat and /proc/loadavg
+    are read exactly once each.
+    """
+    with oneshot():
+        if hasattr(_psplatform, "loadavg"):
+            load = _psplatform.loadavg()
+        elif hasattr(os, "getloadavg"):
+            load = os.getloadavg()
+        else:
+            load = None
+        return _common.ssnapshot(
+            cpu_times(), cpu_times(percpu=True), cpu_stats(),
+            virtual_memory(), swap_memory(), load, boot_time())
+
+
+if hasattr(_psplatform, "fd_pool"):
+
+    def enable_fd_pool():
+        """Keep the system-wide /proc files read by cpu_times(),
+        cpu_stats(), boot_time(), virtual_memory(), swap_memory(),
+        net_io_counters() and disk_io_counters() open and re-read them
+        from offset 0 on every call instead of opening and closing
+        them every time. This saves 2 syscalls and a file object per
+        read, which is noticeable when sampling at a high frequency.
+        Changes to PROCFS_PATH are taken into account.
+        """
+        _psplatform.fd_pool.enable()
+
+    def disable_fd_pool():
+        """Disable the pool enabled by enable_fd_pool() and close all
+        its file descriptors.
+        """
+        _psplatform.fd_pool.disable()
+
+    __all__.extend(["enable_fd_pool", "disable_fd_pool"])
+
+
 def boot_time():
     """Return the system boot time expressed in seconds since the epoch."""
     # Note: we are not caching this because it is subject to
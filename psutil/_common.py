@@ -58,10 +58,13 @@ __all__ = [
     'STATUS_WAKING', 'STATUS_ZOMBIE', 'STATUS_PARKED',
     # named tuples
     'pconn', 'pcputimes', 'pctxsw', 'pgids', 'pio', 'pionice', 'popenfile',
-    'pthread', 'puids', 'sconn', 'scpustats', 'sdiskio', 'sdiskpart',
-    'sdiskusage', 'snetio', 'snicaddr', 'snicstats', 'sswap', 'suser',
+    'pthread', 'puids', 'sconn', 'scpupercent', 'scpustats', 'sdiskio',
+    'sdiskpart',
+    'sdiskusage', 'snetio', 'snicaddr', 'snicstats', 'ssnapshot', 'sswap',
+    'suser',
     # utility functions
-    'conn_tmap', 'deprecated_method', 'isfile_strict', 'memoize',
+    'conn_group_key', 'conn_match', 'conn_statuses', 'conn_tmap',
+    'deprecated_method', 'isfile_strict', 'memoize',
     'parse_environ_block', 'path_exists_strict', 'usage_percent',
     'supports_ipv6', 'sockfam_to_enum', 'socktype_to_enum', "wrap_numbers",
 ]
@@ -192,6 +195,14 @@ snicstats = namedtuple('snicstats', ['isup', 'duplex', 'speed', 'mtu'])
 # psutil.cpu_stats()
 scpustats = namedtuple(
     'scpustats', ['ctx_switches', 'interrupts', 'soft_interrupts', 'syscalls'])
+# psutil.CpuPercentTracker.update()
+scpupercent = namedtuple(
+    'scpupercent', ['percent', 'percpu', 'times_percent',
+                    'percpu_times_percent'])
+# psutil.system_snapshot()
+ssnapshot = namedtuple(
+    'ssnapshot', ['cpu_times', 'per_cpu_times', 'cpu_stats', 'virtual_memory',
+                  'swap_memory', 'loadavg', 'boot_time'])
 # psutil.cpu_freq()
 scpufreq = namedtuple('scpufreq', ['current', 'min', 'max'])
 # psutil.sensors_temperatures()
@@ -260,6 +271,79 @@ if AF_UNIX is not None:
 del AF_INET, AF_UNIX, SOCK_STREAM, SOCK_DGRAM
 
 
+# ===================================================================
+# --- net_connections() filters
+# ===================================================================
+
+
+CONN_STATUSES = frozenset([
+    CONN_ESTABLISHED, CONN_SYN_SENT, CONN_SYN_RECV, CONN_FIN_WAIT1,
+    CONN_FIN_WAIT2, CONN_TIME_WAIT, CONN_CLOSE, CONN_CLOSE_WAIT,
+    CONN_LAST_ACK, CONN_LISTEN, CONN_CLOSING, CONN_NONE])
+
+
+def conn_statuses(status):
+    """Convert the *status* argument of net_connections() (a CONN_*
+    constant or a sequence of them) into a frozenset, or None if
+    no filter is requested.
+    """
+    if status is None:
+        return None
+    if isinstance(status, str):
+        status = (status,)
+    status = frozenset(status)
+    invalid = status - CONN_STATUSES
+    if invalid:
+        raise ValueError("invalid status %r; choose between %s" % (
+            sorted(invalid)[0], ', '.join(sorted(CONN_STATUSES))))
+    return status
+
+
+def conn_match(conn, status=None, lport=None, rport=None, laddr=None):
+    """Return True if *conn* (a sconn or pconn namedtuple) matches the
+    net_connections() filters. *status* is a set as returned by
+    conn_statuses(). This is the generic implementation used by
+    platforms which are not able to apply them while parsing.
+    """
+    if status is not None and conn.status not in status:
+        return False
+    if isinstance(conn.laddr, tuple):
+        lip, lport_ = conn.laddr or (None, None)
+        rport_ = conn.raddr.port if conn.raddr else None
+    else:
+        # UNIX socket
+        lip, lport_, rport_ = conn.laddr, None, None
+    if lport is not None and lport_ != lport:
+        return False
+    if rport is not None and rport_ != rport:
+        return False
+    if laddr is not None and lip != laddr:
+        return False
+    return True
+
+
+# the fields net_connection_stats() can group by
+CONN_STATS_FIELDS = ('family', 'type', 'status', 'laddr', 'lport', 'raddr',
+                     'rport', 'pid')
+
+
+def conn_group_key(conn, group_by):
+    """Given a sconn namedtuple return the net_connection_stats() key
+    made of the *group_by* fields. 'laddr' and 'raddr' refer to the
+    IP address (or path for UNIX sockets); missing values are None.
+    """
+    if isinstance(conn.laddr, tuple):
+        lip, lport = conn.laddr or (None, None)
+        rip, rport = conn.raddr or (None, None)
+    else:
+        # UNIX socket
+        lip, lport, rip, rport = conn.laddr or None, None, None, None
+    values = dict(family=conn.family, type=conn.type, status=conn.status,
+                  laddr=lip, lport=lport, raddr=rip, rport=rport,
+                  pid=conn.pid)
+    return tuple([values[x] for x in group_by])
+
+
 # ===================================================================
 # --- utils
 # ===================================================================
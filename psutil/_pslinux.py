@@ -11,11 +11,13 @@ import collections
 import errno
 import functools
 import glob
+import itertools
 import os
 import re
 import socket
 import struct
 import sys
+import threading
 import traceback
 import warnings
 from collections import defaultdict
@@ -69,8 +71,10 @@ __extra__all__ = [
 
 POWER_SUPPLY_PATH = "/sys/class/power_supply"
 HAS_SMAPS = os.path.exists('/proc/%s/smaps' % os.getpid())
+HAS_SMAPS_ROLLUP = os.path.exists('/proc/%s/smaps_rollup' % os.getpid())
 HAS_PRLIMIT = hasattr(cext, "linux_prlimit")
 HAS_PROC_IO_PRIORITY = hasattr(cext, "proc_ioprio_get")
+HAS_SOCK_DIAG = hasattr(cext, "net_connections_diag")
 _DEFAULT = object()
 
 # RLIMIT_* constants, not guaranteed to be present on all kernels
@@ -158,6 +162,41 @@ TCP_STATUSES = {
     "0B": _common.CONN_CLOSING
 }
 
+# same as above, indexed by the numeric state returned by
+# NETLINK_SOCK_DIAG
+DIAG_TCP_STATUSES = dict((int(k, 16), v) for k, v in TCP_STATUSES.items())
+# TCP_STATUSES keys -> NETLINK_SOCK_DIAG states bitmask; SYN_RECV also
+# includes TCP_NEW_SYN_RECV (12) request sockets
+DIAG_TCP_STATES_MASK = dict(
+    (k, 1 << int(k, 16)) for k in TCP_STATUSES)
+DIAG_TCP_STATES_MASK["03"] |= 1 << 12
+# all the TCP states listed in /proc/net/*; the bitmask passed to
+# NETLINK_SOCK_DIAG. Not 0xffffffff: that would also include
+# TCP_BOUND_INACTIVE (Linux >= 6.5) sockets, which are bound but not
+# listening and are not listed in /proc/net/tcp*.
+DIAG_ALL_STATES = functools.reduce(
+    lambda x, y: x | y, DIAG_TCP_STATES_MASK.values())
+# max number of IP addresses cached by Connections.decode_addresses()
+DECODED_IPS_CACHE_MAXSIZE = 4096
+# number of /proc/net/* lines whose addresses are decoded at once
+DECODE_BATCH_SIZE = 1024
+# processes having up to this many socket inodes get their /proc/net/*
+# lines looked up by inode rather than parsing the whole file
+INODE_LOOKUP_MAX = 64
+# /sys/class/net/{NIC}/statistics/* files making up every snetioext
+# field; some are the sum of several files, same as /proc/net/dev
+NET_SYSFS_STATS = (
+    ('tx_bytes', ), ('rx_bytes', ), ('tx_packets', ), ('rx_packets', ),
+    ('rx_errors', ), ('tx_errors', ), ('rx_dropped', 'rx_missed_errors'),
+    ('tx_dropped', ), ('rx_fifo_errors', ), ('tx_fifo_errors', ),
+    ('rx_length_errors', 'rx_over_errors', 'rx_crc_errors',
+     'rx_frame_errors'),
+    ('rx_compressed', ), ('tx_compressed', ), ('multicast', ),
+    ('collisions', ),
+    ('tx_carrier_errors', 'tx_aborted_errors', 'tx_window_errors',
+     'tx_heartbeat_errors'),
+)
+
 # These objects get set on "import psutil" from the __init__.py
 # file, see: https://github.com/giampaolo/psutil/issues/1402
 NoSuchProcess = None
@@ -201,6 +240,13 @@ pmmap_ext = namedtuple(
 pio = namedtuple('pio', ['read_count', 'write_count',
                          'read_bytes', 'write_bytes',
                          'read_chars', 'write_chars'])
+# psutil.net_connections(extended=True)
+sconnext = namedtuple('sconnext', _common.sconn._fields + (
+    'txqueue', 'rxqueue', 'retransmits', 'rtt', 'rttvar'))
+# psutil.net_io_counters(extended=True)
+snetioext = namedtuple('snetioext', _common.snetio._fields + (
+    'fifoin', 'fifoout', 'framein', 'compressedin', 'compressedout',
+    'multicastin', 'collisionsout', 'carrierout'))
 
 
 # =====================================================================
@@ -208,6 +254,148 @@ pio = namedtuple('pio', ['read_count', 'write_count',
 # =====================================================================
 
 
+def pread_all(fd, bufsize=4096):
+    """Read the whole content of file descriptor *fd* starting from
+    offset 0, *bufsize* bytes at a time. A short read does not mean
+    EOF: seq_file-backed /proc files return at most about one page
+    per read() call, so keep reading until an empty chunk.
+    """
+    chunks = []
+    if hasattr(os, "pread"):
+        offset = 0
+        while True:
+            data = os.pread(fd, bufsize, offset)
+            if not data:
+                break
+            chunks.append(data)
+            offset += len(data)
+    else:
+        # Python 2
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            data = os.read(fd, bufsize)
+            if not data:
+                break
+            chunks.append(data)
+    return b"".join(chunks)
+
+
+def readinto_all(f, buf):
+    """Read the whole content of unbuffered file *f* starting from
+    offset 0 into bytearray *buf*. Like pread_all() keep reading
+    until EOF. If *buf* is too small a bigger one is allocated.
+    Return a (buf, nbytes) tuple.
+    """
+    f.seek(0)
+    nbytes = 0
+    while True:
+        if nbytes == len(buf):
+            buf = buf + bytearray(len(buf))
+        n = f.readinto(memoryview(buf)[nbytes:])
+        if not n:
+            return (buf, nbytes)
+        nbytes += n
+
+
+class FdPool(object):
+    """A pool of file descriptors which are kept open and re-read from
+    offset 0 on every call instead of being opened and closed every
+    time. procfs files are regenerated on every read starting from 0
+    so this works for all system-wide /proc files. Every file is read
+    into its own preallocated buffer, which is reused across calls.
+    Disabled by default, see psutil.enable_fd_pool().
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._procfs_path = None
+        # {path: [file, bytearray]}
+        self._files = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        with self._lock:
+            self.enabled = False
+            self._close_all()
+
+    def _close_all(self):
+        for f, _ in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def read(self, path):
+        """Return the whole content of *path* as bytes."""
+        with self._lock:
+            procfs_path = get_procfs_path()
+            if procfs_path != self._procfs_path:
+                # psutil.PROCFS_PATH changed: the old fds refer to the
+                # old mount point
+                self._close_all()
+                self._procfs_path = procfs_path
+            try:
+                entry = self._files[path]
+            except KeyError:
+                entry = self._files[path] = [
+                    open(path, 'rb', buffering=0), bytearray(8192)]
+            f, buf = entry
+            try:
+                buf, nbytes = readinto_all(f, buf)
+            except EnvironmentError:
+                del self._files[path]
+                f.close()
+                raise
+            # keep the (possibly grown) buffer for next time
+            entry[1] = buf
+            return bytes(memoryview(buf)[:nbytes])
+
+
+fd_pool = FdPool()
+
+# System-wide oneshot mode: {path: content} of the /proc files read
+# by the current thread, see oneshot_enter().
+_oneshot = threading.local()
+
+
+def oneshot_enter():
+    """Start caching the content of the system-wide /proc files read
+    by read_procfs() in the current thread, so that functions which
+    parse the same file (e.g. cpu_times() and cpu_stats()) read it
+    only once. Calls can be nested.
+    """
+    depth = getattr(_oneshot, 'depth', 0)
+    if depth == 0:
+        _oneshot.cache = {}
+    _oneshot.depth = depth + 1
+
+
+def oneshot_exit():
+    _oneshot.depth -= 1
+    if _oneshot.depth == 0:
+        _oneshot.cache = None
+
+
+def read_procfs(name):
+    """Return the content of /proc/{name} as bytes, cached if oneshot
+    mode is active (see oneshot_enter()) and read through fd_pool if
+    that is enabled.
+    """
+    path = "%s/%s" % (get_procfs_path(), name)
+    cache = getattr(_oneshot, 'cache', None)
+    if cache is not None and path in cache:
+        return cache[path]
+    if fd_pool.enabled:
+        data = fd_pool.read(path)
+    else:
+        with open_binary(path) as f:
+            data = f.read()
+    if cache is not None:
+        cache[path] = data
+    return data
+
+
 if PY3:
     def decode(s):
         return s.decode(encoding=ENCODING, errors=ENCODING_ERRS)
@@ -398,10 +586,9 @@ def virtual_memory():
     """
     missing_fields = []
     mems = {}
-    with open_binary('%s/meminfo' % get_procfs_path()) as f:
-        for line in f:
-            fields = line.split()
-            mems[fields[0]] = int(fields[1]) * 1024
+    for line in read_procfs('meminfo').splitlines():
+        fields = line.split()
+        mems[fields[0]] = int(fields[1]) * 1024
 
     # /proc doc states that the available fields in /proc/meminfo vary
     # by architecture and compile options, but these 3 values are also
@@ -505,10 +692,9 @@ def virtual_memory():
 def swap_memory():
     """Return swap memory metrics."""
     mems = {}
-    with open_binary('%s/meminfo' % get_procfs_path()) as f:
-        for line in f:
-            fields = line.split()
-            mems[fields[0]] = int(fields[1]) * 1024
+    for line in read_procfs('meminfo').splitlines():
+        fields = line.split()
+        mems[fields[0]] = int(fields[1]) * 1024
     # We prefer /proc/meminfo over sysinfo() syscall so that
     # psutil.PROCFS_PATH can be used in order to allow retrieval
     # for linux containers, see:
@@ -525,7 +711,7 @@ def swap_memory():
     percent = usage_percent(used, total, round_=1)
     # get pgin/pgouts
     try:
-        f = open_binary("%s/vmstat" % get_procfs_path())
+        data = read_procfs("vmstat")
     except IOError as err:
         # see https://github.com/giampaolo/psutil/issues/722
         msg = "'sin' and 'sout' swap memory stats couldn't " \
@@ -533,25 +719,24 @@ def swap_memory():
         warnings.warn(msg, RuntimeWarning)
         sin = sout = 0
     else:
-        with f:
-            sin = sout = None
-            for line in f:
-                # values are expressed in 4 kilo bytes, we want
-                # bytes instead
-                if line.startswith(b'pswpin'):
-                    sin = int(line.split(b' ')[1]) * 4 * 1024
-                elif line.startswith(b'pswpout'):
-                    sout = int(line.split(b' ')[1]) * 4 * 1024
-                if sin is not None and sout is not None:
-                    break
-            else:
-                # we might get here when dealing with exotic Linux
-                # flavors, see:
-                # https://github.com/giampaolo/psutil/issues/313
-                msg = "'sin' and 'sout' swap memory stats couldn't " \
-                      "be determined and were set to 0"
-                warnings.warn(msg, RuntimeWarning)
-                sin = sout = 0
+        sin = sout = None
+        for line in data.splitlines():
+            # values are expressed in 4 kilo bytes, we want
+            # bytes instead
+            if line.startswith(b'pswpin'):
+                sin = int(line.split(b' ')[1]) * 4 * 1024
+            elif line.startswith(b'pswpout'):
+                sout = int(line.split(b' ')[1]) * 4 * 1024
+            if sin is not None and sout is not None:
+                break
+        else:
+            # we might get here when dealing with exotic Linux
+            # flavors, see:
+            # https://github.com/giampaolo/psutil/issues/313
+            msg = "'sin' and 'sout' swap memory stats couldn't " \
+                  "be determined and were set to 0"
+            warnings.warn(msg, RuntimeWarning)
+            sin = sout = 0
     return _common.sswap(total, used, free, percent, sin, sout)
 
 
@@ -567,10 +752,8 @@ def cpu_times():
      [guest_nice]]])
     Last 3 fields may not be available on all Linux kernel versions.
     """
-    procfs_path = get_procfs_path()
-    set_scputimes_ntuple(procfs_path)
-    with open_binary('%s/stat' % procfs_path) as f:
-        values = f.readline().split()
+    set_scputimes_ntuple(get_procfs_path())
+    values = read_procfs('stat').split(b'\n', 1)[0].split()
     fields = values[1:len(scputimes._fields) + 1]
     fields = [float(x) / CLOCK_TICKS for x in fields]
     return scputimes(*fields)
@@ -580,20 +763,59 @@ def per_cpu_times():
     """Return a list of namedtuple representing the CPU times
     for every CPU available on the system.
     """
-    procfs_path = get_procfs_path()
-    set_scputimes_ntuple(procfs_path)
+    set_scputimes_ntuple(get_procfs_path())
     cpus = []
-    with open_binary('%s/stat' % procfs_path) as f:
-        # get rid of the first line which refers to system wide CPU stats
-        f.readline()
-        for line in f:
-            if line.startswith(b'cpu'):
-                values = line.split()
-                fields = values[1:len(scputimes._fields) + 1]
-                fields = [float(x) / CLOCK_TICKS for x in fields]
-                entry = scputimes(*fields)
-                cpus.append(entry)
-        return cpus
+    # get rid of the first line which refers to system wide CPU stats
+    for line in read_procfs('stat').splitlines()[1:]:
+        if line.startswith(b'cpu'):
+            values = line.split()
+            fields = values[1:len(scputimes._fields) + 1]
+            fields = [float(x) / CLOCK_TICKS for x in fields]
+            entry = scputimes(*fields)
+            cpus.append(entry)
+    return cpus
+
+
+def cpu_times_all():
+    """Return a (cpu_times(), per_cpu_times()) tuple reading
+    /proc/stat only once.
+    """
+    set_scputimes_ntuple(get_procfs_path())
+    nfields = len(scputimes._fields) + 1
+    total = None
+    cpus = []
+    for line in read_procfs('stat').splitlines():
+        if not line.startswith(b'cpu'):
+            # "cpu" lines come first
+            break
+        fields = [float(x) / CLOCK_TICKS for x in line.split()[1:nfields]]
+        if total is None:
+            total = scputimes(*fields)
+        else:
+            cpus.append(scputimes(*fields))
+    return total, cpus
+
+
+def per_cpu_times_raw():
+    """Same as per_cpu_times() but return a list of lists of clock
+    ticks (in the same order as scputimes fields), skipping float
+    and namedtuple conversions. Used by cpu_percent(as_array=True).
+    """
+    set_scputimes_ntuple(get_procfs_path())
+    nfields = len(scputimes._fields) + 1
+    # Per-CPU lines ("cpuN ...") are contiguous: grab the whole block
+    # and split it in one go instead of going line by line. All lines
+    # have the same number of columns, so rows are sliced out of the
+    # flat list of tokens.
+    m = re.search(br'^cpu\d+ .*\n(?:cpu\d+ .*\n)*', read_procfs('stat'),
+                  re.M)
+    if m is None:
+        return []
+    block = m.group()
+    tokens = block.split()
+    ncols = len(tokens) // block.count(b'\n')
+    return [list(map(int, tokens[i + 1:i + nfields]))
+            for i in range(0, len(tokens), ncols)]
 
 
 def cpu_count_logical():
@@ -652,20 +874,19 @@ def cpu_count_physical():
 
 def cpu_stats():
     """Return various CPU stats as a named tuple."""
-    with open_binary('%s/stat' % get_procfs_path()) as f:
-        ctx_switches = None
-        interrupts = None
-        soft_interrupts = None
-        for line in f:
-            if line.startswith(b'ctxt'):
-                ctx_switches = int(line.split()[1])
-            elif line.startswith(b'intr'):
-                interrupts = int(line.split()[1])
-            elif line.startswith(b'softirq'):
-                soft_interrupts = int(line.split()[1])
-            if ctx_switches is not None and soft_interrupts is not None \
-                    and interrupts is not None:
-                break
+    ctx_switches = None
+    interrupts = None
+    soft_interrupts = None
+    for line in read_procfs('stat').splitlines():
+        if line.startswith(b'ctxt'):
+            ctx_switches = int(line.split()[1])
+        elif line.startswith(b'intr'):
+            interrupts = int(line.split()[1])
+        elif line.startswith(b'softirq'):
+            soft_interrupts = int(line.split()[1])
+        if ctx_switches is not None and soft_interrupts is not None \
+                and interrupts is not None:
+            break
     syscalls = 0
     return _common.scpustats(
         ctx_switches, interrupts, soft_interrupts, syscalls)
@@ -735,6 +956,12 @@ class _Ipv6UnsupportedError(Exception):
     pass
 
 
+# {hex_ip: ip} LRU cache used by Connections.decode_addresses(),
+# least recently used first
+_decoded_ips_cache = collections.OrderedDict()
+_decoded_ips_lock = threading.Lock()
+
+
 class Connections:
     """A wrapper on top of /proc/net/* files, retrieving per-process
     and system-wide open connections (TCP, UDP, UNIX) similarly to
@@ -767,6 +994,9 @@ class Connections:
             "inet6": (tcp6, udp6),
         }
         self._procfs_path = None
+        # (family, type) combinations for which NETLINK_SOCK_DIAG
+        # failed (e.g. inet_diag / unix_diag modules not loaded).
+        self._diag_unsupported = set()
 
     def get_proc_inodes(self, pid):
         inodes = defaultdict(list)
@@ -791,11 +1021,41 @@ class Connections:
                     inodes[inode].append((pid, int(fd)))
         return inodes
 
-    def get_all_inodes(self):
+    def get_proc_num_fds(self, pid):
+        path = "%s/%s/fd" % (self._procfs_path, pid)
+        # Linux >= 6.2 reports the number of open fds as st_size,
+        # sparing us the directory listing.
+        num = os.stat(path).st_size
+        return num if num else len(os.listdir(path))
+
+    def get_all_inodes(self, index=None):
+        """Return a {inode: [(pid, fd), ...]} dict for all processes.
+        If *index* (an InodeIndex instance) is passed, processes whose
+        number of fds did not change since the last call are not
+        inspected again. Processes are identified by PID and start
+        time so that a reused PID is always inspected.
+        """
         inodes = {}
-        for pid in pids():
+        procs = {}
+        if index is None:
+            keys = [(pid, None) for pid in pids()]
+        else:
+            # (pid, start time in clock ticks); PIDs which are gone
+            # are not included
+            keys = [(entry[0], entry[11]) for entry in
+                    cext.proc_stat_multi(self._procfs_path, pids())]
+        for key in keys:
+            pid = key[0]
             try:
-                inodes.update(self.get_proc_inodes(pid))
+                if index is None:
+                    inodes.update(self.get_proc_inodes(pid))
+                    continue
+                num_fds = self.get_proc_num_fds(pid)
+                entry = index._procs.get(key)
+                if entry is None or entry[0] != num_fds:
+                    entry = (num_fds, self.get_proc_inodes(pid))
+                procs[key] = entry
+                inodes.update(entry[1])
             except OSError as err:
                 # os.listdir() is gonna raise a lot of access denied
                 # exceptions in case of unprivileged user; that's fine
@@ -807,6 +1067,9 @@ class Connections:
                 if err.errno not in (
                         errno.ENOENT, errno.ESRCH, errno.EPERM, errno.EACCES):
                     raise
+        if index is not None:
+            # this also gets rid of the processes which went away
+            index._procs = procs
         return inodes
 
     @staticmethod
@@ -823,63 +1086,120 @@ class Connections:
         to an IP address.
         The port is represented as a two-byte hexadecimal number.
 
+        Decoded IP addresses are cached, see decode_addresses().
+
         Reference:
         http://linuxdevcenter.com/pub/a/linux/2000/11/16/LinuxAdmin.html
         """
-        ip, port = addr.split(':')
-        port = int(port, 16)
-        # this usually refers to a local socket in listen mode with
-        # no end-points connected
-        if not port:
-            return ()
+        return Connections.decode_addresses([addr], family)[0]
+
+    @staticmethod
+    def decode_addresses(addrs, family):
+        """Bulk version of decode_address(), returning a list.
+        The same few IP addresses (the host's own ones, the peers it
+        talks to) usually appear over and over, so decoded IPs are
+        cached in a bounded LRU dict keyed on their hex representation
+        and only the unique, not cached ones are actually decoded,
+        all at once.
+        """
+        splitted = [addr.split(':') for addr in addrs]
+        # resolve into a local dict: other threads may evict entries
+        # from the shared cache in the meantime
+        decoded = {}
+        missing = []
+        cache = _decoded_ips_cache
+        with _decoded_ips_lock:
+            for ip in set(ip for ip, port in splitted):
+                try:
+                    # re-insert to mark it as most recently used
+                    decoded[ip] = cache[ip] = cache.pop(ip)
+                except KeyError:
+                    missing.append(ip)
+        if missing:
+            new = dict(zip(missing, Connections._decode_ips(
+                missing, family)))
+            decoded.update(new)
+            with _decoded_ips_lock:
+                cache.update(new)
+                while len(cache) > DECODED_IPS_CACHE_MAXSIZE:
+                    cache.popitem(last=False)
+        ret = []
+        for ip, port in splitted:
+            port = int(port, 16)
+            # this usually refers to a local socket in listen mode with
+            # no end-points connected
+            if not port:
+                ret.append(())
+            else:
+                ret.append(_common.addr(decoded[ip], port))
+        return ret
+
+    @staticmethod
+    def _decode_ips(hexips, family):
+        """Decode a list of hex IP addresses as displayed in
+        /proc/net/* into a list of human readable IPs.
+        """
+        size = 4 if family == socket.AF_INET else 16
+        raw = "".join(hexips)
         if PY3:
-            ip = ip.encode('ascii')
-        if family == socket.AF_INET:
-            # see: https://github.com/giampaolo/psutil/issues/201
-            if LITTLE_ENDIAN:
-                ip = socket.inet_ntop(family, base64.b16decode(ip)[::-1])
+            raw = raw.encode('ascii')
+        raw = base64.b16decode(raw)
+        # Both IPv4 and IPv6 addresses are stored as (arrays of)
+        # 32 bit words in host byte order, see:
+        # https://github.com/giampaolo/psutil/issues/201
+        if LITTLE_ENDIAN:
+            nwords = len(raw) // 4
+            raw = struct.pack('>%sI' % nwords,
+                              *struct.unpack('<%sI' % nwords, raw))
+        try:
+            return [socket.inet_ntop(family, raw[i:i + size])
+                    for i in range(0, len(raw), size)]
+        except ValueError:
+            # see: https://github.com/giampaolo/psutil/issues/623
+            if family == socket.AF_INET6 and not supports_ipv6():
+                raise _Ipv6UnsupportedError
             else:
-                ip = socket.inet_ntop(family, base64.b16decode(ip))
-        else:  # IPv6
-            # old version - let's keep it, just in case...
-            # ip = ip.decode('hex')
-            # return socket.inet_ntop(socket.AF_INET6,
-            #          ''.join(ip[i:i+4][::-1] for i in xrange(0, 16, 4)))
-            ip = base64.b16decode(ip)
-            try:
-                # see: https://github.com/giampaolo/psutil/issues/201
-                if LITTLE_ENDIAN:
-                    ip = socket.inet_ntop(
-                        socket.AF_INET6,
-                        struct.pack('>4I', *struct.unpack('<4I', ip)))
-                else:
-                    ip = socket.inet_ntop(
-                        socket.AF_INET6,
-                        struct.pack('<4I', *struct.unpack('<4I', ip)))
-            except ValueError:
-                # see: https://github.com/giampaolo/psutil/issues/623
-                if not supports_ipv6():
-                    raise _Ipv6UnsupportedError
-                else:
-                    raise
-        return _common.addr(ip, port)
+                raise
 
     @staticmethod
-    def process_inet(file, family, type_, inodes, filter_pid=None):
-        """Parse /proc/net/tcp* and /proc/net/udp* files."""
+    def process_inet(file, family, type_, inodes, filter_pid=None,
+                     filter_status=None, filter_lport=None,
+                     filter_rport=None, filter_laddr=None, extended=False):
+        """Parse /proc/net/tcp* and /proc/net/udp* files.
+        *filter_status* is a set of hex states as found in the file
+        (see TCP_STATUSES) while *filter_lport* and *filter_rport* are
+        ":PORT" hex strings; these are matched before decoding the
+        line.
+        If *extended* is True also yield tx/rx queues and retransmits
+        (RTT is not available in these files and is set to None).
+        """
         if file.endswith('6') and not os.path.exists(file):
             # IPv6 not supported
             return
+        rows = []
         with open_text(file, buffering=BIGFILE_BUFFERING) as f:
             f.readline()  # skip the first line
-            for lineno, line in enumerate(f, 1):
+            if filter_pid is not None and len(inodes) <= INODE_LOOKUP_MAX:
+                lines = Connections.find_inode_lines(f, inodes, 9)
+            else:
+                lines = f
+            for lineno, line in enumerate(lines, 1):
                 try:
-                    _, laddr, raddr, status, _, _, _, _, _, inode = \
-                        line.split()[:10]
+                    _, laddr, raddr, status, queues, _, retrans, _, _, \
+                        inode = line.split()[:10]
                 except ValueError:
                     raise RuntimeError(
                         "error while parsing %s; malformed line %s %r" % (
                             file, lineno, line))
+                if filter_status is not None and \
+                        status not in filter_status:
+                    continue
+                if filter_lport is not None and \
+                        not laddr.endswith(filter_lport):
+                    continue
+                if filter_rport is not None and \
+                        not raddr.endswith(filter_rport):
+                    continue
                 if inode in inodes:
                     # # We assume inet sockets are unique, so we error
                     # # out if there are multiple references to the
@@ -897,19 +1217,81 @@ class Connections:
                         status = TCP_STATUSES[status]
                     else:
                         status = _common.CONN_NONE
-                    try:
-                        laddr = Connections.decode_address(laddr, family)
-                        raddr = Connections.decode_address(raddr, family)
-                    except _Ipv6UnsupportedError:
-                        continue
-                    yield (fd, family, type_, laddr, raddr, status, pid)
+                    if extended:
+                        txq, rxq = queues.split(':')
+                        if type_ == socket.SOCK_STREAM:
+                            retrans = int(retrans, 16)
+                        else:
+                            retrans = None
+                        ext = (int(txq, 16), int(rxq, 16), retrans, None,
+                               None)
+                    else:
+                        ext = ()
+                    rows.append((fd, laddr, raddr, status, pid, ext))
+                    if len(rows) >= DECODE_BATCH_SIZE:
+                        try:
+                            ls = Connections._decode_rows(
+                                rows, family, type_, filter_laddr)
+                        except _Ipv6UnsupportedError:
+                            return
+                        for item in ls:
+                            yield item
+                        rows = []
+        if rows:
+            try:
+                ls = Connections._decode_rows(
+                    rows, family, type_, filter_laddr)
+            except _Ipv6UnsupportedError:
+                return
+            for item in ls:
+                yield item
 
     @staticmethod
-    def process_unix(file, family, inodes, filter_pid=None):
+    def find_inode_lines(lines, inodes, index):
+        """Return the *lines* of a /proc/net/* file whose *index*-th
+        field is one of *inodes*, in a single pass. Only the fields up
+        to the inode are split and the rest of the line is parsed by
+        the caller only if it matches, stopping as soon as all inodes
+        were found.
+        """
+        inodes = set(inodes)
+        ret = []
+        for line in lines:
+            fields = line.split(None, index + 1)
+            if len(fields) > index and fields[index] in inodes:
+                ret.append(line)
+                if len(ret) == len(inodes):
+                    break
+        return ret
+
+    @staticmethod
+    def _decode_rows(rows, family, type_, filter_laddr):
+        """Decode the addresses of a batch of rows collected by
+        process_inet() and return the final tuples.
+        """
+        laddrs = Connections.decode_addresses([x[1] for x in rows], family)
+        if filter_laddr is not None:
+            matching = [i for i, laddr in enumerate(laddrs)
+                        if laddr and laddr.ip == filter_laddr]
+            rows = [rows[i] for i in matching]
+            laddrs = [laddrs[i] for i in matching]
+        raddrs = Connections.decode_addresses([x[2] for x in rows], family)
+        return [(fd, family, type_, laddr, raddr, status, pid) + ext
+                for (fd, _, _, status, pid, ext), laddr, raddr in zip(
+                    rows, laddrs, raddrs)]
+
+    @staticmethod
+    def process_unix(file, family, inodes, filter_pid=None,
+                     filter_laddr=None, extended=False):
         """Parse /proc/net/unix files."""
+        ext = (None, ) * 5 if extended else ()
         with open_text(file, buffering=BIGFILE_BUFFERING) as f:
             f.readline()  # skip the first line
-            for line in f:
+            if filter_pid is not None and len(inodes) <= INODE_LOOKUP_MAX:
+                lines = Connections.find_inode_lines(f, inodes, 6)
+            else:
+                lines = f
+            for line in lines:
                 tokens = line.split()
                 try:
                     _, _, _, _, type_, _, inode = tokens[0:7]
@@ -934,89 +1316,542 @@ class Connections:
                             path = tokens[-1]
                         else:
                             path = ""
+                        if filter_laddr is not None and path != filter_laddr:
+                            continue
                         type_ = int(type_)
                         # XXX: determining the remote endpoint of a
                         # UNIX socket on Linux is not possible, see:
                         # https://serverfault.com/questions/252723/
                         raddr = ""
                         status = _common.CONN_NONE
-                        yield (fd, family, type_, path, raddr, status, pid)
+                        yield (fd, family, type_, path, raddr, status,
+                               pid) + ext
 
-    def retrieve(self, kind, pid=None):
+    @staticmethod
+    def process_diag(family, type_, inodes, filter_pid=None,
+                     filter_states=DIAG_ALL_STATES, filter_lport=None,
+                     filter_rport=None, filter_laddr=None, extended=False):
+        """Retrieve inet sockets via NETLINK_SOCK_DIAG. Yields the
+        same tuples as process_inet().
+        *filter_states* is a bitmask of TCP states which is applied
+        by the kernel; port filters are applied in C and so are
+        *inodes* if *filter_pid* is given.
+        """
+        ext = (None, ) * 5 if extended else ()
+        if filter_pid is not None:
+            only_inodes = [int(x) for x in inodes]
+        else:
+            only_inodes = None
+        if type_ == socket.SOCK_STREAM:
+            proto = socket.IPPROTO_TCP
+        else:
+            proto = socket.IPPROTO_UDP
+        ls = cext.net_connections_diag(
+            family, proto, filter_states,
+            -1 if filter_lport is None else filter_lport,
+            -1 if filter_rport is None else filter_rport,
+            extended, only_inodes)
+        for item in ls:
+            _, status, lip, lport, rip, rport, inode = item[:7]
+            if filter_laddr is not None and \
+                    (not lport or lip != filter_laddr):
+                continue
+            inode = str(inode)
+            if inode in inodes:
+                pid, fd = inodes[inode][0]
+            else:
+                pid, fd = None, -1
+            if filter_pid is not None and filter_pid != pid:
+                continue
+            if type_ == socket.SOCK_STREAM:
+                status = DIAG_TCP_STATUSES[status]
+            else:
+                status = _common.CONN_NONE
+            laddr = _common.addr(lip, lport) if lport else ()
+            raddr = _common.addr(rip, rport) if rport else ()
+            if extended:
+                txq, rxq, retrans, rtt, rttvar = item[7:]
+                if retrans == -1:
+                    ext = (txq, rxq, None, None, None)
+                else:
+                    # usecs -> millisecs
+                    ext = (txq, rxq, retrans, rtt / 1000.0,
+                           rttvar / 1000.0)
+            yield (fd, family, type_, laddr, raddr, status, pid) + ext
+
+    def _use_diag(self, family, type_, procfs_path):
+        # UNIX sockets are always read from /proc/net/unix: unix_diag
+        # does not list the same sockets (e.g. those waiting to be
+        # accept()ed) nor the same paths
+        return HAS_SOCK_DIAG and \
+            family != socket.AF_UNIX and \
+            procfs_path == '/proc' and \
+            (family, type_) not in self._diag_unsupported
+
+    def retrieve(self, kind, pid=None, status=None, lport=None, rport=None,
+                 laddr=None, resolve_pids=True, extended=False, netns=None):
+        """Return a list of connections of the given *kind*; see
+        iter_conns() for the other parameters.
+        """
+        return list(set(self.iter_conns(
+            kind, pid=pid, status=status, lport=lport, rport=rport,
+            laddr=laddr, resolve_pids=resolve_pids, extended=extended,
+            netns=netns)))
+
+    def iter_conns(self, kind, pid=None, status=None, lport=None,
+                   rport=None, laddr=None, resolve_pids=True,
+                   extended=False, netns=None):
+        """Return a generator of connections of the given *kind*,
+        yielded as they are parsed (not de-duplicated).
+        *status* is a set of CONN_* constants as returned by
+        _common.conn_statuses(). All filters are applied while
+        parsing, so that sockets which are filtered out are never
+        decoded.
+        *resolve_pids* can be False (don't map sockets to PIDs) or an
+        InodeIndex instance to refresh and use.
+        If *extended* is True yield sconnext tuples.
+        If *netns* is not None read the sockets of that network
+        namespace (see netns_pid()) from /proc/[pid]/net/*.
+        """
         if kind not in self.tmap:
             raise ValueError("invalid %r kind argument; choose between %s"
                              % (kind, ', '.join([repr(x) for x in self.tmap])))
-        self._procfs_path = get_procfs_path()
+        # Figure out which (family, type) combos may match the filters
+        # and what status filter to apply to each of them.
+        tmap = []
+        for f, family, type_ in self.tmap[kind]:
+            if family == socket.AF_UNIX and \
+                    (lport is not None or rport is not None):
+                continue
+            if type_ == socket.SOCK_STREAM and status is not None:
+                states = [k for k, v in TCP_STATUSES.items() if v in status]
+                if not states:
+                    continue
+            else:
+                # UDP and UNIX sockets have no status
+                if status is not None and _common.CONN_NONE not in status:
+                    continue
+                states = None
+            tmap.append((f, family, type_, states))
+        ns_pid = None if netns is None else netns_pid(netns)
+        return self._iter_conns(tmap, pid, lport, rport, laddr,
+                                resolve_pids, extended, ns_pid)
+
+    def _iter_conns(self, tmap, pid, lport, rport, laddr, resolve_pids,
+                    extended, ns_pid=None):
+        if not tmap:
+            return
+        self._procfs_path = procfs_path = get_procfs_path()
+        if ns_pid is None:
+            net_path = "%s/net" % procfs_path
+        else:
+            net_path = "%s/%s/net" % (procfs_path, ns_pid)
         if pid is not None:
             inodes = self.get_proc_inodes(pid)
             if not inodes:
                 # no connections for this process
-                return []
-        else:
+                return
+        elif isinstance(resolve_pids, InodeIndex):
+            inodes = self.get_all_inodes(index=resolve_pids)
+        elif resolve_pids:
             inodes = self.get_all_inodes()
-        ret = set()
-        for f, family, type_ in self.tmap[kind]:
-            if family in (socket.AF_INET, socket.AF_INET6):
-                ls = self.process_inet(
-                    "%s/net/%s" % (self._procfs_path, f),
-                    family, type_, inodes, filter_pid=pid)
+        else:
+            inodes = {}
+        for f, family, type_, states in tmap:
+            ls = None
+            # NETLINK_SOCK_DIAG only sees psutil's own namespace
+            if ns_pid is None and \
+                    self._use_diag(family, type_, procfs_path):
+                if states is None:
+                    mask = DIAG_ALL_STATES
+                else:
+                    mask = 0
+                    for state in states:
+                        mask |= DIAG_TCP_STATES_MASK[state]
+                ls = self.process_diag(
+                    family, type_, inodes, filter_pid=pid,
+                    filter_states=mask, filter_lport=lport,
+                    filter_rport=rport, filter_laddr=laddr,
+                    extended=extended)
+                try:
+                    # start the generator so that errors are raised
+                    # here rather than in the loop below
+                    first = next(ls, None)
+                except OSError:
+                    self._diag_unsupported.add((family, type_))
+                    ls = None
+                else:
+                    if first is not None:
+                        ls = itertools.chain([first], ls)
+            if ls is None:
+                if family in (socket.AF_INET, socket.AF_INET6):
+                    ls = self.process_inet(
+                        "%s/%s" % (net_path, f),
+                        family, type_, inodes, filter_pid=pid,
+                        filter_status=None if states is None
+                        else set(states),
+                        filter_lport=None if lport is None
+                        else ":%04X" % lport,
+                        filter_rport=None if rport is None
+                        else ":%04X" % rport,
+                        filter_laddr=laddr, extended=extended)
+                else:
+                    ls = self.process_unix(
+                        "%s/%s" % (net_path, f),
+                        family, inodes, filter_pid=pid, filter_laddr=laddr,
+                        extended=extended)
+            for conn in self._make_conns(ls, pid, extended):
+                yield conn
+
+    @staticmethod
+    def _make_conns(ls, pid, extended=False):
+        if extended:
+            for item in ls:
+                yield sconnext(*item)
+            return
+        for fd, family, type_, laddr, raddr, status, bound_pid in ls:
+            if pid:
+                yield _common.pconn(fd, family, type_, laddr, raddr, status)
+            else:
+                yield _common.sconn(fd, family, type_, laddr, raddr,
+                                    status, bound_pid)
+
+    # --- net_connection_stats()
+
+    @staticmethod
+    def _inet_stats_records(file, family, type_, inodes):
+        """Parse /proc/net/tcp* and /proc/net/udp* files yielding
+        (family, type, status, laddr, lport, raddr, rport, pid) tuples
+        where IP addresses are left undecoded as (family, hex_ip).
+        """
+        if file.endswith('6') and not os.path.exists(file):
+            # IPv6 not supported
+            return
+        with open_text(file, buffering=BIGFILE_BUFFERING) as f:
+            f.readline()  # skip the first line
+            for lineno, line in enumerate(f, 1):
+                try:
+                    _, laddr, raddr, status, _, _, _, _, _, inode = \
+                        line.split()[:10]
+                    lip, lport = laddr.split(':')
+                    rip, rport = raddr.split(':')
+                except ValueError:
+                    raise RuntimeError(
+                        "error while parsing %s; malformed line %s %r" % (
+                            file, lineno, line))
+                lport = int(lport, 16) or None
+                rport = int(rport, 16) or None
+                if type_ == socket.SOCK_STREAM:
+                    status = TCP_STATUSES[status]
+                else:
+                    status = _common.CONN_NONE
+                pid = inodes[inode][0][0] if inode in inodes else None
+                yield (family, type_, status,
+                       (family, lip) if lport else None, lport,
+                       (family, rip) if rport else None, rport, pid)
+
+    @staticmethod
+    def _unix_stats_records(file, family, inodes):
+        """Parse /proc/net/unix files yielding the same tuples as
+        _inet_stats_records().
+        """
+        with open_text(file, buffering=BIGFILE_BUFFERING) as f:
+            f.readline()  # skip the first line
+            for line in f:
+                tokens = line.split()
+                try:
+                    type_, inode = int(tokens[4]), tokens[6]
+                except (IndexError, ValueError):
+                    if ' ' not in line:
+                        # see: https://github.com/giampaolo/psutil/issues/766
+                        continue
+                    raise RuntimeError(
+                        "error while parsing %s; malformed line %r" % (
+                            file, line))
+                path = tokens[7] if len(tokens) == 8 else None
+                for pid, _ in inodes.get(inode, [(None, -1)]):
+                    yield (family, type_, _common.CONN_NONE, path, None,
+                           None, None, pid)
+
+    @staticmethod
+    def _diag_stats_records(family, type_, inodes):
+        """Same as _inet_stats_records(), using NETLINK_SOCK_DIAG."""
+        if type_ == socket.SOCK_STREAM:
+            proto = socket.IPPROTO_TCP
+        else:
+            proto = socket.IPPROTO_UDP
+        for _, status, lip, lport, rip, rport, inode in \
+                cext.net_connections_diag(family, proto, DIAG_ALL_STATES):
+            if type_ == socket.SOCK_STREAM:
+                status = DIAG_TCP_STATUSES[status]
             else:
-                ls = self.process_unix(
-                    "%s/net/%s" % (self._procfs_path, f),
-                    family, inodes, filter_pid=pid)
-            for fd, family, type_, laddr, raddr, status, bound_pid in ls:
-                if pid:
-                    conn = _common.pconn(fd, family, type_, laddr, raddr,
-                                         status)
+                status = _common.CONN_NONE
+            inode = str(inode)
+            pid = inodes[inode][0][0] if inode in inodes else None
+            yield (family, type_, status, lip if lport else None,
+                   lport or None, rip if rport else None,
+                   rport or None, pid)
+
+    def stats(self, kind, group_by):
+        """Count the sockets of the given *kind* grouped by the
+        *group_by* fields (see _common.CONN_STATS_FIELDS), returning
+        a {(value, ...): count} dict. No namedtuple is created and
+        IP addresses are decoded once per group rather than once per
+        socket; PIDs are resolved only if grouping by 'pid'.
+        """
+        if kind not in self.tmap:
+            raise ValueError("invalid %r kind argument; choose between %s"
+                             % (kind, ', '.join([repr(x) for x in self.tmap])))
+        self._procfs_path = get_procfs_path()
+        inodes = self.get_all_inodes() if 'pid' in group_by else {}
+        indexes = [_common.CONN_STATS_FIELDS.index(x) for x in group_by]
+        counts = defaultdict(int)
+        for f, family, type_ in self.tmap[kind]:
+            records = None
+            if self._use_diag(family, type_, self._procfs_path):
+                try:
+                    records = self._diag_stats_records(family, type_, inodes)
+                    # start iterating so that errors are raised here
+                    first = next(records, None)
+                except OSError:
+                    self._diag_unsupported.add((family, type_))
+                    records = None
+                else:
+                    if first is not None:
+                        counts[tuple([first[i] for i in indexes])] += 1
+            if records is None:
+                path = "%s/net/%s" % (self._procfs_path, f)
+                if family == socket.AF_UNIX:
+                    records = self._unix_stats_records(path, family, inodes)
                 else:
-                    conn = _common.sconn(fd, family, type_, laddr, raddr,
-                                         status, bound_pid)
-                ret.add(conn)
-        return list(ret)
+                    records = self._inet_stats_records(
+                        path, family, type_, inodes)
+            for rec in records:
+                counts[tuple([rec[i] for i in indexes])] += 1
+
+        # decode the (family, hex_ip) IP addresses found in the keys
+        ips = set()
+        for key in counts:
+            ips.update([x for x in key if isinstance(x, tuple)])
+        if not ips:
+            return dict(counts)
+        decoded = {}
+        for family in (socket.AF_INET, socket.AF_INET6):
+            hexips = [x[1] for x in ips if x[0] == family]
+            if hexips:
+                try:
+                    decoded.update(zip(
+                        [(family, x) for x in hexips],
+                        self._decode_ips(hexips, family)))
+                except _Ipv6UnsupportedError:
+                    pass
+        ret = defaultdict(int)
+        for key, count in counts.items():
+            if any([x not in decoded for x in key
+                    if isinstance(x, tuple)]):
+                continue
+            key = tuple([decoded[x] if isinstance(x, tuple) else x
+                         for x in key])
+            ret[key] += count
+        return dict(ret)
+
+
+class InodeIndex(object):
+    """An index mapping socket inodes to the (pid, fd) pairs using
+    them, which can be passed to net_connections() in order to avoid
+    inspecting all the fds of all processes on every call. On
+    refresh only the processes which are new (including reused PIDs)
+    or whose number of open fds changed are inspected again.
+    """
+
+    def __init__(self):
+        # {(pid, start_time): (num_fds, {inode: [(pid, fd), ...]})}
+        self._procs = {}
+
+    def __repr__(self):
+        return "<%s.%s(pids=%s) at %s>" % (
+            self.__class__.__module__, self.__class__.__name__,
+            len(self._procs), id(self))
+
+    def refresh(self):
+        """Update the index and return a {inode: [(pid, fd), ...]}
+        dict.
+        """
+        conns = Connections()
+        conns._procfs_path = get_procfs_path()
+        return conns.get_all_inodes(index=self)
+
+    def clear(self):
+        """Forget everything, forcing a full rebuild on next use."""
+        self._procs = {}
 
 
 _connections = Connections()
 
 
-def net_connections(kind='inet'):
+def net_connection_stats(kind, group_by):
+    """Return the number of sockets grouped by *group_by* fields."""
+    return _connections.stats(kind, group_by)
+
+
+def net_namespaces():
+    """Return a {namespace_inode: [pid, ...]} dict of the network
+    namespaces in use by processes. Processes which can't be
+    inspected (e.g. due to limited privileges) are skipped.
+    """
+    procfs_path = get_procfs_path()
+    ret = defaultdict(list)
+    for pid in pids():
+        try:
+            inode = os.stat("%s/%s/ns/net" % (procfs_path, pid)).st_ino
+        except EnvironmentError as err:
+            if err.errno in (errno.ENOENT, errno.ESRCH, errno.EACCES,
+                             errno.EPERM):
+                continue
+            raise
+        ret[inode].append(pid)
+    return dict(ret)
+
+
+def netns_pid(netns):
+    """Return the PID of a process living in the network namespace
+    *netns*, which is either a PID itself or the path of a namespace
+    file (e.g. "/proc/1234/ns/net" or "/var/run/netns/name").
+    /proc/{pid}/net/* is the only way to read another namespace's
+    files without setns(), so a namespace with no process in it (e.g.
+    an idle "/var/run/netns/name") is rejected with ValueError.
+    """
+    if isinstance(netns, bool):
+        raise TypeError("netns must be a PID or a path (got %r)" % netns)
+    if isinstance(netns, (int, long)):
+        pid = netns
+    else:
+        try:
+            inode = os.stat(netns).st_ino
+        except OSError as err:
+            if err.errno != errno.ENOENT:
+                raise
+            # e.g. "/proc/1234/ns/net" of a process which is gone
+            m = re.match(r"^%s/(\d+)/" % re.escape(get_procfs_path()),
+                         netns)
+            if m:
+                raise NoSuchProcess(int(m.group(1)))
+            raise ValueError("no such network namespace file %r" % netns)
+        pids_ = net_namespaces().get(inode)
+        if not pids_:
+            raise ValueError(
+                "no process found in network namespace %r" % netns)
+        pid = pids_[0]
+    if not os.path.exists("%s/%s/net" % (get_procfs_path(), pid)):
+        raise NoSuchProcess(pid)
+    return pid
+
+
+def net_connections(kind='inet', status=None, lport=None, rport=None,
+                    laddr=None, resolve_pids=True, extended=False,
+                    netns=None):
     """Return system-wide open connections."""
-    return _connections.retrieve(kind)
+    return _connections.retrieve(kind, status=status, lport=lport,
+                                 rport=rport, laddr=laddr,
+                                 resolve_pids=resolve_pids,
+                                 extended=extended, netns=netns)
+
 
+def net_connections_iter(kind='inet', status=None, lport=None, rport=None,
+                         laddr=None, resolve_pids=True, extended=False,
+                         netns=None):
+    """Return a generator of system-wide open connections."""
+    return _connections.iter_conns(kind, status=status, lport=lport,
+                                   rport=rport, laddr=laddr,
+                                   resolve_pids=resolve_pids,
+                                   extended=extended, netns=netns)
 
-def net_io_counters():
+
+def net_io_counters(netns=None, extended=False, nics=None):
     """Return network I/O statistics for every network interface
     installed on the system as a dict of raw tuples.
+    If *netns* is not None (see netns_pid()) return the interfaces
+    of that network namespace instead.
+    If *extended* is True return all the 16 counters (see snetioext).
+    If *nics* is a sequence of interface names only return those
+    which exist, reading /sys/class/net/{NIC}/statistics/* rather
+    than generating and parsing /proc/net/dev for all interfaces.
     """
-    with open_text("%s/net/dev" % get_procfs_path()) as f:
-        lines = f.readlines()
+    if nics is not None and netns is None:
+        return _net_io_counters_sysfs(nics, extended)
+    if netns is None:
+        path = "%s/net/dev" % get_procfs_path()
+    else:
+        pid = netns_pid(netns)
+        path = "%s/%s/net/dev" % (get_procfs_path(), pid)
+    try:
+        if netns is None and fd_pool.enabled:
+            data = decode(read_procfs("net/dev")).split('\n', 2)[2]
+        else:
+            with open_text(path) as f:
+                f.readline()  # skip the 2 header lines
+                f.readline()
+                data = f.read()
+    except EnvironmentError as err:
+        if netns is not None and err.errno in (errno.ENOENT, errno.ESRCH):
+            raise NoSuchProcess(pid)
+        raise
+    # Split the whole file at once: every line is "NIC:" followed by
+    # 16 counters and NIC names can't contain ":" or spaces.
+    tokens = data.replace(':', ' ').split()
+    if len(tokens) % 17:
+        raise RuntimeError("error while parsing %s; unexpected format %r"
+                           % (path, data))
+    if nics is not None:
+        nics = set(nics)
     retdict = {}
-    for line in lines[2:]:
-        colon = line.rfind(':')
-        assert colon > 0, repr(line)
-        name = line[:colon].strip()
-        fields = line[colon + 1:].strip().split()
-
-        # in
+    for i in range(0, len(tokens), 17):
+        name = tokens[i]
+        if nics is not None and name not in nics:
+            continue
         (bytes_recv,
          packets_recv,
          errin,
          dropin,
-         fifoin,  # unused
-         framein,  # unused
-         compressedin,  # unused
-         multicastin,  # unused
+         fifoin,
+         framein,
+         compressedin,
+         multicastin,
          # out
          bytes_sent,
          packets_sent,
          errout,
          dropout,
-         fifoout,  # unused
-         collisionsout,  # unused
-         carrierout,  # unused
-         compressedout) = map(int, fields)
+         fifoout,
+         collisionsout,
+         carrierout,
+         compressedout) = map(int, tokens[i + 1:i + 17])
+        if extended:
+            retdict[name] = (bytes_sent, bytes_recv, packets_sent,
+                             packets_recv, errin, errout, dropin, dropout,
+                             fifoin, fifoout, framein, compressedin,
+                             compressedout, multicastin, collisionsout,
+                             carrierout)
+        else:
+            retdict[name] = (bytes_sent, bytes_recv, packets_sent,
+                             packets_recv, errin, errout, dropin, dropout)
+    return retdict
 
-        retdict[name] = (bytes_sent, bytes_recv, packets_sent, packets_recv,
-                         errin, errout, dropin, dropout)
+
+def _net_io_counters_sysfs(nics, extended):
+    stats = NET_SYSFS_STATS if extended else NET_SYSFS_STATS[:8]
+    retdict = {}
+    for nic in nics:
+        base = "/sys/class/net/%s/statistics/" % nic
+        try:
+            retdict[nic] = tuple([
+                sum([int(cat(base + name)) for name in names])
+                for names in stats])
+        except EnvironmentError as err:
+            if err.errno in (errno.ENOENT, errno.ENODEV):
+                # no such NIC
+                continue
+            raise
     return retdict
 
 
@@ -1053,7 +1888,7 @@ def disk_io_counters(perdisk=False):
     """Return disk I/O statistics for every disk installed on the
     system as a dict of raw tuples.
     """
-    def read_procfs():
+    def read_diskstats():
         # OK, this is a bit confusing. The format of /proc/diskstats can
         # have 3 variations.
         # On Linux 2.4 each line has always 15 fields, e.g.:
@@ -1069,8 +1904,11 @@ def disk_io_counters(perdisk=False):
         # See:
         # https://www.kernel.org/doc/Documentation/iostats.txt
         # https://www.kernel.org/doc/Documentation/ABI/testing/procfs-diskstats
-        with open_text("%s/diskstats" % get_procfs_path()) as f:
-            lines = f.readlines()
+        if fd_pool.enabled:
+            lines = decode(read_procfs("diskstats")).splitlines()
+        else:
+            with open_text("%s/diskstats" % get_procfs_path()) as f:
+                lines = f.readlines()
         for line in lines:
             fields = line.split()
             flen = len(fields)
@@ -1109,7 +1947,7 @@ def disk_io_counters(perdisk=False):
                        wtime, reads_merged, writes_merged, busy_time)
 
     if os.path.exists('%s/diskstats' % get_procfs_path()):
-        gen = read_procfs()
+        gen = read_diskstats()
     elif os.path.exists('/sys/block'):
         gen = read_sysfs()
     else:
@@ -1425,18 +2263,23 @@ def users():
     return retlist
 
 
+def loadavg():
+    """Return the 1, 5 and 15 minutes load averages as a tuple, same
+    as os.getloadavg() but reading /proc/loadavg (see read_procfs()).
+    """
+    return tuple([float(x) for x in read_procfs('loadavg').split()[:3]])
+
+
 def boot_time():
     """Return the system boot time expressed in seconds since the epoch."""
     global BOOT_TIME
-    path = '%s/stat' % get_procfs_path()
-    with open_binary(path) as f:
-        for line in f:
-            if line.startswith(b'btime'):
-                ret = float(line.strip().split()[1])
-                BOOT_TIME = ret
-                return ret
-        raise RuntimeError(
-            "line 'btime' not found in %s" % path)
+    for line in read_procfs('stat').splitlines():
+        if line.startswith(b'btime'):
+            ret = float(line.strip().split()[1])
+            BOOT_TIME = ret
+            return ret
+    raise RuntimeError(
+        "line 'btime' not found in %s/stat" % get_procfs_path())
 
 
 # =====================================================================
@@ -1486,24 +2329,174 @@ def ppid_map():
     one shot. Used to speed up Process.children().
     """
     ret = {}
+    for entry in cext.proc_stat_multi(get_procfs_path(), pids()):
+        ret[entry[0]] = entry[3]
+    return ret
+
+
+def create_time_map(pids):
+    """Obtain a {pid: create_time, ...} dict for the given *pids* in
+    one shot. Used by process_iter() to detect reused PIDs.
+    PIDs which are gone or cannot be accessed are not included.
+    """
+    bt = BOOT_TIME or boot_time()
+    ret = {}
+    for entry in cext.proc_stat_multi(get_procfs_path(), list(pids)):
+        ret[entry[0]] = (float(entry[11]) / CLOCK_TICKS) + bt
+    return ret
+
+
+# The columns which can be requested to proc_snapshot(), mapped to the
+# /proc/{pid}/* file they are extracted from.
+SNAPSHOT_ATTRS = {
+    'pid': 'stat',
+    'ppid': 'stat',
+    'name': 'stat',
+    'status': 'stat',
+    'nice': 'stat',
+    'num_threads': 'stat',
+    'cpu_num': 'stat',
+    'user_time': 'stat',
+    'system_time': 'stat',
+    'create_time': 'stat',
+    'rss': 'statm',
+    'vms': 'statm',
+    'uid': 'status',
+    'gid': 'status',
+}
+
+
+def proc_snapshot(attrs, ad_value=None,
+                  _uid_re=re.compile(br'\nUid:\t(\d+)'),
+                  _gid_re=re.compile(br'\nGid:\t(\d+)')):
+    """Collect *attrs* (a list of SNAPSHOT_ATTRS keys) for all running
+    processes in one pass over /proc/{pid}/stat, /proc/{pid}/statm and
+    /proc/{pid}/status, without instantiating any Process class.
+    Only the files needed by *attrs* are read.
+    Return a {attr: [value, ...], ...} dict of columns having the same
+    length, where the N-th element of every column refers to the same
+    process. Processes which disappear in the meantime are skipped;
+    *ad_value* is used for values which cannot be read due to
+    insufficient privileges.
+    """
     procfs_path = get_procfs_path()
-    for pid in pids():
+    needed = set([SNAPSHOT_ATTRS[x] for x in attrs])
+    need_statm = 'statm' in needed
+    need_status = 'status' in needed
+    bt = BOOT_TIME or boot_time()
+    ret = dict([(x, []) for x in attrs])
+    for entry in cext.proc_stat_multi(procfs_path, pids()):
+        (pid, name, status, ppid, _, utime, stime, _, _, nice, num_threads,
+            ctime, cpu_num) = entry
+        if PY3:
+            name = decode(name)
+            status = status.decode()
+        row = {
+            'pid': pid,
+            'ppid': ppid,
+            'name': name,
+            'status': PROC_STATUSES.get(status, '?'),
+            'nice': nice,
+            'num_threads': num_threads,
+            'cpu_num': cpu_num if cpu_num != -1 else None,
+            'user_time': float(utime) / CLOCK_TICKS,
+            'system_time': float(stime) / CLOCK_TICKS,
+            'create_time': (float(ctime) / CLOCK_TICKS) + bt,
+        }
         try:
-            with open_binary("%s/%s/stat" % (procfs_path, pid)) as f:
-                data = f.read()
+            if need_statm:
+                try:
+                    with open_binary(
+                            "%s/%s/statm" % (procfs_path, pid)) as f:
+                        vms, rss = f.readline().split()[:2]
+                except EnvironmentError as err:
+                    if err.errno not in (errno.EPERM, errno.EACCES):
+                        raise
+                    row['vms'] = row['rss'] = ad_value
+                else:
+                    row['vms'] = int(vms) * PAGESIZE
+                    row['rss'] = int(rss) * PAGESIZE
+            if need_status:
+                try:
+                    with open_binary(
+                            "%s/%s/status" % (procfs_path, pid)) as f:
+                        data = f.read()
+                except EnvironmentError as err:
+                    if err.errno not in (errno.EPERM, errno.EACCES):
+                        raise
+                    row['uid'] = row['gid'] = ad_value
+                else:
+                    row['uid'] = int(_uid_re.findall(data)[0])
+                    row['gid'] = int(_gid_re.findall(data)[0])
         except EnvironmentError as err:
-            # Note: we should be able to access /stat for all processes
-            # aka it's unlikely we'll bump into EPERM, which is good.
+            # The process disappeared in the meantime.
             if err.errno not in (errno.ENOENT, errno.ESRCH):
                 raise
-        else:
-            rpar = data.rfind(b')')
-            dset = data[rpar + 2:].split()
-            ppid = int(dset[1])
-            ret[pid] = ppid
+            continue
+        for name, column in ret.items():
+            column.append(row[name])
     return ret
 
 
+def parse_smaps(lines):
+    """Parse the lines of a /proc/{pid}/smaps file (any iterable,
+    including a file object) and yield a tuple for every mapped
+    region.
+    """
+    def make_entry(header, data):
+        hfields = header.split(None, 5)
+        try:
+            addr, perms, offset, dev, inode, path = hfields
+        except ValueError:
+            addr, perms, offset, dev, inode, path = hfields + ['']
+        if not path:
+            path = '[anon]'
+        else:
+            if PY3:
+                path = decode(path)
+            path = path.strip()
+            if (path.endswith(' (deleted)') and not
+                    path_exists_strict(path)):
+                path = path[:-10]
+        return (
+            decode(addr), decode(perms), path,
+            data[b'Rss:'],
+            data.get(b'Size:', 0),
+            data.get(b'Pss:', 0),
+            data.get(b'Shared_Clean:', 0),
+            data.get(b'Shared_Dirty:', 0),
+            data.get(b'Private_Clean:', 0),
+            data.get(b'Private_Dirty:', 0),
+            data.get(b'Referenced:', 0),
+            data.get(b'Anonymous:', 0),
+            data.get(b'Swap:', 0))
+
+    header = None
+    data = {}
+    for line in lines:
+        fields = line.split(None, 5)
+        if not fields:
+            continue
+        if not fields[0].endswith(b':'):
+            # new block section
+            if header is not None:
+                yield make_entry(header, data)
+            header = line
+            data = {}
+        else:
+            try:
+                data[fields[0]] = int(fields[1]) * 1024
+            except ValueError:
+                if fields[0].startswith(b'VmFlags:'):
+                    # see issue #369
+                    continue
+                else:
+                    raise ValueError("don't know how to interpret line %r"
+                                     % line)
+    if header is not None:
+        yield make_entry(header, data)
+
+
 def wrap_exceptions(fun):
     """Decorator which translates bare OSError and IOError exceptions
     into NoSuchProcess and AccessDenied.
@@ -1532,13 +2525,62 @@ def wrap_exceptions(fun):
 class Process(object):
     """Linux process implementation."""
 
-    __slots__ = ["pid", "_name", "_ppid", "_procfs_path", "_cache"]
+    __slots__ = ["pid", "_name", "_ppid", "_procfs_path", "_cache",
+                 "_watched"]
 
     def __init__(self, pid):
         self.pid = pid
         self._name = None
         self._ppid = None
         self._procfs_path = get_procfs_path()
+        # {name: file} of the /proc/{pid}/* files kept open by watch()
+        self._watched = None
+
+    def _read_pid_file(self, name):
+        """Return the content of /proc/{pid}/{name} as bytes, re-reading
+        the file descriptor kept open by watch() if any.
+        """
+        if self._watched is not None and name in self._watched:
+            return pread_all(self._watched[name].fileno())
+        with open_binary("%s/%s/%s" % (self._procfs_path, self.pid,
+                                       name)) as f:
+            return f.read()
+
+    @wrap_exceptions
+    def watch(self):
+        """Keep /proc/{pid}/stat and /proc/{pid}/statm open. The file
+        descriptors refer to this very process: once it's gone reading
+        them fails with ESRCH, even if the PID gets reused.
+        """
+        if self._watched is not None:
+            return
+        files = {}
+        try:
+            for name in ("stat", "statm"):
+                files[name] = open("%s/%s/%s" % (
+                    self._procfs_path, self.pid, name), 'rb', buffering=0)
+        except Exception:
+            for f in files.values():
+                f.close()
+            raise
+        self._watched = files
+
+    def unwatch(self):
+        if self._watched is not None:
+            for f in self._watched.values():
+                f.close()
+            self._watched = None
+
+    def watched_is_running(self):
+        """Whether the process pinned by watch() still exists (zombies
+        included)."""
+        try:
+            pread_all(self._watched["stat"].fileno())
+        except EnvironmentError as err:
+            if err.errno == errno.ESRCH:
+                return False
+            raise
+        return True
 
     @memoize_when_activated
     def _parse_stat_file(self):
@@ -1550,8 +2592,7 @@ class Process(object):
         The return value is cached in case oneshot() ctx manager is
         in use.
         """
-        with open_binary("%s/%s/stat" % (self._procfs_path, self.pid)) as f:
-            data = f.read()
+        data = self._read_pid_file("stat")
         # Process name is between parentheses. It can contain spaces and
         # other parentheses. This is taken into account by looking for
         # the first occurrence of "(" and the last occurence of ")".
@@ -1588,6 +2629,11 @@ class Process(object):
                          buffering=BIGFILE_BUFFERING) as f:
             return f.read().strip()
 
+    def _read_smaps_rollup_file(self):
+        with open_binary("%s/%s/smaps_rollup" % (self._procfs_path,
+                                                 self.pid)) as f:
+            return f.read().strip()
+
     def oneshot_enter(self):
         self._parse_stat_file.cache_activate(self)
         self._read_status_file.cache_activate(self)
@@ -1734,9 +2780,9 @@ class Process(object):
         # | data   | data + stack                        | drs  | DATA |
         # | dirty  | dirty pages (unused in Linux 2.6)   | dt   |      |
         #  ============================================================
-        with open_binary("%s/%s/statm" % (self._procfs_path, self.pid)) as f:
-            vms, rss, shared, text, lib, data, dirty = \
-                [int(x) * PAGESIZE for x in f.readline().split()[:7]]
+        statm = self._read_pid_file("statm")
+        vms, rss, shared, text, lib, data, dirty = \
+            [int(x) * PAGESIZE for x in statm.split()[:7]]
         return pmem(rss, vms, shared, text, lib, data, dirty)
 
     # /proc/pid/smaps does not exist on kernels < 2.6.14 or if
@@ -1763,7 +2809,20 @@ class Process(object):
             # little to do with whether the pages are actually shared.
             # /proc/self/smaps on the other hand appears to give us the
             # correct information.
-            smaps_data = self._read_smaps_file()
+            smaps_data = None
+            if HAS_SMAPS_ROLLUP:
+                # Linux >= 4.14 provides the same values already summed
+                # up by the kernel, which is a lot faster than parsing
+                # smaps for processes having many mappings.
+                try:
+                    smaps_data = self._read_smaps_rollup_file()
+                except EnvironmentError as err:
+                    # Kernel threads and zombies raise ESRCH instead of
+                    # returning an empty file: let smaps decide.
+                    if err.errno != errno.ESRCH:
+                        raise
+            if smaps_data is None:
+                smaps_data = self._read_smaps_file()
             # Note: smaps file can be empty for certain processes.
             # The code below will not crash though and will result to 0.
             uss = sum(map(int, _private_re.findall(smaps_data))) * 1024
@@ -1785,64 +2844,40 @@ class Process(object):
             /proc/{PID}/smaps does not exist on kernels < 2.6.14 or if
             CONFIG_MMU kernel configuration option is not enabled.
             """
-            def get_blocks(lines, current_block):
-                data = {}
-                for line in lines:
-                    fields = line.split(None, 5)
-                    if not fields[0].endswith(b':'):
-                        # new block section
-                        yield (current_block.pop(), data)
-                        current_block.append(line)
-                    else:
-                        try:
-                            data[fields[0]] = int(fields[1]) * 1024
-                        except ValueError:
-                            if fields[0].startswith(b'VmFlags:'):
-                                # see issue #369
-                                continue
-                            else:
-                                raise ValueError("don't know how to inte"
-                                                 "rpret line %r" % line)
-                yield (current_block.pop(), data)
-
             data = self._read_smaps_file()
             # Note: smaps file can be empty for certain processes.
             if not data:
                 return []
-            lines = data.split(b'\n')
-            ls = []
-            first_line = lines.pop(0)
-            current_block = [first_line]
-            for header, data in get_blocks(lines, current_block):
-                hfields = header.split(None, 5)
+            return list(parse_smaps(data.split(b'\n')))
+
+        @wrap_exceptions
+        def memory_maps_iter(self):
+            """Same as memory_maps() but return a generator which parses
+            smaps incrementally, so that the whole file is never kept
+            in memory.
+            """
+            def gen(f):
+                # @wrap_exceptions only covers the creation of the
+                # generator: translate errors raised while reading
+                # (e.g. the process is gone) in here
                 try:
-                    addr, perms, offset, dev, inode, path = hfields
-                except ValueError:
-                    addr, perms, offset, dev, inode, path = \
-                        hfields + ['']
-                if not path:
-                    path = '[anon]'
-                else:
-                    if PY3:
-                        path = decode(path)
-                    path = path.strip()
-                    if (path.endswith(' (deleted)') and not
-                            path_exists_strict(path)):
-                        path = path[:-10]
-                ls.append((
-                    decode(addr), decode(perms), path,
-                    data[b'Rss:'],
-                    data.get(b'Size:', 0),
-                    data.get(b'Pss:', 0),
-                    data.get(b'Shared_Clean:', 0),
-                    data.get(b'Shared_Dirty:', 0),
-                    data.get(b'Private_Clean:', 0),
-                    data.get(b'Private_Dirty:', 0),
-                    data.get(b'Referenced:', 0),
-                    data.get(b'Anonymous:', 0),
-                    data.get(b'Swap:', 0)
-                ))
-            return ls
+                    for entry in parse_smaps(f):
+                        yield entry
+                except EnvironmentError as err:
+                    if err.errno in (errno.EPERM, errno.EACCES):
+                        raise AccessDenied(self.pid, self._name)
+                    if err.errno == errno.ESRCH or (
+                            err.errno == errno.ENOENT and
+                            not os.path.exists("%s/%s" % (
+                                self._procfs_path, self.pid))):
+                        raise NoSuchProcess(self.pid, self._name)
+                    raise
+                finally:
+                    f.close()
+
+            f = open_binary("%s/%s/smaps" % (self._procfs_path, self.pid),
+                            buffering=BIGFILE_BUFFERING)
+            return gen(f)
 
     @wrap_exceptions
     def cwd(self):
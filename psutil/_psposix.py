@@ -4,20 +4,30 @@
 
 """Routines common to all posix systems."""
 
+import collections
 import errno
 import glob
 import os
 import sys
+import threading
 import time
+try:
+    import grp
+except ImportError:
+    grp = None
+try:
+    import pwd
+except ImportError:
+    pwd = None
 
-from ._common import memoize
 from ._common import sdiskusage
 from ._common import usage_percent
 from ._compat import PY3
 from ._compat import unicode
 
 
-__all__ = ['pid_exists', 'wait_pid', 'disk_usage', 'get_terminal_map']
+__all__ = ['pid_exists', 'wait_pid', 'disk_usage', 'get_terminal_map',
+           'get_username', 'get_groupname']
 
 
 # This object gets set on "import psutil" from the __init__.py
@@ -169,11 +179,27 @@ def disk_usage(path):
         total=total, used=used, free=avail_to_user, percent=usage_percent_user)
 
 
-@memoize
+def _terminal_dirs_mtime():
+    ret = []
+    for path in ('/dev', '/dev/pts'):
+        try:
+            ret.append(os.stat(path).st_mtime)
+        except OSError:
+            ret.append(None)
+    return tuple(ret)
+
+
 def get_terminal_map():
     """Get a map of device-id -> path as a dict.
-    Used by Process.terminal()
+    Used by Process.terminal().
+    The map is shared and rebuilt only when /dev or /dev/pts
+    modification time changes (a terminal is created or removed).
     """
+    global _terminal_map
+    mtime = _terminal_dirs_mtime()
+    cached_mtime, ret = _terminal_map
+    if ret is not None and mtime == cached_mtime:
+        return ret
     ret = {}
     ls = glob.glob('/dev/tty*') + glob.glob('/dev/pts/*')
     for name in ls:
@@ -183,4 +209,100 @@ def get_terminal_map():
         except OSError as err:
             if err.errno != errno.ENOENT:
                 raise
+    _terminal_map = (mtime, ret)
     return ret
+
+
+def _terminal_map_cache_clear():
+    """Clear the terminal map cache."""
+    global _terminal_map
+    _terminal_map = (None, None)
+
+
+_terminal_map = (None, None)
+get_terminal_map.cache_clear = _terminal_map_cache_clear
+
+
+# --- uid / gid name resolution
+
+cacheinfo = collections.namedtuple(
+    'cacheinfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class _NameCache(object):
+    """A thread-safe cache of id -> name mappings. Names are obtained
+    via *resolver* and kept for *ttl* seconds; the cache holds up to
+    *maxsize* entries, after which expired entries are evicted (or all
+    of them if none is expired).
+    Looking names up may be expensive (e.g. if NSS is backed by LDAP
+    or sssd it involves a network round trip) while they rarely change.
+    """
+
+    def __init__(self, resolver, maxsize=1024, ttl=300):
+        self._resolver = resolver
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._cache = {}
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, id):
+        now = time.time()
+        with self._lock:
+            try:
+                name, expires = self._cache[id]
+            except KeyError:
+                pass
+            else:
+                if now < expires:
+                    self._hits += 1
+                    return name
+            self._misses += 1
+        # resolve the name without holding the lock as it may be slow
+        name = self._resolver(id)
+        with self._lock:
+            if id not in self._cache and len(self._cache) >= self._maxsize:
+                for key, (_, expires) in list(self._cache.items()):
+                    if now >= expires:
+                        del self._cache[key]
+                if len(self._cache) >= self._maxsize:
+                    self._cache.clear()
+            self._cache[id] = (name, now + self._ttl)
+        return name
+
+    def cache_clear(self):
+        """Clear the cache and its statistics."""
+        with self._lock:
+            self._cache.clear()
+            self._hits = self._misses = 0
+
+    def cache_info(self):
+        """Return cache statistics as a (hits, misses, maxsize,
+        currsize) named tuple.
+        """
+        with self._lock:
+            return cacheinfo(self._hits, self._misses, self._maxsize,
+                             len(self._cache))
+
+
+def _resolve_username(uid):
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        # the uid can't be resolved by the system
+        return str(uid)
+
+
+def _resolve_groupname(gid):
+    try:
+        return grp.getgrgid(gid).gr_name
+    except KeyError:
+        # the gid can't be resolved by the system
+        return str(gid)
+
+
+# Return the name of the user / group with the given uid / gid, or
+# the id as a string if it can't be resolved.
+get_username = _NameCache(_resolve_username)
+get_groupname = _NameCache(_resolve_groupname)
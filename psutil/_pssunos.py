@@ -509,9 +509,14 @@ class Process(object):
     def terminal(self):
         procfs_path = self._procfs_path
         hit_enoent = False
-        tty = wrap_exceptions(
-            self._proc_basic_info()[proc_info_map['ttynr']])
+        tty = self._proc_basic_info()[proc_info_map['ttynr']]
         if tty != cext.PRNODEV:
+            tmap = _psposix.get_terminal_map()
+            try:
+                return tmap[tty]
+            except KeyError:
+                pass
+            # fall back on the path of the std file descriptors
             for x in (0, 1, 2, 255):
                 try:
                     return os.readlink(
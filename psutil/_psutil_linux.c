@@ -12,6 +12,10 @@
 #include <Python.h>
 #include <errno.h>
 #include <stdlib.h>
+#include <string.h>
+#include <fcntl.h>
+#include <limits.h>
+#include <unistd.h>
 #include <mntent.h>
 #include <features.h>
 #include <utmp.h>
@@ -54,6 +58,19 @@ static const int NCPUS_START = sizeof(unsigned long) * CHAR_BIT;
     #include <sys/resource.h>
 #endif
 
+// NETLINK_SOCK_DIAG: Linux >= 3.3
+#define PSUTIL_HAVE_SOCK_DIAG \
+    LINUX_VERSION_CODE >= KERNEL_VERSION(3, 3, 0)
+
+#if PSUTIL_HAVE_SOCK_DIAG
+    #include <arpa/inet.h>
+    #include <linux/netlink.h>
+    #include <linux/rtnetlink.h>
+    #include <linux/sock_diag.h>
+    #include <linux/inet_diag.h>
+    #include <netinet/tcp.h>
+#endif
+
 #include "_psutil_common.h"
 #include "_psutil_posix.h"
 
@@ -96,7 +113,9 @@ psutil_proc_ioprio_get(PyObject *self, PyObject *args) {
     int ioprio, ioclass, iodata;
     if (! PyArg_ParseTuple(args, "l", &pid))
         return NULL;
+    Py_BEGIN_ALLOW_THREADS
     ioprio = ioprio_get(IOPRIO_WHO_PROCESS, pid);
+    Py_END_ALLOW_THREADS
     if (ioprio == -1)
         return PyErr_SetFromErrno(PyExc_OSError);
     ioclass = IOPRIO_PRIO_CLASS(ioprio);
@@ -147,7 +166,9 @@ psutil_linux_prlimit(PyObject *self, PyObject *args) {
 
     // get
     if (py_soft == NULL && py_hard == NULL) {
+        Py_BEGIN_ALLOW_THREADS
         ret = prlimit(pid, resource, NULL, &old);
+        Py_END_ALLOW_THREADS
         if (ret == -1)
             return PyErr_SetFromErrno(PyExc_OSError);
 #if defined(PSUTIL_HAVE_LONG_LONG)
@@ -287,7 +308,7 @@ psutil_linux_sysinfo(PyObject *self, PyObject *args) {
 
 static PyObject *
 psutil_proc_cpu_affinity_get(PyObject *self, PyObject *args) {
-    int cpu, ncpus, count, cpucount_s;
+    int cpu, ncpus, count, cpucount_s, ret;
     long pid;
     size_t setsize;
     cpu_set_t *mask = NULL;
@@ -303,7 +324,10 @@ psutil_proc_cpu_affinity_get(PyObject *self, PyObject *args) {
             psutil_debug("CPU_ALLOC() failed");
             return PyErr_NoMemory();
         }
-        if (sched_getaffinity(pid, setsize, mask) == 0)
+        Py_BEGIN_ALLOW_THREADS
+        ret = sched_getaffinity(pid, setsize, mask);
+        Py_END_ALLOW_THREADS
+        if (ret == 0)
             break;
         CPU_FREE(mask);
         if (errno != EINVAL)
@@ -575,6 +599,452 @@ error:
 }
 
 
+/*
+ * Parsed content of a /proc/{pid}/stat file, see "man proc".
+ */
+typedef struct {
+    long pid;
+    int parsed;
+    char name[64];
+    char state;
+    long ppid;
+    long tty_nr;
+    unsigned long long utime;
+    unsigned long long stime;
+    long long cutime;
+    long long cstime;
+    long nice;
+    long num_threads;
+    unsigned long long starttime;
+    int processor;
+} psutil_proc_stat;
+
+
+/*
+ * Read and parse /proc/{pid}/stat file of a single process. Return 0
+ * on success, else -1 and set errno. Does not touch any Python object
+ * so that it can be called with the GIL released.
+ */
+static int
+psutil_read_proc_stat(const char *procfs_path, psutil_proc_stat *entry) {
+    char path[PATH_MAX];
+    char buf[4096];
+    char *lpar;
+    char *rpar;
+    int fd;
+    ssize_t nbytes;
+    size_t namelen;
+    int ret;
+
+    snprintf(path, sizeof(path), "%s/%ld/stat", procfs_path, entry->pid);
+    fd = open(path, O_RDONLY);
+    if (fd == -1)
+        return -1;
+    nbytes = read(fd, buf, sizeof(buf) - 1);
+    close(fd);
+    if (nbytes == -1)
+        return -1;
+    buf[nbytes] = '\0';
+
+    // Process name is between parentheses. It can contain spaces and
+    // other parentheses, hence we look for the last ")".
+    lpar = strchr(buf, '(');
+    rpar = strrchr(buf, ')');
+    if (lpar == NULL || rpar == NULL || rpar < lpar) {
+        errno = EINVAL;
+        return -1;
+    }
+    namelen = rpar - lpar - 1;
+    if (namelen >= sizeof(entry->name))
+        namelen = sizeof(entry->name) - 1;
+    memcpy(entry->name, lpar + 1, namelen);
+    entry->name[namelen] = '\0';
+
+    entry->processor = -1;
+    ret = sscanf(
+        rpar + 2,
+        "%c %ld %*s %*s %ld %*s %*s %*s %*s %*s %*s %llu %llu %lld %lld "
+        "%*s %ld %ld %*s %llu %*s %*s %*s %*s %*s %*s %*s %*s %*s %*s "
+        "%*s %*s %*s %*s %*s %*s %d",
+        &entry->state,        // (3) state
+        &entry->ppid,         // (4) ppid
+        &entry->tty_nr,       // (7) tty_nr
+        &entry->utime,        // (14) utime
+        &entry->stime,        // (15) stime
+        &entry->cutime,       // (16) cutime
+        &entry->cstime,       // (17) cstime
+        &entry->nice,         // (19) nice
+        &entry->num_threads,  // (20) num_threads
+        &entry->starttime,    // (22) starttime
+        &entry->processor);   // (39) processor, Linux >= 2.2.8
+    if (ret < 10) {
+        errno = EINVAL;
+        return -1;
+    }
+    entry->parsed = 1;
+    return 0;
+}
+
+
+/*
+ * Given a procfs path and a list of PIDs read /proc/{pid}/stat of all
+ * of them in one shot (with the GIL released) and return a list of
+ * (pid, name, status, ppid, ttynr, utime, stime, children_utime,
+ * children_stime, nice, num_threads, create_time, cpu_num) tuples.
+ * Times are expressed in clock ticks. cpu_num is -1 if not available.
+ * PIDs which disappeared in the meantime or which cannot be accessed
+ * are skipped.
+ */
+static PyObject *
+psutil_proc_stat_multi(PyObject *self, PyObject *args) {
+    const char *procfs_path;
+    PyObject *py_pids;
+    PyObject *py_pids_seq = NULL;
+    PyObject *py_name = NULL;
+    PyObject *py_tuple = NULL;
+    PyObject *py_retlist = NULL;
+    psutil_proc_stat *entries = NULL;
+    Py_ssize_t i;
+    Py_ssize_t num_pids;
+    long failed_pid = -1;
+    int failed_errno = 0;
+    char path[PATH_MAX];
+
+    if (! PyArg_ParseTuple(args, "sO", &procfs_path, &py_pids))
+        return NULL;
+    py_pids_seq = PySequence_Fast(py_pids, "expected a sequence of PIDs");
+    if (py_pids_seq == NULL)
+        return NULL;
+    num_pids = PySequence_Fast_GET_SIZE(py_pids_seq);
+    entries = calloc(num_pids ? num_pids : 1, sizeof(psutil_proc_stat));
+    if (entries == NULL) {
+        PyErr_NoMemory();
+        goto error;
+    }
+    for (i = 0; i < num_pids; i++) {
+        entries[i].pid = PyLong_AsLong(
+            PySequence_Fast_GET_ITEM(py_pids_seq, i));
+        if (entries[i].pid == -1 && PyErr_Occurred())
+            goto error;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    for (i = 0; i < num_pids; i++) {
+        if (psutil_read_proc_stat(procfs_path, &entries[i]) != 0) {
+            // ENOENT / ESRCH mean the process is gone in the meantime;
+            // EACCES / EPERM may occur if /proc is mounted with hidepid.
+            if (errno != ENOENT && errno != ESRCH && errno != EACCES &&
+                    errno != EPERM) {
+                failed_pid = entries[i].pid;
+                failed_errno = errno;
+                break;
+            }
+        }
+    }
+    Py_END_ALLOW_THREADS
+
+    if (failed_errno != 0) {
+        snprintf(path, sizeof(path), "%s/%ld/stat", procfs_path, failed_pid);
+        errno = failed_errno;
+        PyErr_SetFromErrnoWithFilename(PyExc_OSError, path);
+        goto error;
+    }
+
+    py_retlist = PyList_New(0);
+    if (py_retlist == NULL)
+        goto error;
+    for (i = 0; i < num_pids; i++) {
+        if (! entries[i].parsed)
+            continue;
+        py_name = PyBytes_FromString(entries[i].name);
+        if (py_name == NULL)
+            goto error;
+        py_tuple = Py_BuildValue(
+            "(lOcllKKLLllKi)",
+            entries[i].pid,
+            py_name,
+            entries[i].state,
+            entries[i].ppid,
+            entries[i].tty_nr,
+            entries[i].utime,
+            entries[i].stime,
+            entries[i].cutime,
+            entries[i].cstime,
+            entries[i].nice,
+            entries[i].num_threads,
+            entries[i].starttime,
+            entries[i].processor);
+        if (py_tuple == NULL)
+            goto error;
+        if (PyList_Append(py_retlist, py_tuple))
+            goto error;
+        Py_CLEAR(py_name);
+        Py_CLEAR(py_tuple);
+    }
+
+    free(entries);
+    Py_DECREF(py_pids_seq);
+    return py_retlist;
+
+error:
+    free(entries);
+    Py_XDECREF(py_pids_seq);
+    Py_XDECREF(py_name);
+    Py_XDECREF(py_tuple);
+    Py_XDECREF(py_retlist);
+    return NULL;
+}
+
+
+#if PSUTIL_HAVE_SOCK_DIAG
+/*
+ * Send a SOCK_DIAG_BY_FAMILY dump request.
+ */
+static int
+psutil_sock_diag_send(int sock, struct inet_diag_req_v2 *req,
+                      size_t reqlen) {
+    struct sockaddr_nl nladdr;
+    struct nlmsghdr nlh;
+    struct iovec iov[2];
+    struct msghdr msg;
+
+    memset(&nladdr, 0, sizeof(nladdr));
+    nladdr.nl_family = AF_NETLINK;
+    memset(&nlh, 0, sizeof(nlh));
+    nlh.nlmsg_len = NLMSG_LENGTH(reqlen);
+    nlh.nlmsg_type = SOCK_DIAG_BY_FAMILY;
+    nlh.nlmsg_flags = NLM_F_REQUEST | NLM_F_DUMP;
+    iov[0].iov_base = &nlh;
+    iov[0].iov_len = sizeof(nlh);
+    iov[1].iov_base = req;
+    iov[1].iov_len = reqlen;
+    memset(&msg, 0, sizeof(msg));
+    msg.msg_name = &nladdr;
+    msg.msg_namelen = sizeof(nladdr);
+    msg.msg_iov = iov;
+    msg.msg_iovlen = 2;
+    return sendmsg(sock, &msg, 0) < 0 ? -1 : 0;
+}
+
+
+/*
+ * Turn an inet_diag_msg into a
+ * (family, state, laddr, lport, raddr, rport, inode) tuple.
+ * If *extended* is true also append
+ * (txqueue, rxqueue, retransmits, rtt, rttvar), where the last three
+ * come from the INET_DIAG_INFO attribute (TCP only) and are -1 if it's
+ * missing. rtt and rttvar are expressed in microseconds.
+ */
+static PyObject *
+psutil_inet_diag_msg_to_tuple(struct nlmsghdr *h, int extended) {
+    struct inet_diag_msg *diag = NLMSG_DATA(h);
+    struct rtattr *attr = (struct rtattr *)(diag + 1);
+    int len = h->nlmsg_len - NLMSG_LENGTH(sizeof(*diag));
+    struct tcp_info info;
+    int has_info = 0;
+    char laddr[INET6_ADDRSTRLEN];
+    char raddr[INET6_ADDRSTRLEN];
+
+    if (inet_ntop(diag->idiag_family, diag->id.idiag_src,
+                  laddr, sizeof(laddr)) == NULL ||
+            inet_ntop(diag->idiag_family, diag->id.idiag_dst,
+                      raddr, sizeof(raddr)) == NULL) {
+        PyErr_SetFromErrno(PyExc_OSError);
+        return NULL;
+    }
+    if (! extended) {
+        return Py_BuildValue(
+            "(iisisik)",
+            (int)diag->idiag_family,
+            (int)diag->idiag_state,
+            laddr,
+            (int)ntohs(diag->id.idiag_sport),
+            raddr,
+            (int)ntohs(diag->id.idiag_dport),
+            (unsigned long)diag->idiag_inode);
+    }
+
+    // tcp_info grew over time: only copy what the kernel sent us
+    memset(&info, 0, sizeof(info));
+    for (; RTA_OK(attr, len); attr = RTA_NEXT(attr, len)) {
+        if (attr->rta_type == INET_DIAG_INFO) {
+            memcpy(&info, RTA_DATA(attr),
+                   RTA_PAYLOAD(attr) < sizeof(info) ?
+                   RTA_PAYLOAD(attr) : sizeof(info));
+            has_info = 1;
+        }
+    }
+    return Py_BuildValue(
+        "(iisisikIIlll)",
+        (int)diag->idiag_family,
+        (int)diag->idiag_state,
+        laddr,
+        (int)ntohs(diag->id.idiag_sport),
+        raddr,
+        (int)ntohs(diag->id.idiag_dport),
+        (unsigned long)diag->idiag_inode,
+        // for listening sockets this is the max backlog; report 0
+        // as /proc/net/tcp does
+        diag->idiag_state == TCP_LISTEN ? 0 :
+            (unsigned int)diag->idiag_wqueue,
+        (unsigned int)diag->idiag_rqueue,
+        has_info ? (long)info.tcpi_retransmits : -1L,
+        has_info ? (long)info.tcpi_rtt : -1L,
+        has_info ? (long)info.tcpi_rttvar : -1L);
+}
+
+
+static int
+psutil_cmp_ulong(const void *a, const void *b) {
+    unsigned long x = *(const unsigned long *)a;
+    unsigned long y = *(const unsigned long *)b;
+    return (x > y) - (x < y);
+}
+
+
+/*
+ * Retrieve inet sockets of the given family via NETLINK_SOCK_DIAG,
+ * which is a lot faster than parsing the /proc/net files. *states* is
+ * a bitmask of the TCP states to retrieve (1 << TCP_ESTABLISHED, ...)
+ * which is applied by the kernel. *protocol* is either IPPROTO_TCP or
+ * IPPROTO_UDP. If *lport* or *rport* are not -1 sockets not using
+ * those ports are skipped before being converted to tuples.
+ * If *extended* is true sockets also include queues and TCP
+ * metrics. If *inodes* is a sequence of ints only the sockets having
+ * one of those inodes are returned, so that retrieving the sockets of
+ * a single process costs a lookup per socket instead of a tuple each.
+ * Return a list of tuples (see psutil_inet_diag_msg_to_tuple()).
+ */
+static PyObject *
+psutil_net_connections_diag(PyObject *self, PyObject *args) {
+    int family;
+    int protocol;
+    unsigned int states;
+    int lport = -1;
+    int rport = -1;
+    int extended = 0;
+    int sock = -1;
+    int done = 0;
+    Py_ssize_t i;
+    Py_ssize_t num_inodes = 0;
+    unsigned long inode;
+    unsigned long *inodes = NULL;
+    ssize_t len;
+    char buf[32768];
+    struct nlmsghdr *h;
+    struct nlmsgerr *err;
+    struct inet_diag_msg *inet_diag;
+    struct inet_diag_req_v2 inet_req;
+    PyObject *py_tuple = NULL;
+    PyObject *py_retlist = NULL;
+    PyObject *py_inodes = Py_None;
+    PyObject *py_seq = NULL;
+
+    if (! PyArg_ParseTuple(args, "iiI|iiiO", &family, &protocol, &states,
+                           &lport, &rport, &extended, &py_inodes))
+        return NULL;
+
+    py_retlist = PyList_New(0);
+    if (py_retlist == NULL)
+        return NULL;
+
+    if (py_inodes != Py_None) {
+        py_seq = PySequence_Fast(py_inodes, "inodes must be a sequence");
+        if (py_seq == NULL)
+            goto error;
+        num_inodes = PySequence_Fast_GET_SIZE(py_seq);
+        if (num_inodes == 0) {
+            Py_DECREF(py_seq);
+            return py_retlist;
+        }
+        inodes = malloc(num_inodes * sizeof(unsigned long));
+        if (inodes == NULL) {
+            PyErr_NoMemory();
+            goto error;
+        }
+        for (i = 0; i < num_inodes; i++) {
+            inodes[i] = PyLong_AsUnsignedLong(
+                PySequence_Fast_GET_ITEM(py_seq, i));
+            if (inodes[i] == (unsigned long)-1 && PyErr_Occurred())
+                goto error;
+        }
+        Py_CLEAR(py_seq);
+        qsort(inodes, num_inodes, sizeof(unsigned long), psutil_cmp_ulong);
+    }
+    sock = socket(AF_NETLINK, SOCK_DGRAM | SOCK_CLOEXEC, NETLINK_SOCK_DIAG);
+    if (sock == -1)
+        goto oserror;
+
+    memset(&inet_req, 0, sizeof(inet_req));
+    inet_req.sdiag_family = family;
+    inet_req.sdiag_protocol = protocol;
+    inet_req.idiag_states = states;
+    if (extended && protocol == IPPROTO_TCP)
+        inet_req.idiag_ext |= (1 << (INET_DIAG_INFO - 1));
+    if (psutil_sock_diag_send(sock, &inet_req, sizeof(inet_req)) != 0)
+        goto oserror;
+
+    while (! done) {
+        Py_BEGIN_ALLOW_THREADS
+        len = recv(sock, buf, sizeof(buf), 0);
+        Py_END_ALLOW_THREADS
+        if (len < 0) {
+            if (errno == EINTR)
+                continue;
+            goto oserror;
+        }
+        if (len == 0)
+            break;
+        h = (struct nlmsghdr *)buf;
+        for (; NLMSG_OK(h, len); h = NLMSG_NEXT(h, len)) {
+            if (h->nlmsg_type == NLMSG_DONE) {
+                done = 1;
+                break;
+            }
+            if (h->nlmsg_type == NLMSG_ERROR) {
+                err = NLMSG_DATA(h);
+                errno = err->error ? -err->error : EINVAL;
+                goto oserror;
+            }
+            if (h->nlmsg_type != SOCK_DIAG_BY_FAMILY)
+                continue;
+            inet_diag = NLMSG_DATA(h);
+            inode = inet_diag->idiag_inode;
+            if (inodes != NULL && bsearch(&inode, inodes, num_inodes,
+                                          sizeof(unsigned long),
+                                          psutil_cmp_ulong) == NULL)
+                continue;
+            if (lport != -1 && ntohs(inet_diag->id.idiag_sport) != lport)
+                continue;
+            if (rport != -1 && ntohs(inet_diag->id.idiag_dport) != rport)
+                continue;
+            py_tuple = psutil_inet_diag_msg_to_tuple(h, extended);
+            if (py_tuple == NULL)
+                goto error;
+            if (PyList_Append(py_retlist, py_tuple))
+                goto error;
+            Py_CLEAR(py_tuple);
+        }
+    }
+
+    close(sock);
+    free(inodes);
+    return py_retlist;
+
+oserror:
+    PyErr_SetFromErrno(PyExc_OSError);
+error:
+    if (sock != -1)
+        close(sock);
+    free(inodes);
+    Py_XDECREF(py_seq);
+    Py_XDECREF(py_tuple);
+    Py_DECREF(py_retlist);
+    return NULL;
+}
+#endif  // PSUTIL_HAVE_SOCK_DIAG
+
+
 /*
  * Define the psutil C module methods and initialize the module.
  */
@@ -592,6 +1062,8 @@ PsutilMethods[] = {
      "Return process CPU affinity as a Python long (the bitmask)."},
     {"proc_cpu_affinity_set", psutil_proc_cpu_affinity_set, METH_VARARGS,
      "Set process CPU affinity; expects a bitmask."},
+    {"proc_stat_multi", psutil_proc_stat_multi, METH_VARARGS,
+     "Parse /proc/{pid}/stat of multiple processes in one shot."},
 
     // --- system related functions
 
@@ -602,6 +1074,10 @@ PsutilMethods[] = {
      "Return currently connected users as a list of tuples"},
     {"net_if_duplex_speed", psutil_net_if_duplex_speed, METH_VARARGS,
      "Return duplex and speed info about a NIC"},
+#if PSUTIL_HAVE_SOCK_DIAG
+    {"net_connections_diag", psutil_net_connections_diag, METH_VARARGS,
+     "Return sockets of the given family via NETLINK_SOCK_DIAG"},
+#endif
 
     // --- linux specific
 
@@ -495,6 +495,99 @@ class TestSystemWideConnections(Base, unittest.TestCase):
             p = psutil.Process(pid)
             self.assertEqual(len(p.connections('all')), expected)
 
+    @skip_on_access_denied()
+    def test_net_connections_iter(self):
+        with create_sockets():
+            ls = psutil.net_connections_iter(kind='all')
+            self.assertIs(iter(ls), ls)
+            ls = list(ls)
+            self.assertEqual(
+                sorted([x for x in ls if x.pid == os.getpid()], key=str),
+                sorted([x for x in psutil.net_connections(kind='all')
+                        if x.pid == os.getpid()], key=str))
+            ls = list(psutil.net_connections_iter(kind='all', dedup=True))
+            self.assertEqual(len(ls), len(set(ls)))
+            ls = list(psutil.net_connections_iter(
+                kind='inet', status=psutil.CONN_NONE))
+            for conn in ls:
+                self.assertEqual(conn.status, psutil.CONN_NONE)
+                check_connection_ntuple(conn)
+        self.assertRaises(ValueError, psutil.net_connections_iter, '???')
+
+    @skip_on_access_denied()
+    def test_net_connection_stats(self):
+        server, client = tcp_socketpair(AF_INET, addr=("127.0.0.1", 0))
+        with closing(server):
+            with closing(client):
+                lport = server.getsockname()[1]
+                cport = client.getsockname()[1]
+                stats = psutil.net_connection_stats('tcp4')
+                self.assertEqual(stats[(psutil.CONN_ESTABLISHED, lport)], 1)
+                self.assertEqual(stats[(psutil.CONN_ESTABLISHED, cport)], 1)
+                stats = psutil.net_connection_stats(
+                    'tcp4', group_by=('laddr', 'lport', 'raddr', 'rport'))
+                self.assertEqual(
+                    stats[('127.0.0.1', lport, '127.0.0.1', cport)], 1)
+                stats = psutil.net_connection_stats(
+                    'inet', group_by=('pid', 'family', 'type'))
+                self.assertEqual(
+                    stats[(os.getpid(), AF_INET, SOCK_STREAM)], 2)
+                # compare with net_connections()
+                for group_by in (('status', ), ('family', 'type', 'rport'),
+                                 ('laddr', 'raddr')):
+                    expected = {}
+                    for conn in psutil.net_connections('inet'):
+                        key = psutil._common.conn_group_key(conn, group_by)
+                        expected[key] = expected.get(key, 0) + 1
+                    self.assertEqual(
+                        psutil.net_connection_stats('inet', group_by),
+                        expected)
+
+        self.assertRaises(ValueError, psutil.net_connection_stats,
+                          group_by=('foo', ))
+        self.assertRaises(ValueError, psutil.net_connection_stats,
+                          group_by=())
+        self.assertRaises(ValueError, psutil.net_connection_stats, '???')
+
+    @skip_on_access_denied()
+    def test_filters(self):
+        def mine(**kwargs):
+            return sorted([x for x in psutil.net_connections(**kwargs)
+                           if x.pid == os.getpid()], key=str)
+
+        server, client = tcp_socketpair(AF_INET, addr=("127.0.0.1", 0))
+        with closing(server):
+            with closing(client):
+                lport = server.getsockname()[1]
+                cport = client.getsockname()[1]
+                all_ = mine(kind='tcp4')
+                self.assertEqual(len(all_), 2)
+                # status
+                self.assertEqual(
+                    mine(kind='tcp4', status=psutil.CONN_ESTABLISHED), all_)
+                self.assertEqual(
+                    mine(kind='tcp4', status=[psutil.CONN_LISTEN,
+                                              psutil.CONN_ESTABLISHED]),
+                    all_)
+                self.assertEqual(mine(kind='tcp4', status=psutil.CONN_LISTEN),
+                                 [])
+                self.assertEqual(mine(kind='tcp4', status=psutil.CONN_NONE),
+                                 [])
+                # ports
+                ls = mine(kind='tcp4', lport=lport)
+                self.assertEqual(len(ls), 1)
+                self.assertEqual(ls[0].laddr.port, lport)
+                ls = mine(kind='tcp4', rport=lport)
+                self.assertEqual(len(ls), 1)
+                self.assertEqual(ls[0].laddr.port, cport)
+                self.assertEqual(mine(kind='all', lport=lport),
+                                 mine(kind='tcp4', lport=lport))
+                # laddr
+                self.assertEqual(mine(kind='tcp4', laddr='127.0.0.1'), all_)
+                self.assertEqual(mine(kind='tcp4', laddr='127.0.0.2'), [])
+
+        self.assertRaises(ValueError, psutil.net_connections, status='???')
+
 
 # =====================================================================
 # --- Miscellaneous tests
@@ -117,6 +117,9 @@ class TestAvailability(unittest.TestCase):
         self.assertEqual(hasattr(psutil, "cpu_freq"),
                          linux or MACOS or WINDOWS or FREEBSD)
 
+    def test_net_namespaces(self):
+        self.assertEqual(hasattr(psutil, "net_namespaces"), LINUX)
+
     def test_sensors_temperatures(self):
         self.assertEqual(
             hasattr(psutil, "sensors_temperatures"), LINUX or FREEBSD)
@@ -128,6 +131,9 @@ class TestAvailability(unittest.TestCase):
         self.assertEqual(hasattr(psutil, "sensors_battery"),
                          LINUX or WINDOWS or FREEBSD or MACOS)
 
+    def test_process_snapshot(self):
+        self.assertEqual(hasattr(psutil, "process_snapshot"), LINUX)
+
     def test_proc_environ(self):
         self.assertEqual(hasattr(psutil.Process, "environ"),
                          LINUX or MACOS or WINDOWS)
@@ -169,6 +175,9 @@ class TestAvailability(unittest.TestCase):
         hasit = hasattr(psutil.Process, "memory_maps")
         self.assertEqual(hasit, False if OPENBSD or NETBSD or AIX else True)
 
+    def test_proc_memory_maps_iter(self):
+        self.assertEqual(hasattr(psutil.Process, "memory_maps_iter"), LINUX)
+
 
 # ===================================================================
 # --- Test deprecations
@@ -607,6 +616,23 @@ class TestFetchAllProcesses(unittest.TestCase):
                     self.assertIsInstance(value, (int, long))
                     self.assertGreaterEqual(value, 0)
 
+    def memory_maps_iter(self, ret, proc):
+        try:
+            maps = list(ret)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            # smaps is read while iterating: the process may be gone
+            # in the meantime
+            return
+        self.memory_maps(maps, proc)
+
+    def watch(self, ret, proc):
+        self.assertIsNone(ret)
+        # release the fds, as process_iter() keeps Process instances
+        proc.unwatch()
+
+    def unwatch(self, ret, proc):
+        self.assertIsNone(ret)
+
     def num_handles(self, ret, proc):
         self.assertIsInstance(ret, int)
         self.assertGreaterEqual(ret, 0)
@@ -28,6 +28,8 @@ from psutil._compat import basestring
 from psutil._compat import PY3
 from psutil._compat import u
 from psutil.tests import call_until
+from psutil.tests import create_sockets
+from psutil.tests import get_test_subprocess
 from psutil.tests import HAS_BATTERY
 from psutil.tests import HAS_CPU_FREQ
 from psutil.tests import HAS_RLIMIT
@@ -42,6 +44,7 @@ from psutil.tests import run_test_module_by_name
 from psutil.tests import safe_rmpath
 from psutil.tests import sh
 from psutil.tests import skip_on_not_implemented
+from psutil.tests import tcp_socketpair
 from psutil.tests import TESTFN
 from psutil.tests import ThreadTask
 from psutil.tests import TRAVIS
@@ -612,6 +615,50 @@ class TestSystemCPU(unittest.TestCase):
         else:
             self.assertNotIn('guest_nice', fields)
 
+    def test_per_cpu_times_raw(self):
+        raw = psutil._pslinux.per_cpu_times_raw()
+        times = psutil.cpu_times(percpu=True)
+        self.assertEqual(len(raw), len(times))
+        for ticks, ntuple in zip(raw, times):
+            self.assertEqual(len(ticks), len(ntuple))
+            for x, y in zip(ticks, ntuple):
+                self.assertIsInstance(x, int)
+                self.assertAlmostEqual(
+                    float(x) / psutil._pslinux.CLOCK_TICKS, y, delta=1)
+
+    def test_per_cpu_times_raw_mocked(self):
+        content = textwrap.dedent("""\
+            cpu  100 0 100 800 0 0 0 0 0 0
+            cpu0 50 0 50 400 0 0 0 0 0 0
+            cpu1 50 0 50 400 0 0 0 0 0 1
+            intr 12345
+            ctxt 4567
+            """).encode()
+        with mock.patch('psutil._pslinux.scputimes',
+                        psutil._pslinux.scputimes):
+            with mock_open_content('/proc/stat', content):
+                raw = psutil._pslinux.per_cpu_times_raw()
+        nfields = len(psutil._pslinux.scputimes._fields)
+        self.assertEqual(raw, [[50, 0, 50, 400, 0, 0, 0, 0, 0, 0][:nfields],
+                               [50, 0, 50, 400, 0, 0, 0, 0, 0, 1][:nfields]])
+
+    def test_cpu_times_all(self):
+        content = textwrap.dedent("""\
+            cpu  100 0 100 800 0 0 0 0 0 0
+            cpu0 50 0 50 400 0 0 0 0 0 0
+            cpu1 50 0 50 400 0 0 0 0 0 0
+            intr 12345
+            ctxt 4567
+            """).encode()
+        with mock_open_content('/proc/stat', content) as m:
+            total, percpu = psutil._pslinux.cpu_times_all()
+            self.assertEqual(m.call_count, 1)
+            self.assertEqual(total, psutil.cpu_times())
+            self.assertEqual(percpu, psutil.cpu_times(percpu=True))
+        self.assertEqual(len(percpu), 2)
+        self.assertAlmostEqual(
+            total.idle, 800.0 / psutil._pslinux.CLOCK_TICKS)
+
     @unittest.skipIf(not os.path.exists("/sys/devices/system/cpu/online"),
                      "/sys/devices/system/cpu/online does not exist")
     def test_cpu_count_logical_w_sysdev_cpu_online(self):
@@ -922,6 +969,55 @@ class TestSystemNetwork(unittest.TestCase):
             self.assertAlmostEqual(
                 stats.dropout, ifconfig_ret['dropout'], delta=10)
 
+    def test_net_io_counters_extended_mocked(self):
+        content = textwrap.dedent("""\
+            Inter-|   Receive                                                |  Transmit
+             face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+                lo:    1000      10    0    0    0     0          0         0     1000      10    0    0    0     0       0          0
+              eth0: 1 2 3 4 5 6 7 8 9 10 11 12 13 14 15 16
+            """)  # NOQA
+        with mock_open_content('/proc/net/dev', content):
+            ret = psutil.net_io_counters(pernic=True, nowrap=False,
+                                         extended=True)
+        self.assertEqual(ret['lo'][:8], (1000, 1000, 10, 10, 0, 0, 0, 0))
+        eth0 = ret['eth0']
+        self.assertEqual(eth0.bytes_recv, 1)
+        self.assertEqual(eth0.packets_recv, 2)
+        self.assertEqual(eth0.errin, 3)
+        self.assertEqual(eth0.dropin, 4)
+        self.assertEqual(eth0.fifoin, 5)
+        self.assertEqual(eth0.framein, 6)
+        self.assertEqual(eth0.compressedin, 7)
+        self.assertEqual(eth0.multicastin, 8)
+        self.assertEqual(eth0.bytes_sent, 9)
+        self.assertEqual(eth0.packets_sent, 10)
+        self.assertEqual(eth0.errout, 11)
+        self.assertEqual(eth0.dropout, 12)
+        self.assertEqual(eth0.fifoout, 13)
+        self.assertEqual(eth0.collisionsout, 14)
+        self.assertEqual(eth0.carrierout, 15)
+        self.assertEqual(eth0.compressedout, 16)
+
+    def test_net_io_counters_nics(self):
+        # /proc/net/dev and /sys/class/net/*/statistics agree
+        nics = list(psutil.net_io_counters(pernic=True))
+        for extended in (False, True):
+            procfs = psutil.net_io_counters(pernic=True, nowrap=False,
+                                            extended=extended)
+            sysfs = psutil.net_io_counters(pernic=True, nowrap=False,
+                                           extended=extended,
+                                           nics=nics + ['?!'])
+            self.assertEqual(sorted(sysfs), sorted(procfs))
+            for nic, stats in sysfs.items():
+                self.assertEqual(stats._fields, procfs[nic]._fields)
+                for a, b in zip(stats, procfs[nic]):
+                    self.assertAlmostEqual(a, b, delta=1024 * 1024)
+        with mock.patch('psutil._pslinux.open_text',
+                        side_effect=AssertionError) as m:
+            ret = psutil.net_io_counters(pernic=True, nics=nics[0])
+            assert not m.called
+        self.assertEqual(list(ret), [nics[0]])
+
     # XXX - not reliable when having virtual NICs installed by Docker.
     # @unittest.skipIf(not which('ip'), "'ip' utility not available")
     # @unittest.skipIf(TRAVIS, "skipped on Travis")
@@ -950,6 +1046,7 @@ class TestSystemNetwork(unittest.TestCase):
             pass
         psutil.net_connections(kind='inet6')
 
+    @mock.patch('psutil._pslinux.HAS_SOCK_DIAG', False)
     def test_net_connections_mocked(self):
         with mock_open_content(
             '/proc/net/unix',
@@ -962,6 +1059,358 @@ class TestSystemNetwork(unittest.TestCase):
             psutil.net_connections(kind='unix')
             assert m.called
 
+    @unittest.skipIf(not psutil._pslinux.HAS_SOCK_DIAG, "not supported")
+    def test_net_connections_diag_vs_procfs(self):
+        # a socket which is bound but not listening is not listed in
+        # /proc/net/tcp (on Linux >= 6.5 its state is
+        # TCP_BOUND_INACTIVE), so the diag backend must skip it too
+        bound = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.addCleanup(bound.close)
+        bound.bind(("127.0.0.1", 0))
+        port = bound.getsockname()[1]
+        with create_sockets():
+            for kind in ('tcp', 'udp', 'unix', 'all'):
+                conns = psutil.net_connections(kind=kind)
+                with mock.patch('psutil._pslinux.HAS_SOCK_DIAG', False):
+                    conns_procfs = psutil.net_connections(kind=kind)
+                # sockets may come and go in the meantime, so only
+                # compare those belonging to this process
+                mine = lambda ls: set(  # NOQA
+                    [x for x in ls if x.pid == os.getpid()])
+                self.assertEqual(mine(conns), mine(conns_procfs))
+                self.assertTrue(mine(conns))
+                for conn in conns:
+                    if conn.laddr:
+                        self.assertNotEqual(conn.laddr, ("127.0.0.1", port))
+
+    def test_net_connections_unix_procfs(self):
+        # UNIX sockets are always read from /proc/net/unix, whatever
+        # the backend: compare the sockets of every PID
+        with create_sockets():
+            conns = psutil.net_connections(kind='unix')
+            with mock.patch('psutil._pslinux.HAS_SOCK_DIAG', False):
+                conns_procfs = psutil.net_connections(kind='unix')
+            self.assertEqual(set(conns), set(conns_procfs))
+            self.assertTrue([x for x in conns if x.pid == os.getpid()])
+            for pid in set([x.pid for x in conns if x.pid is not None]):
+                try:
+                    ls = psutil.Process(pid).connections(kind='unix')
+                    with mock.patch('psutil._pslinux.HAS_SOCK_DIAG', False):
+                        ls_procfs = psutil.Process(pid).connections(
+                            kind='unix')
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+                self.assertEqual(set(ls), set(ls_procfs))
+
+    def test_decode_addresses(self):
+        Connections = psutil._pslinux.Connections
+        addrs = ["0500000A:0016", "0100007F:0000", "0500000A:01BB"]
+        self.assertEqual(
+            Connections.decode_addresses(addrs, socket.AF_INET),
+            [("10.0.0.5", 22), (), ("10.0.0.5", 443)])
+        addrs6 = ["0000000000000000FFFF00000100007F:9E49",
+                  "00000000000000000000000001000000:0016"]
+        self.assertEqual(
+            Connections.decode_addresses(addrs6, socket.AF_INET6),
+            [("::ffff:127.0.0.1", 40521), ("::1", 22)])
+        for addr, expected in zip(
+                addrs, Connections.decode_addresses(addrs, socket.AF_INET)):
+            self.assertEqual(
+                Connections.decode_address(addr, socket.AF_INET), expected)
+        # decoded IPs are cached
+        with mock.patch('psutil._pslinux.Connections._decode_ips') as m:
+            Connections.decode_addresses(addrs, socket.AF_INET)
+            assert not m.called
+        # ...up to a max number of entries
+        psutil._pslinux._decoded_ips_cache.clear()
+        with mock.patch('psutil._pslinux.DECODED_IPS_CACHE_MAXSIZE', 2):
+            Connections.decode_addresses(addrs, socket.AF_INET)
+            Connections.decode_addresses(addrs6, socket.AF_INET6)
+            Connections.decode_addresses(addrs, socket.AF_INET)
+            self.assertLessEqual(len(psutil._pslinux._decoded_ips_cache), 2)
+            # least recently used entries are evicted first
+            Connections.decode_addresses(["0500000A:0016"], socket.AF_INET)
+            Connections.decode_addresses(["0100007F:0016"], socket.AF_INET)
+            Connections.decode_addresses(["0500000A:0016"], socket.AF_INET)
+            Connections.decode_addresses(["0600000A:0016"], socket.AF_INET)
+            self.assertEqual(list(psutil._pslinux._decoded_ips_cache),
+                             ["0500000A", "0600000A"])
+        # the cache being emptied by another thread while decoding
+        # does not matter
+        psutil._pslinux._decoded_ips_cache.clear()
+        with mock.patch('psutil._pslinux.Connections._decode_ips',
+                        side_effect=lambda ips, family: (
+                            psutil._pslinux._decoded_ips_cache.clear() or
+                            ["10.0.0.5"] * len(ips))):
+            self.assertEqual(
+                Connections.decode_addresses(addrs, socket.AF_INET),
+                [("10.0.0.5", 22), (), ("10.0.0.5", 443)])
+        # don't leave the mocked values behind
+        psutil._pslinux._decoded_ips_cache.clear()
+
+    def test_find_inode_lines(self):
+        data = textwrap.dedent("""\
+            sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode
+             0: 0100007F:13AD 00000000:0000 0A 00000000:00000000 00:00000000 00000000  1000        0 1234 1 0000000000000000 100 0 0 10 0
+             1: 0100007F:0016 00000000:0000 0A 00000000:00000000 00:00000000 00000000  1234        0 123 1 0000000000000000 100 0 0 10 0
+             2: 0100007F:0050 00000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 1234567 1 0000000000000000 100 0 0 10 0
+            """)  # NOQA
+        lines = data.splitlines(True)
+        find = psutil._pslinux.Connections.find_inode_lines
+        # the uid (1234) and other inodes starting with the same
+        # digits are not mistaken for the inode; file order is kept
+        self.assertEqual(find(lines, ["1234"], 9), [lines[1]])
+        self.assertEqual(find(lines, ["1234567", "123"], 9),
+                         [lines[2], lines[3]])
+        self.assertEqual(find(lines, ["999"], 9), [])
+        # the file is not read any further once all inodes were found
+        it = iter(lines)
+        self.assertEqual(find(it, ["1234"], 9), [lines[1]])
+        self.assertEqual(list(it), lines[2:])
+
+    def test_proc_connections_inode_lookup(self):
+        # sockets of a process having few inodes are looked up by
+        # inode; make sure the result is the same as a full scan
+        def conns():
+            return sorted(map(str, psutil.Process().connections('all')))
+
+        with create_sockets():
+            for diag in (True, False):
+                if diag and not psutil._pslinux.HAS_SOCK_DIAG:
+                    continue
+                with mock.patch('psutil._pslinux.HAS_SOCK_DIAG', diag):
+                    expected = conns()
+                    self.assertTrue(expected)
+                    with mock.patch('psutil._pslinux.INODE_LOOKUP_MAX', 0):
+                        self.assertEqual(conns(), expected)
+
+    @mock.patch('psutil._pslinux.HAS_SOCK_DIAG', False)
+    def test_net_connections_filters_procfs(self):
+        with create_sockets():
+            # filters are applied before decoding lines
+            with mock.patch('psutil._pslinux.Connections.'
+                            'decode_address') as m:
+                psutil.net_connections(kind='tcp', status=psutil.CONN_NONE)
+                psutil.net_connections(kind='tcp', lport=1)
+                assert not m.called
+            conns = psutil.net_connections(kind='all')
+            lport = [x.laddr.port for x in conns
+                     if x.family != socket.AF_UNIX and x.laddr][0]
+            for kwargs in (dict(status=psutil.CONN_LISTEN),
+                           dict(status=psutil.CONN_NONE),
+                           dict(laddr='127.0.0.1'),
+                           dict(lport=lport)):
+                status = psutil._common.conn_statuses(kwargs.get('status'))
+                expected = [
+                    x for x in conns if psutil._common.conn_match(
+                        x, status, kwargs.get('lport'), None,
+                        kwargs.get('laddr'))]
+                self.assertEqual(
+                    sorted(psutil.net_connections(kind='all', **kwargs),
+                           key=str),
+                    sorted(expected, key=str))
+
+    def test_net_connections_extended(self):
+        server, client = tcp_socketpair(socket.AF_INET,
+                                        addr=("127.0.0.1", 0))
+        self.addCleanup(server.close)
+        self.addCleanup(client.close)
+        client.sendall(b"x" * 1000)
+        port = server.getsockname()[1]
+        for diag in (True, False):
+            if diag and not psutil._pslinux.HAS_SOCK_DIAG:
+                continue
+            with mock.patch('psutil._pslinux.HAS_SOCK_DIAG', diag):
+                conns = psutil.net_connections(kind='tcp4', lport=port,
+                                               extended=True)
+            self.assertEqual(len(conns), 1)
+            conn = conns[0]
+            self.assertIsInstance(conn, psutil._pslinux.sconnext)
+            self.assertEqual(conn[:7], psutil.net_connections(
+                kind='tcp4', lport=port)[0])
+            self.assertEqual(conn.txqueue, 0)
+            self.assertEqual(conn.rxqueue, 1000)
+            self.assertEqual(conn.retransmits, 0)
+            if diag:
+                self.assertGreaterEqual(conn.rtt, 0)
+                self.assertGreaterEqual(conn.rttvar, 0)
+            else:
+                self.assertIsNone(conn.rtt)
+                self.assertIsNone(conn.rttvar)
+            for conn in psutil.net_connections(kind='all', extended=True):
+                self.assertIsInstance(conn, psutil._pslinux.sconnext)
+                if conn.type == socket.SOCK_DGRAM:
+                    self.assertIsNone(conn.retransmits)
+                    self.assertIsNone(conn.rtt)
+
+    @mock.patch('psutil._pslinux.HAS_SOCK_DIAG', False)
+    def test_net_connections_iter_batches(self):
+        with create_sockets():
+            conns = sorted(psutil.net_connections_iter(kind='inet'),
+                           key=str)
+            with mock.patch('psutil._pslinux.DECODE_BATCH_SIZE', 1):
+                self.assertEqual(
+                    sorted(psutil.net_connections_iter(kind='inet'),
+                           key=str), conns)
+            # addresses are decoded while iterating
+            with mock.patch('psutil._pslinux.DECODE_BATCH_SIZE', 1):
+                with mock.patch('psutil._pslinux.Connections.'
+                                'decode_addresses',
+                                side_effect=psutil._pslinux.Connections.
+                                decode_addresses) as m:
+                    next(psutil.net_connections_iter(kind='tcp4'))
+                    self.assertEqual(m.call_count, 2)
+
+    def test_net_connection_stats_procfs(self):
+        with create_sockets():
+            for group_by in (('status', 'lport'), ('family', 'type'),
+                             ('laddr', 'raddr', 'rport')):
+                stats = psutil.net_connection_stats('all', group_by)
+                with mock.patch('psutil._pslinux.HAS_SOCK_DIAG', False):
+                    self.assertEqual(
+                        psutil.net_connection_stats('all', group_by), stats)
+
+    def test_net_connection_stats_no_pids(self):
+        with mock.patch('psutil._pslinux.Connections.get_all_inodes') as m:
+            psutil.net_connection_stats('all', ('status', 'lport'))
+            assert not m.called
+
+    def test_net_connections_no_resolve_pids(self):
+        with create_sockets():
+            with mock.patch('psutil._pslinux.Connections.'
+                            'get_all_inodes') as m:
+                conns = psutil.net_connections(kind='all',
+                                               resolve_pids=False)
+                assert not m.called
+            assert conns
+            for conn in conns:
+                self.assertIsNone(conn.pid)
+                self.assertEqual(conn.fd, -1)
+
+    def test_inode_index(self):
+        index = psutil.InodeIndex()
+        mypid = os.getpid()
+        with create_sockets() as socks:
+            conns = psutil.net_connections(kind='all', resolve_pids=index)
+            mine = [x for x in conns if x.pid == mypid]
+            self.assertLessEqual(set([x.fileno() for x in socks]),
+                                 set([x.fd for x in mine]))
+            self.assertEqual(
+                sorted(mine, key=str),
+                sorted([x for x in psutil.net_connections(kind='all')
+                        if x.pid == mypid], key=str))
+            keys = [x for x in index._procs if x[0] == mypid]
+            self.assertEqual(len(keys), 1)
+            num_fds = index._procs[keys[0]][0]
+
+            # processes whose number of fds did not change are not
+            # inspected again
+            patch_num_fds = mock.patch(
+                'psutil._pslinux.Connections.get_proc_num_fds',
+                create=True, side_effect=lambda pid: num_fds)
+            patch_inodes = mock.patch(
+                'psutil._pslinux.Connections.get_proc_inodes',
+                return_value={})
+            with patch_num_fds, patch_inodes as m:
+                index.refresh()
+                self.assertNotIn(
+                    mypid, [x[0][0] for x in m.call_args_list])
+            patch_num_fds = mock.patch(
+                'psutil._pslinux.Connections.get_proc_num_fds',
+                create=True, side_effect=lambda pid: num_fds + 1)
+            with patch_num_fds, patch_inodes as m:
+                inodes = index.refresh()
+                self.assertIn(mypid, [x[0][0] for x in m.call_args_list])
+                self.assertEqual(inodes, {})
+
+            # a reused PID (same PID, different start time) is
+            # inspected again even if its number of fds is the same
+            index.refresh()
+            num_fds = index._procs[keys[0]][0]
+            index._procs = dict(
+                ((pid, start_time - 1), entry) for (pid, start_time), entry
+                in index._procs.items())
+            patch_num_fds = mock.patch(
+                'psutil._pslinux.Connections.get_proc_num_fds',
+                create=True, side_effect=lambda pid: num_fds)
+            with patch_num_fds, patch_inodes as m:
+                index.refresh()
+                self.assertIn(mypid, [x[0][0] for x in m.call_args_list])
+            self.assertEqual([x for x in index._procs if x[0] == mypid],
+                             keys)
+
+        # gone PIDs are removed from the index
+        index._procs[(2 ** 30, 0)] = (0, {})
+        index.refresh()
+        self.assertNotIn((2 ** 30, 0), index._procs)
+        index.clear()
+        self.assertEqual(index._procs, {})
+
+    def test_net_namespaces(self):
+        ns = psutil.net_namespaces()
+        myns = os.stat('/proc/self/ns/net').st_ino
+        self.assertIn(os.getpid(), ns[myns])
+        for inode, pids in ns.items():
+            self.assertIsInstance(inode, int)
+            self.assertEqual(pids, sorted(set(pids)))
+
+    def test_netns_self(self):
+        def mine(conns):
+            return sorted([x for x in conns if x.pid == mypid], key=str)
+
+        mypid = os.getpid()
+        with create_sockets():
+            for netns in (mypid, '/proc/%s/ns/net' % mypid):
+                conns = mine(psutil.net_connections('all', netns=netns))
+                self.assertTrue(conns)
+                with mock.patch('psutil._pslinux.HAS_SOCK_DIAG', False):
+                    self.assertEqual(
+                        conns, mine(psutil.net_connections('all')))
+                self.assertEqual(
+                    set(psutil.net_io_counters(pernic=True, netns=netns)),
+                    set(psutil.net_io_counters(pernic=True)))
+        self.assertRaises(psutil.NoSuchProcess, psutil.net_connections,
+                          netns=2 ** 30)
+        self.assertRaises(psutil.NoSuchProcess, psutil.net_io_counters,
+                          netns=2 ** 30)
+        self.assertRaises(ValueError, psutil.net_connections,
+                          netns=os.path.abspath(__file__))
+        self.assertRaises(psutil.NoSuchProcess, psutil.net_connections,
+                          netns='/proc/%s/ns/net' % 2 ** 30)
+        self.assertRaises(ValueError, psutil.net_io_counters,
+                          netns='/var/run/netns/%s' % 2 ** 30)
+        self.assertRaises(TypeError, psutil.net_connections, netns=True)
+        self.assertRaises(TypeError, psutil.net_io_counters, netns=False)
+
+    @unittest.skipIf(os.getuid() != 0, "need root access")
+    @unittest.skipIf(not which('unshare'), "unshare not available")
+    def test_netns_other(self):
+        sproc = get_test_subprocess(['unshare', '-n', 'sleep', '60'])
+        self.addCleanup(reap_children)
+        path = '/proc/%s/ns/net' % sproc.pid
+        myns = os.stat('/proc/self/ns/net').st_ino
+        call_until(lambda: os.stat(path).st_ino, "ret != %s" % myns)
+        self.assertIn(sproc.pid, psutil.net_namespaces()[os.stat(path).st_ino])
+        with create_sockets():
+            self.assertEqual(psutil.net_connections('inet', netns=path), [])
+            self.assertTrue(psutil.net_connections('inet'))
+        self.assertEqual(
+            list(psutil.net_io_counters(pernic=True, netns=sproc.pid)),
+            ['lo'])
+
+    @unittest.skipIf(not psutil._pslinux.HAS_SOCK_DIAG, "not supported")
+    def test_net_connections_diag_fallback(self):
+        conns = psutil._pslinux.Connections()
+        with mock.patch('psutil._pslinux.cext.net_connections_diag',
+                        side_effect=OSError(errno.EINVAL, "")) as m:
+            with mock.patch('psutil._pslinux.Connections.process_inet',
+                            return_value=[]) as m2:
+                self.assertEqual(conns.retrieve('tcp4'), [])
+                self.assertEqual(conns.retrieve('tcp4'), [])
+        # the diag backend is tried only once
+        self.assertEqual(m.call_count, 1)
+        self.assertEqual(m2.call_count, 2)
+
 
 # =====================================================================
 # --- system disk
@@ -1287,6 +1736,33 @@ class TestMisc(unittest.TestCase):
                 psutil._pslinux.boot_time)
             assert m.called
 
+    def test_system_snapshot_reads_once(self):
+        orig_open = psutil._pslinux.open_binary
+        with mock.patch('psutil._pslinux.open_binary',
+                        side_effect=orig_open) as m:
+            snap = psutil.system_snapshot()
+        paths = [x[0][0] for x in m.call_args_list]
+        self.assertEqual(sorted(paths), sorted(set(paths)))
+        for name in ('stat', 'meminfo', 'vmstat', 'loadavg'):
+            self.assertIn('/proc/%s' % name, paths)
+        self.assertEqual(snap.loadavg, psutil._pslinux.loadavg())
+        self.assertEqual(len(snap.per_cpu_times), psutil.cpu_count())
+
+    def test_oneshot(self):
+        orig_open = psutil._pslinux.open_binary
+        with mock.patch('psutil._pslinux.open_binary',
+                        side_effect=orig_open) as m:
+            with psutil.oneshot():
+                psutil.cpu_times()
+                with psutil.oneshot():
+                    psutil.cpu_stats()
+                psutil.boot_time()
+                self.assertEqual(m.call_count, 1)
+            # cache is discarded on exit
+            psutil.cpu_times()
+            self.assertEqual(m.call_count, 2)
+        self.assertIsNone(psutil._pslinux._oneshot.cache)
+
     def test_users_mocked(self):
         # Make sure ':0' and ':0.0' (returned by C ext) are converted
         # to 'localhost'.
@@ -1627,6 +2103,51 @@ class TestProcess(unittest.TestCase):
 
     tearDown = setUp
 
+    def test_watch(self):
+        sproc = get_test_subprocess()
+        self.addCleanup(reap_children)
+        p = psutil.Process(sproc.pid)
+        p.watch()
+        self.addCleanup(p.unwatch)
+        p.watch()  # NOOP
+        orig_open = open
+        patch_point = 'builtins.open' if PY3 else '__builtin__.open'
+        with mock.patch(patch_point, side_effect=orig_open) as m:
+            assert p.is_running()
+            self.assertEqual(p.create_time(), p._create_time)
+            name = p.name()
+            p.cpu_times()
+            vms = p.memory_info().vms
+        assert not m.called
+        self.assertEqual(name, psutil.Process(sproc.pid).name())
+        self.assertEqual(vms, psutil.Process(sproc.pid).memory_info().vms)
+        sproc.terminate()
+        sproc.wait()
+        assert not p.is_running()
+        self.assertRaises(psutil.NoSuchProcess, p.cpu_times)
+        self.assertRaises(psutil.NoSuchProcess, p.memory_info)
+        p.unwatch()
+        self.assertRaises(psutil.NoSuchProcess, p.watch)
+
+    def test_watch_pid_reused(self):
+        p = psutil.Process()
+        with mock.patch("psutil._pslinux.Process.create_time",
+                        return_value=p._create_time + 1):
+            self.assertRaises(psutil.NoSuchProcess, p.watch)
+        self.assertIsNone(p._proc._watched)
+        assert not p.is_running()
+
+    def test_unwatch(self):
+        p = psutil.Process()
+        p.watch()
+        files = list(p._proc._watched.values())
+        p.unwatch()
+        for f in files:
+            assert f.closed
+        self.assertIsNone(p._proc._watched)
+        assert p.is_running()
+        p.unwatch()  # NOOP
+
     def test_memory_full_info(self):
         src = textwrap.dedent("""
             import time
@@ -1643,11 +2164,15 @@ class TestProcess(unittest.TestCase):
         self.assertAlmostEqual(
             mem.uss, sum([x.private_dirty + x.private_clean for x in maps]),
             delta=4096)
+        # smaps_rollup sums up PSS before rounding it to kB whereas
+        # smaps rounds it for every mapping.
         self.assertAlmostEqual(
-            mem.pss, sum([x.pss for x in maps]), delta=4096)
+            mem.pss, sum([x.pss for x in maps]),
+            delta=max(4096, len(maps) * 1024))
         self.assertAlmostEqual(
             mem.swap, sum([x.swap for x in maps]), delta=4096)
 
+    @mock.patch("psutil._pslinux.HAS_SMAPS_ROLLUP", False)
     def test_memory_full_info_mocked(self):
         # See: https://github.com/giampaolo/psutil/issues/1222
         with mock_open_content(
@@ -1682,6 +2207,136 @@ class TestProcess(unittest.TestCase):
             self.assertEqual(mem.pss, 3 * 1024)
             self.assertEqual(mem.swap, 15 * 1024)
 
+    @unittest.skipIf(not psutil._pslinux.HAS_SMAPS_ROLLUP, "not supported")
+    def test_memory_full_info_rollup(self):
+        p = psutil.Process()
+        with mock.patch("psutil._pslinux.HAS_SMAPS_ROLLUP", False):
+            smaps_mem = p.memory_full_info()
+        rollup_mem = p.memory_full_info()
+        self.assertAlmostEqual(rollup_mem.uss, smaps_mem.uss, delta=512 * 1024)
+        self.assertAlmostEqual(rollup_mem.pss, smaps_mem.pss, delta=512 * 1024)
+        self.assertEqual(rollup_mem.swap, smaps_mem.swap)
+
+    def test_memory_full_info_rollup_mocked(self):
+        with mock.patch("psutil._pslinux.HAS_SMAPS_ROLLUP", True):
+            with mock_open_content(
+                "/proc/%s/smaps_rollup" % os.getpid(),
+                textwrap.dedent("""\
+                    00400000-ff601000 ---p 00000000 00:00 0       [rollup]
+                    Rss:                   2 kB
+                    Pss:                   3 kB
+                    Pss_Anon:              4 kB
+                    Shared_Clean:          4 kB
+                    Shared_Dirty:          5 kB
+                    Private_Clean:         6 kB
+                    Private_Dirty:         7 kB
+                    Referenced:            8 kB
+                    Anonymous:             9 kB
+                    Shared_Hugetlb:        13 kB
+                    Private_Hugetlb:       14 kB
+                    Swap:                  15 kB
+                    SwapPss:               16 kB
+                    Locked:                19 kB
+                    """).encode()) as m:
+                mem = psutil.Process().memory_full_info()
+                assert m.called
+        self.assertEqual(mem.uss, (6 + 7 + 14) * 1024)
+        self.assertEqual(mem.pss, 3 * 1024)
+        self.assertEqual(mem.swap, 15 * 1024)
+
+    def test_memory_full_info_rollup_esrch(self):
+        # Kernel threads raise ESRCH on smaps_rollup: smaps is expected
+        # to be used instead.
+        with mock.patch("psutil._pslinux.HAS_SMAPS_ROLLUP", True):
+            with mock_open_exception(
+                    "/proc/%s/smaps_rollup" % os.getpid(),
+                    IOError(errno.ESRCH, "")) as m1:
+                with mock.patch("psutil._pslinux.Process._read_smaps_file",
+                                return_value=b"") as m2:
+                    mem = psutil.Process().memory_full_info()
+                    assert m1.called
+                    assert m2.called
+        self.assertEqual(mem.uss, 0)
+        self.assertEqual(mem.pss, 0)
+        self.assertEqual(mem.swap, 0)
+
+    def test_memory_maps_iter(self):
+        p = psutil.Process()
+        with p.oneshot():
+            maps = p.memory_maps(grouped=False)
+            it = p.memory_maps_iter()
+            self.assertEqual(next(it).addr, maps[0].addr)
+            self.assertEqual([x.addr for x in it],
+                             [x.addr for x in maps[1:]])
+        # ...and memory_maps(grouped=True) uses it
+        with mock.patch("psutil._pslinux.Process._read_smaps_file") as m:
+            grouped = p.memory_maps()
+            assert not m.called
+        self.assertEqual(sorted(x.path for x in grouped),
+                         sorted(set(x.path for x in maps)))
+
+    def test_memory_maps_iter_mocked(self):
+        with mock_open_content(
+            "/proc/%s/smaps" % os.getpid(),
+            textwrap.dedent("""\
+                00400000-00401000 r-xp 00000000 08:01 1  /usr/bin/foo
+                Size:                  4 kB
+                Rss:                   2 kB
+                Pss:                   1 kB
+                Swap:                  3 kB
+                VmFlags: rd ex
+                00601000-00602000 rw-p 00000000 00:00 0
+                Size:                  4 kB
+                Rss:                   4 kB
+                Private_Dirty:         4 kB
+                VmFlags: rd wr
+                """).encode()) as m:
+            p = psutil.Process()
+            maps = list(p.memory_maps_iter())
+            assert m.called
+            grouped = p.memory_maps()
+        self.assertEqual(len(maps), 2)
+        self.assertEqual(maps[0].addr, '00400000-00401000')
+        self.assertEqual(maps[0].path, '/usr/bin/foo')
+        self.assertEqual(maps[0].rss, 2 * 1024)
+        self.assertEqual(maps[0].pss, 1 * 1024)
+        self.assertEqual(maps[0].swap, 3 * 1024)
+        self.assertEqual(maps[1].path, '[anon]')
+        self.assertEqual(maps[1].perms, 'rw-p')
+        self.assertEqual(maps[1].private_dirty, 4 * 1024)
+        self.assertEqual(maps[1].swap, 0)
+        self.assertEqual(sorted(grouped), sorted([
+            psutil._pslinux.pmmap_grouped(
+                '/usr/bin/foo', 2048, 4096, 1024, 0, 0, 0, 0, 0, 0, 3072),
+            psutil._pslinux.pmmap_grouped(
+                '[anon]', 4096, 4096, 0, 0, 0, 0, 4096, 0, 0, 0)]))
+
+    def test_memory_maps_iter_process_gone(self):
+        # the process disappearing while smaps is being parsed
+        entry = ('00400000-00401000', 'r-xp', '/usr/bin/foo') + (0,) * 10
+
+        def parse_smaps(f):
+            yield entry
+            raise OSError(errno.ESRCH, "")
+
+        p = psutil.Process()
+        with mock.patch("psutil._pslinux.parse_smaps",
+                        side_effect=parse_smaps):
+            it = p.memory_maps_iter()
+            next(it)
+            self.assertRaises(psutil.NoSuchProcess, next, it)
+            self.assertRaises(psutil.NoSuchProcess, p.memory_maps)
+        # the file is closed if the generator is not exhausted
+        patch_point = 'builtins.open' if PY3 else '__builtin__.open'
+        with mock.patch(patch_point) as m:
+            with mock.patch("psutil._pslinux.parse_smaps",
+                            return_value=iter([entry] * 2)):
+                it = p.memory_maps_iter()
+                next(it)
+                assert not m.return_value.close.called
+                it.close()
+            m.return_value.close.assert_called_once_with()
+
     # On PYPY file descriptors are not closed fast enough.
     @unittest.skipIf(PYPY, "unreliable on PYPY")
     def test_open_files_mode(self):
@@ -1978,6 +2633,103 @@ class TestProcess(unittest.TestCase):
             self.assertEqual(p._proc._get_eligible_cpus(), list(range(0, 8)))
 
 
+@unittest.skipIf(not LINUX, "LINUX only")
+class TestProcessSnapshot(unittest.TestCase):
+
+    def test_columns(self):
+        table = psutil.process_snapshot()
+        self.assertEqual(sorted(table.keys()),
+                         sorted(psutil._psplatform.SNAPSHOT_ATTRS))
+        lengths = set([len(x) for x in table.values()])
+        self.assertEqual(len(lengths), 1)
+        self.assertIn(os.getpid(), table['pid'])
+
+    def test_against_process(self):
+        table = psutil.process_snapshot(
+            ['pid', 'ppid', 'name', 'create_time', 'uid', 'num_threads'])
+        idx = table['pid'].index(os.getpid())
+        p = psutil.Process()
+        self.assertEqual(table['ppid'][idx], p.ppid())
+        self.assertEqual(table['name'][idx], p._proc.name())
+        self.assertEqual(table['create_time'][idx], p.create_time())
+        self.assertEqual(table['uid'][idx], p.uids().real)
+        self.assertEqual(table['num_threads'][idx], p.num_threads())
+
+    def test_only_needed_files_are_read(self):
+        with mock.patch("psutil._pslinux.open_binary",
+                        side_effect=psutil._pslinux.open_binary) as m:
+            psutil.process_snapshot(['pid', 'ppid'])
+        self.assertFalse([x for x in m.call_args_list
+                          if x[0][0].endswith(('statm', 'status'))])
+
+    def test_invalid_attrs(self):
+        self.assertRaises(ValueError, psutil.process_snapshot, ['foo'])
+        self.assertRaises(TypeError, psutil.process_snapshot, 'pid')
+
+    def test_process_gone(self):
+        with mock.patch("psutil._pslinux.pids", return_value=[2 ** 30]):
+            table = psutil.process_snapshot(['pid', 'rss'])
+        self.assertEqual(table, {'pid': [], 'rss': []})
+
+
+@unittest.skipIf(not LINUX, "LINUX only")
+class TestProcStatMulti(unittest.TestCase):
+
+    def test_against_stat_file(self):
+        p = psutil.Process()
+        ret = psutil._psplatform.cext.proc_stat_multi("/proc", [p.pid])
+        self.assertEqual(len(ret), 1)
+        (pid, name, status, ppid, ttynr, _, _, _, _, nice, num_threads,
+            ctime, cpu_num) = ret[0]
+        values = p._proc._parse_stat_file()
+        self.assertEqual(pid, p.pid)
+        self.assertEqual(name, values['name'])
+        self.assertEqual(status, values['status'])
+        self.assertEqual(ppid, int(values['ppid']))
+        self.assertEqual(ttynr, int(values['ttynr']))
+        self.assertEqual(ctime, int(values['create_time']))
+        self.assertEqual(nice, p.nice())
+        self.assertEqual(num_threads, p.num_threads())
+
+    def test_gone_pids_are_skipped(self):
+        ret = psutil._psplatform.cext.proc_stat_multi(
+            "/proc", [os.getpid(), 2 ** 30])
+        self.assertEqual([x[0] for x in ret], [os.getpid()])
+
+    def test_empty(self):
+        self.assertEqual(
+            psutil._psplatform.cext.proc_stat_multi("/proc", []), [])
+
+    def test_errors(self):
+        self.assertRaises(
+            TypeError, psutil._psplatform.cext.proc_stat_multi, "/proc", 1)
+        self.assertRaises(
+            TypeError, psutil._psplatform.cext.proc_stat_multi, "/proc",
+            ["foo"])
+        self.assertRaises(
+            OSError, psutil._psplatform.cext.proc_stat_multi,
+            "/proc/self/exe", [os.getpid()])
+
+    def test_ppid_map(self):
+        ppid_map = psutil._psplatform.ppid_map()
+        self.assertEqual(ppid_map[os.getpid()], os.getppid())
+
+    def test_create_time_map(self):
+        p = psutil.Process()
+        ctimes = psutil._psplatform.create_time_map([p.pid, 2 ** 30])
+        self.assertEqual(ctimes, {p.pid: p.create_time()})
+
+    def test_process_iter_pid_reused(self):
+        p = [x for x in psutil.process_iter() if x.pid == os.getpid()][0]
+        with mock.patch("psutil._psplatform.create_time_map",
+                        return_value={os.getpid(): 0.0}) as m:
+            p2 = [x for x in psutil.process_iter() if x.pid == os.getpid()][0]
+            assert m.called
+        self.assertIsNot(p, p2)
+        p3 = [x for x in psutil.process_iter() if x.pid == os.getpid()][0]
+        self.assertIs(p2, p3)
+
+
 @unittest.skipIf(not LINUX, "LINUX only")
 class TestProcessAgainstStatus(unittest.TestCase):
     """/proc/pid/stat and /proc/pid/status have many values in common.
@@ -2061,6 +2813,93 @@ class TestProcessAgainstStatus(unittest.TestCase):
 # =====================================================================
 
 
+@unittest.skipIf(not LINUX, "LINUX only")
+class TestFdPool(unittest.TestCase):
+
+    def setUp(self):
+        psutil.enable_fd_pool()
+
+    def tearDown(self):
+        psutil.disable_fd_pool()
+        psutil.PROCFS_PATH = "/proc"
+
+    def test_reuse_fds(self):
+        orig_open = open
+        patch_point = 'builtins.open' if PY3 else '__builtin__.open'
+        with mock.patch(patch_point, side_effect=orig_open) as m:
+            for x in range(3):
+                psutil.cpu_times()
+                psutil.virtual_memory()
+                psutil.net_io_counters(pernic=True, nowrap=False)
+        paths = [x[0][0] for x in m.call_args_list]
+        self.assertEqual(sorted(paths), sorted(set(paths)))
+        self.assertIn('/proc/stat', paths)
+        self.assertIn('/proc/meminfo', paths)
+        self.assertIn('/proc/net/dev', paths)
+        # the values are updated on every read
+        t1 = psutil.cpu_stats().ctx_switches
+        time.sleep(0.01)
+        self.assertGreater(psutil.cpu_stats().ctx_switches, t1)
+
+    def test_disable(self):
+        psutil.cpu_times()
+        files = [x[0] for x in psutil._pslinux.fd_pool._files.values()]
+        self.assertEqual(len(files), 1)
+        psutil.disable_fd_pool()
+        assert files[0].closed
+        self.assertEqual(psutil._pslinux.fd_pool._files, {})
+        psutil.cpu_times()
+        self.assertEqual(psutil._pslinux.fd_pool._files, {})
+
+    def test_procfs_path_change(self):
+        psutil.cpu_times()
+        f = list(psutil._pslinux.fd_pool._files.values())[0][0]
+        my_procfs = tempfile.mkdtemp()
+        try:
+            # bigger than the initial buffer size
+            with open(os.path.join(my_procfs, 'stat'), 'w') as f2:
+                f2.write('cpu   1 0 0 0 0 0 0 0 0 0\n')
+                for x in range(1000):
+                    f2.write('cpu%s  0 0 0 0 0 0 0 0 0 0\n' % x)
+            psutil.PROCFS_PATH = my_procfs
+            self.assertEqual(len(psutil.cpu_times(percpu=True)), 1000)
+            assert f.closed
+            self.assertEqual(list(psutil._pslinux.fd_pool._files),
+                             [os.path.join(my_procfs, 'stat')])
+        finally:
+            psutil.disable_fd_pool()
+            shutil.rmtree(my_procfs)
+
+    def test_short_read(self):
+        # seq_file-backed files return about one page per read() call:
+        # a short read does not mean EOF.
+        content = psutil._pslinux.read_procfs('net/dev')
+        f = io.BytesIO(content)
+        orig_readinto = f.readinto
+        f.readinto = lambda b: orig_readinto(b[:100])
+        buf, nbytes = psutil._pslinux.readinto_all(f, bytearray(64))
+        self.assertEqual(bytes(buf[:nbytes]), content)
+        self.assertGreaterEqual(len(buf), len(content))
+
+    def test_buffer_reuse(self):
+        psutil.cpu_times()
+        buf = psutil._pslinux.fd_pool._files['/proc/stat'][1]
+        psutil.cpu_times()
+        self.assertIs(psutil._pslinux.fd_pool._files['/proc/stat'][1], buf)
+
+    def test_disk_io_counters(self):
+        try:
+            psutil.disk_io_counters()
+        except Exception as err:
+            raise self.skipTest("disk_io_counters() broken: %r" % err)
+        self.assertIn('/proc/diskstats', psutil._pslinux.fd_pool._files)
+        pooled = psutil.disk_io_counters(perdisk=True, nowrap=False)
+        psutil.disable_fd_pool()
+        self.assertEqual(
+            sorted(pooled),
+            sorted(psutil.disk_io_counters(perdisk=True, nowrap=False)))
+
+
 @unittest.skipIf(not LINUX, "LINUX only")
 class TestUtils(unittest.TestCase):
 
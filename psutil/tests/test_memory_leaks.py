@@ -18,6 +18,7 @@ import errno
 import functools
 import gc
 import os
+import socket
 import sys
 import threading
 import time
@@ -351,6 +352,23 @@ class TestProcessObjectLeaks(TestMemLeak):
     def test_memory_maps(self):
         self.execute(self.proc.memory_maps)
 
+    @unittest.skipIf(not LINUX, "LINUX only")
+    def test_memory_maps_iter(self):
+        self.execute(lambda: list(self.proc.memory_maps_iter()))
+
+    @unittest.skipIf(not LINUX, "LINUX only")
+    def test_watch(self):
+        def fun():
+            self.proc.watch()
+            self.proc.cpu_times()
+            self.proc.memory_info()
+            self.proc.unwatch()
+        self.execute(fun)
+
+    @unittest.skipIf(not LINUX, "LINUX only")
+    def test_unwatch(self):
+        self.execute(self.proc.unwatch)
+
     @unittest.skipIf(not LINUX, "LINUX only")
     @unittest.skipIf(not HAS_RLIMIT, "not supported")
     def test_rlimit_get(self):
@@ -522,6 +540,14 @@ class TestModuleFunctionsLeaks(TestMemLeak):
     def test_pids(self):
         self.execute(psutil.pids)
 
+    @unittest.skipIf(not LINUX, "LINUX only")
+    def test_process_snapshot(self):
+        self.execute(psutil.process_snapshot, ['pid', 'ppid', 'name'])
+
+    @unittest.skipIf(not LINUX, "LINUX only")
+    def test_proc_stat_multi(self):
+        self.execute(cext.proc_stat_multi, "/proc", psutil.pids())
+
     # --- net
 
     @unittest.skipIf(TRAVIS and MACOS, "false positive on travis")
@@ -536,6 +562,37 @@ class TestModuleFunctionsLeaks(TestMemLeak):
         with create_sockets():
             self.execute(psutil.net_connections)
 
+    @unittest.skipIf(LINUX,
+                     "worthless on Linux (pure python)")
+    @unittest.skipIf(MACOS and os.getuid() != 0, "need root access")
+    def test_net_connections_iter(self):
+        with create_sockets():
+            self.execute(lambda: list(psutil.net_connections_iter()))
+
+    @unittest.skipIf(LINUX,
+                     "worthless on Linux (pure python)")
+    @unittest.skipIf(MACOS and os.getuid() != 0, "need root access")
+    def test_net_connection_stats(self):
+        with create_sockets():
+            self.execute(psutil.net_connection_stats)
+
+    @unittest.skipIf(not hasattr(psutil, "net_namespaces"), "not supported")
+    def test_net_namespaces(self):
+        self.execute(psutil.net_namespaces)
+
+    @unittest.skipIf(not LINUX or not hasattr(cext, "net_connections_diag"),
+                     "LINUX only")
+    def test_net_connections_diag(self):
+        with create_sockets():
+            self.execute(cext.net_connections_diag, socket.AF_INET,
+                         socket.IPPROTO_TCP, 0xffffffff)
+            self.execute(cext.net_connections_diag, socket.AF_INET,
+                         socket.IPPROTO_TCP, 0xffffffff, -1, -1, 1)
+            self.execute(cext.net_connections_diag, socket.AF_INET,
+                         socket.IPPROTO_TCP, 0xffffffff, -1, -1, 0, [1, 2])
+            self.execute(cext.net_connections_diag, socket.AF_INET6,
+                         socket.IPPROTO_UDP, 0xffffffff)
+
     def test_net_if_addrs(self):
         # Note: verified that on Windows this was a false positive.
         self.execute(psutil.net_if_addrs,
@@ -568,6 +625,32 @@ class TestModuleFunctionsLeaks(TestMemLeak):
     def test_boot_time(self):
         self.execute(psutil.boot_time)
 
+    def test_system_snapshot(self):
+        self.execute(psutil.system_snapshot)
+
+    def test_oneshot(self):
+        def fun():
+            with psutil.oneshot():
+                psutil.cpu_times()
+        self.execute(fun)
+
+    @unittest.skipIf(not LINUX, "LINUX only")
+    def test_enable_fd_pool(self):
+        def fun():
+            psutil.enable_fd_pool()
+            psutil.cpu_times()
+            psutil.virtual_memory()
+        self.execute(fun)
+        psutil.disable_fd_pool()
+
+    @unittest.skipIf(not LINUX, "LINUX only")
+    def test_disable_fd_pool(self):
+        def fun():
+            psutil.enable_fd_pool()
+            psutil.cpu_times()
+            psutil.disable_fd_pool()
+        self.execute(fun)
+
     # XXX - on Windows this produces a false positive
     @unittest.skipIf(WINDOWS, "XXX produces a false positive on Windows")
     def test_users(self):
@@ -152,10 +152,63 @@ class TestProcess(unittest.TestCase):
         # a username in which case psutil is supposed to return
         # the stringified uid.
         p = psutil.Process()
+        p.username.cache_clear()
+        self.addCleanup(p.username.cache_clear)
         with mock.patch("psutil.pwd.getpwuid", side_effect=KeyError) as fun:
             self.assertEqual(p.username(), str(p.uids().real))
             assert fun.called
 
+    def test_username_cache(self):
+        p = psutil.Process()
+        p.username.cache_clear()
+        self.addCleanup(p.username.cache_clear)
+        name = p.username()
+        info = p.username.cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 0)
+        self.assertEqual(info.currsize, 1)
+        with mock.patch("psutil.pwd.getpwuid") as fun:
+            self.assertEqual(p.username(), name)
+            assert not fun.called
+        self.assertEqual(p.username.cache_info().hits, 1)
+        # expired entries are resolved again
+        with mock.patch("psutil._psposix.time.time",
+                        return_value=time.time() + 3600):
+            with mock.patch("psutil.pwd.getpwuid",
+                            side_effect=KeyError) as fun:
+                self.assertEqual(p.username(), str(p.uids().real))
+                assert fun.called
+        p.username.cache_clear()
+        self.assertEqual(p.username.cache_info(), (0, 0, 1024, 0))
+
+    def test_name_cache_maxsize(self):
+        resolver = mock.Mock(side_effect=str)
+        cache = psutil._psposix._NameCache(resolver, maxsize=2, ttl=60)
+        self.assertEqual(cache(1), "1")
+        self.assertEqual(cache(1), "1")
+        self.assertEqual(cache(2), "2")
+        self.assertEqual(resolver.call_count, 2)
+        self.assertEqual(cache.cache_info(), (1, 2, 2, 2))
+        # no room and no expired entries: the cache is emptied
+        self.assertEqual(cache(3), "3")
+        self.assertEqual(cache.cache_info().currsize, 1)
+        # expired entries are evicted first
+        with mock.patch("psutil._psposix.time.time",
+                        return_value=time.time() + 3600):
+            cache(4)
+            cache(5)
+        self.assertEqual(sorted(cache._cache), [4, 5])
+        self.assertEqual(resolver.call_count, 5)
+
+    def test_get_groupname(self):
+        import grp
+        gid = os.getgid()
+        try:
+            expected = grp.getgrgid(gid).gr_name
+        except KeyError:
+            expected = str(gid)
+        self.assertEqual(psutil._psposix.get_groupname(gid), expected)
+
     @skip_on_access_denied()
     @retry_before_failing()
     def test_rss_memory(self):
@@ -301,6 +354,10 @@ class TestProcess(unittest.TestCase):
                     num1 = p.num_fds()
                     for x in range(2):
                         call(p, name)
+                    if name == 'watch':
+                        # the fds kept open by watch() are released
+                        # by unwatch()
+                        p.unwatch()
                     num2 = p.num_fds()
                 except psutil.AccessDenied:
                     pass
@@ -400,6 +457,23 @@ class TestSystemAPIs(unittest.TestCase):
                               psutil._psposix.wait_pid, os.getpid())
             assert m.called
 
+    def test_terminal_map_cache(self):
+        get_terminal_map = psutil._psposix.get_terminal_map
+        get_terminal_map.cache_clear()
+        self.addCleanup(get_terminal_map.cache_clear)
+        tmap = get_terminal_map()
+        with mock.patch("psutil._psposix.glob.glob") as m:
+            self.assertIs(get_terminal_map(), tmap)
+            assert not m.called
+        # a terminal was created or removed
+        with mock.patch("psutil._psposix._terminal_dirs_mtime",
+                        return_value=(0, 0)):
+            with mock.patch("psutil._psposix.glob.glob",
+                            return_value=[]) as m:
+                self.assertEqual(get_terminal_map(), {})
+                assert m.called
+        self.assertEqual(get_terminal_map(), tmap)
+
     # AIX can return '-' in df output instead of numbers, e.g. for /proc
     @unittest.skipIf(AIX, "unreliable on AIX")
     def test_disk_usage(self):
@@ -1120,6 +1120,11 @@ class TestProcess(unittest.TestCase):
         p = psutil.Process()
         d = p.as_dict(attrs=['exe', 'name'])
         self.assertEqual(sorted(d.keys()), ['exe', 'name'])
+        # methods with side effects are not included
+        d = p.as_dict()
+        for name in ('watch', 'unwatch', 'memory_maps_iter', 'oneshot'):
+            self.assertNotIn(name, d)
+            self.assertRaises(ValueError, p.as_dict, attrs=[name])
 
         p = psutil.Process(min(psutil.pids()))
         d = p.as_dict(attrs=['connections'], ad_value='foo')
@@ -1255,6 +1260,11 @@ class TestProcess(unittest.TestCase):
                     ret = meth([0])
                 elif name == 'send_signal':
                     ret = meth(signal.SIGTERM)
+                elif name == 'unwatch':
+                    # it just closes the fds opened by watch(), even
+                    # if the process is gone
+                    self.assertIsNone(meth())
+                    continue
                 else:
                     ret = meth()
             except psutil.ZombieProcess:
@@ -10,6 +10,7 @@ import os
 
 import psutil
 from psutil import SUNOS
+from psutil.tests import mock
 from psutil.tests import run_test_module_by_name
 from psutil.tests import sh
 from psutil.tests import unittest
@@ -40,6 +41,28 @@ class SunOSSpecificTestCase(unittest.TestCase):
         out = sh("/usr/sbin/psrinfo")
         self.assertEqual(psutil.cpu_count(), len(out.split('\n')))
 
+    def test_terminal_mocked(self):
+        # the tty device is looked up in the shared terminal map
+        # before falling back on the std fds
+        from psutil import _pssunos
+        info = [0] * (max(_pssunos.proc_info_map.values()) + 1)
+        info[_pssunos.proc_info_map['ttynr']] = 1234
+        with mock.patch('psutil._pssunos.Process._proc_basic_info',
+                        return_value=info):
+            with mock.patch('psutil._pssunos._psposix.get_terminal_map',
+                            return_value={1234: '/dev/pts/9'}) as m:
+                self.assertEqual(
+                    _pssunos.Process(os.getpid()).terminal(), '/dev/pts/9')
+                assert m.called
+            with mock.patch('psutil._pssunos._psposix.get_terminal_map',
+                            return_value={}) as m:
+                with mock.patch('psutil._pssunos.os.readlink',
+                                return_value='/dev/pts/8'):
+                    self.assertEqual(
+                        _pssunos.Process(os.getpid()).terminal(),
+                        '/dev/pts/8')
+                assert m.called
+
 
 if __name__ == '__main__':
     run_test_module_by_name(__file__)
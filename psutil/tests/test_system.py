@@ -75,6 +75,9 @@ class TestSystemAPIs(unittest.TestCase):
         p.wait()
         self.assertNotIn(sproc.pid, [x.pid for x in psutil.process_iter()])
 
+        # Cached instances whose creation time is unchanged are not
+        # re-instantiated, so start from an empty cache.
+        psutil._pmap.clear()
         with mock.patch('psutil.Process',
                         side_effect=psutil.NoSuchProcess(os.getpid())):
             self.assertEqual(list(psutil.process_iter()), [])
@@ -103,6 +106,80 @@ class TestSystemAPIs(unittest.TestCase):
                 self.assertGreaterEqual(p.info['pid'], 0)
             assert m.called
 
+    def test_process_iter_w_workers(self):
+        serial = dict((p.pid, p.info['ppid'])
+                      for p in psutil.process_iter(attrs=['ppid']))
+        threaded = dict((p.pid, p.info['ppid'])
+                        for p in psutil.process_iter(attrs=['ppid'],
+                                                     workers=4))
+        self.assertEqual(threaded[os.getpid()], os.getppid())
+        for pid in set(serial) & set(threaded):
+            self.assertEqual(serial[pid], threaded[pid])
+        # invalid arguments are rejected on call, not on iteration
+        self.assertRaises(ValueError, psutil.process_iter, workers=4)
+        self.assertRaises(ValueError, psutil.process_iter,
+                          attrs=['pid'], workers=0)
+        with self.assertRaises(ValueError):
+            list(psutil.process_iter(attrs=['foo'], workers=2))
+
+    def test_process_iter_w_workers_exceptions(self):
+        with mock.patch("psutil._psplatform.Process.cpu_times",
+                        side_effect=psutil.AccessDenied(0, "")) as m:
+            for p in psutil.process_iter(
+                    attrs=["pid", "cpu_times"], ad_value=1, workers=2):
+                self.assertEqual(p.info['cpu_times'], 1)
+            assert m.called
+        with mock.patch("psutil.Process.as_dict",
+                        side_effect=psutil.NoSuchProcess(os.getpid())) as m:
+            self.assertEqual(
+                list(psutil.process_iter(attrs=["pid"], workers=2)), [])
+            assert m.called
+        self.assertIn(os.getpid(), [p.pid for p in psutil.process_iter()])
+
+    def test_process_table(self):
+        table = psutil.ProcessTable()
+        self.assertIn(os.getpid(), table)
+        self.assertEqual(table.added, table.alive)
+        self.assertEqual(table.removed, set())
+        self.assertEqual(table[os.getpid()], psutil.Process())
+        self.assertEqual(len(table), len(table.alive))
+        self.assertEqual([x.pid for x in table], sorted(table.alive))
+        me = table[os.getpid()]
+
+        sproc = get_test_subprocess()
+        table.refresh()
+        self.assertIn(sproc.pid, table.added)
+        self.assertNotIn(os.getpid(), table.added)
+        self.assertIs(table[os.getpid()], me)
+
+        p = psutil.Process(sproc.pid)
+        p.kill()
+        p.wait()
+        table.refresh()
+        self.assertIn(sproc.pid, table.removed)
+        self.assertNotIn(sproc.pid, table.alive)
+        self.assertNotIn(sproc.pid, table)
+
+    def test_process_table_pid_reused(self):
+        table = psutil.ProcessTable()
+        me = table[os.getpid()]
+        me._create_time -= 1
+        table.refresh()
+        self.assertIn(os.getpid(), table.added)
+        self.assertIn(os.getpid(), table.removed)
+        self.assertIsNot(table[os.getpid()], me)
+        table.refresh()
+        self.assertNotIn(os.getpid(), table.added)
+        self.assertNotIn(os.getpid(), table.removed)
+
+    def test_process_table_process_gone(self):
+        with mock.patch('psutil.Process',
+                        side_effect=psutil.NoSuchProcess(os.getpid())):
+            table = psutil.ProcessTable()
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.added, set())
+        self.assertEqual(table.alive, set())
+
     def test_wait_procs(self):
         def callback(p):
             pids.append(p.pid)
@@ -173,6 +250,28 @@ class TestSystemAPIs(unittest.TestCase):
         self.assertGreater(bt, 0)
         self.assertLess(bt, time.time())
 
+    def test_system_snapshot(self):
+        snap = psutil.system_snapshot()
+        self.assertEqual(snap.cpu_times._fields, psutil.cpu_times()._fields)
+        self.assertEqual(len(snap.per_cpu_times), len(psutil.cpu_times(True)))
+        self.assertIsInstance(snap.cpu_stats, type(psutil.cpu_stats()))
+        self.assertEqual(snap.virtual_memory.total,
+                         psutil.virtual_memory().total)
+        self.assertEqual(snap.swap_memory.total, psutil.swap_memory().total)
+        self.assertEqual(snap.boot_time, psutil.boot_time())
+        if hasattr(os, "getloadavg"):
+            self.assertEqual(len(snap.loadavg), 3)
+
+    def test_oneshot(self):
+        with psutil.oneshot():
+            t1 = psutil.cpu_times()
+            t2 = psutil.cpu_times()
+            self.assertEqual(t1, t2)
+        # exceptions are propagated
+        with self.assertRaises(ZeroDivisionError):
+            with psutil.oneshot():
+                1 / 0
+
     @unittest.skipIf(not POSIX, 'POSIX only')
     def test_PAGESIZE(self):
         # pagesize is used internally to perform different calculations
@@ -444,6 +543,65 @@ class TestSystemAPIs(unittest.TestCase):
                 for percent in cpu:
                     self._test_cpu_percent(percent, None, None)
 
+    def test_per_cpu_percent_as_array(self):
+        for fun in (psutil.cpu_percent, psutil.cpu_times_percent):
+            with self.assertRaises(ValueError):
+                fun(as_array=True)
+            # pure python version
+            with mock.patch.dict(sys.modules, {'numpy': None}):
+                fun(interval=0.001, percpu=True, as_array=True)
+                ret = fun(interval=None, percpu=True, as_array=True)
+            self.assertIsInstance(ret, list)
+            self.assertEqual(len(ret), psutil.cpu_count())
+            self.assertEqual(len(ret),
+                             len(fun(interval=None, percpu=True)))
+            # NumPy version, if installed
+            ret = fun(interval=0.001, percpu=True, as_array=True)
+            self.assertEqual(len(ret), psutil.cpu_count())
+            for x in range(10):
+                ret = fun(interval=None, percpu=True, as_array=True)
+                for percent in ret:
+                    if fun is psutil.cpu_times_percent:
+                        self.assertEqual(len(percent),
+                                         len(psutil.cpu_times()._fields))
+                        for p in percent:
+                            self._test_cpu_percent(float(p), None, ret)
+                    else:
+                        self._test_cpu_percent(float(percent), None, ret)
+
+    def test_cpu_array_percent(self):
+        fields = psutil.cpu_times()._fields
+        nfields = len(fields)
+        idle = fields.index('idle')
+        t1 = [[0] * nfields, [0] * nfields, [5] * nfields]
+        t2 = [[0] * nfields, [0] * nfields, [5] * nfields]
+        # cpu0: 75% busy; cpu1: idle; cpu2: no time elapsed
+        t2[0][0] = 30
+        t2[0][idle] = 10
+        t2[1][idle] = 10
+
+        def check(t1, t2):
+            ret = psutil._cpu_array_percent(t1, t2)
+            self.assertEqual([float(x) for x in ret], [75.0, 0.0, 0.0])
+            ret = psutil._cpu_array_percent(t1, t2, times_percent=True)
+            self.assertEqual(float(ret[0][0]), 75.0)
+            self.assertEqual(float(ret[0][idle]), 25.0)
+            self.assertEqual(float(ret[1][idle]), 100.0)
+            self.assertEqual(sum([float(x) for x in ret[2]]), 0.0)
+            # negative deltas are trimmed to zero
+            ret = psutil._cpu_array_percent(t2, t1, times_percent=True)
+            for cpu in ret:
+                for percent in cpu:
+                    self.assertEqual(float(percent), 0.0)
+
+        check(t1, t2)
+        try:
+            import numpy
+        except ImportError:
+            pass
+        else:
+            check(numpy.array(t1, dtype=float), numpy.array(t2, dtype=float))
+
     def test_disk_usage(self):
         usage = psutil.disk_usage(os.getcwd())
         self.assertEqual(usage._fields, ('total', 'used', 'free', 'percent'))
@@ -566,6 +724,13 @@ class TestSystemAPIs(unittest.TestCase):
             self.assertIsInstance(key, str)
             check_ntuple(ret[key])
 
+    def test_net_io_counters_nics(self):
+        nics = sorted(psutil.net_io_counters(pernic=True))
+        ret = psutil.net_io_counters(pernic=True, nics=nics[:1] + ['?!'])
+        self.assertEqual(list(ret), nics[:1])
+        self.assertEqual(psutil.net_io_counters(pernic=True, nics=[]), {})
+        self.assertIsNone(psutil.net_io_counters(nics=['?!']))
+
     def test_net_io_counters_no_nics(self):
         # Emulate a case where no NICs are installed, see:
         # https://github.com/giampaolo/psutil/issues/1062
@@ -862,5 +1027,162 @@ class TestSystemAPIs(unittest.TestCase):
                 self.assertGreaterEqual(entry.current, 0)
 
 
+class TestSampler(unittest.TestCase):
+
+    def test_invalid_args(self):
+        self.assertRaises(ValueError, psutil.Sampler, metrics=['?!'])
+        self.assertRaises(ValueError, psutil.Sampler, interval=0)
+        self.assertRaises(ValueError, psutil.Sampler, maxlen=1)
+        sampler = psutil.Sampler(metrics='cpu_times')
+        self.assertRaises(ValueError, sampler.samples, 'net_io_counters')
+        self.assertRaises(ValueError, sampler.rate, 'net_io_counters')
+
+    def test_queries(self):
+        values = [psutil._common.snetio(*[x * 10] * 8) for x in range(5)]
+        ts = [0, 1, 2, 3, 5]
+        sampler = psutil.Sampler(metrics=['net_io_counters'], maxlen=4)
+        self.assertIsNone(sampler.latest('net_io_counters'))
+        self.assertIsNone(sampler.rate('net_io_counters'))
+        with mock.patch.dict(psutil.Sampler.METRICS,
+                             {'net_io_counters': lambda: values.pop(0)}):
+            with mock.patch('psutil._timer', side_effect=ts):
+                for x in range(5):
+                    sampler.sample()
+        # the oldest sample was discarded
+        self.assertEqual(len(sampler.samples('net_io_counters')), 4)
+        self.assertEqual(sampler.latest('net_io_counters').bytes_sent, 40)
+        # (40 - 10) / (5 - 1)
+        self.assertEqual(sampler.rate('net_io_counters').bytes_sent, 7.5)
+        # samples at 3 and 5
+        rate = sampler.rate('net_io_counters', window=2)
+        self.assertIsInstance(rate, psutil._common.snetio)
+        self.assertEqual(rate.bytes_recv, 5.0)
+        # always use at least 2 samples
+        self.assertEqual(
+            sampler.rate('net_io_counters', window=0.1).bytes_recv, 5.0)
+        sampler.clear()
+        self.assertEqual(sampler.samples('net_io_counters'), [])
+
+    def test_cpu_percent(self):
+        sampler = psutil.Sampler(metrics=['cpu_times', 'per_cpu_times'])
+        self.assertIsNone(sampler.cpu_percent())
+        self.assertIsNone(sampler.cpu_times_percent(percpu=True))
+        sampler.sample()
+        time.sleep(0.05)
+        sampler.sample()
+        self.assertGreaterEqual(sampler.cpu_percent(), 0.0)
+        self.assertLessEqual(sampler.cpu_percent(), 100.0)
+        self.assertEqual(len(sampler.cpu_percent(percpu=True)),
+                         psutil.cpu_count())
+        self.assertEqual(sampler.cpu_times_percent()._fields,
+                         psutil.cpu_times()._fields)
+        self.assertEqual(len(sampler.cpu_times_percent(percpu=True)),
+                         psutil.cpu_count())
+
+    def test_thread(self):
+        sampler = psutil.Sampler(metrics=['cpu_times', 'net_io_counters'],
+                                 interval=0.01)
+        with sampler:
+            self.assertTrue(sampler.is_running())
+            self.assertIn("running=True", repr(sampler))
+            # the first sample is taken synchronously
+            self.assertTrue(sampler.samples('cpu_times'))
+            stop_at = time.time() + 3
+            while len(sampler.samples('cpu_times')) < 3 and \
+                    time.time() < stop_at:
+                time.sleep(0.01)
+            self.assertGreaterEqual(len(sampler.samples('cpu_times')), 3)
+        self.assertFalse(sampler.is_running())
+        num = len(sampler.samples('cpu_times'))
+        time.sleep(0.05)
+        self.assertEqual(len(sampler.samples('cpu_times')), num)
+        self.assertIsNotNone(sampler.rate('net_io_counters'))
+
+    def test_thread_survives_errors(self):
+        sampler = psutil.Sampler(metrics=['cpu_times'], interval=0.01)
+        sampler.start()
+        try:
+            with mock.patch.dict(psutil.Sampler.METRICS,
+                                 {'cpu_times': mock.Mock(
+                                     side_effect=OSError)}):
+                stop_at = time.time() + 3
+                while not sampler.errors and time.time() < stop_at:
+                    time.sleep(0.01)
+            self.assertTrue(sampler.is_running())
+            # errors are recorded...
+            self.assertIsInstance(sampler.errors['cpu_times'], OSError)
+            # ...until the metric is sampled successfully again
+            stop_at = time.time() + 3
+            while sampler.errors and time.time() < stop_at:
+                time.sleep(0.01)
+            self.assertEqual(sampler.errors, {})
+        finally:
+            sampler.stop()
+
+
+class TestTrackers(unittest.TestCase):
+
+    def test_cpu_percent_tracker(self):
+        tracker = psutil.CpuPercentTracker()
+        time.sleep(0.05)
+        ret = tracker.update()
+        self.assertGreaterEqual(ret.percent, 0.0)
+        self.assertLessEqual(ret.percent, 100.0)
+        self.assertEqual(len(ret.percpu), psutil.cpu_count())
+        self.assertEqual(ret.times_percent._fields,
+                         psutil.cpu_times()._fields)
+        self.assertEqual(len(ret.percpu_times_percent), psutil.cpu_count())
+        # the module-level baseline is not affected
+        with mock.patch('psutil._last_cpu_times', None):
+            tracker.update()
+            self.assertIsNone(psutil._last_cpu_times)
+
+    def test_cpu_percent_tracker_independent(self):
+        times = psutil.cpu_times()
+        busy = times._replace(user=times.user + 10)
+        idle = busy._replace(idle=busy.idle + 10)
+        with mock.patch('psutil._cpu_times_all',
+                        return_value=(times, [times])):
+            tracker1 = psutil.CpuPercentTracker()
+            tracker2 = psutil.CpuPercentTracker()
+        with mock.patch('psutil._cpu_times_all',
+                        return_value=(busy, [busy])):
+            self.assertEqual(tracker1.update().percent, 100.0)
+        with mock.patch('psutil._cpu_times_all',
+                        return_value=(idle, [idle])):
+            self.assertEqual(tracker1.update().percent, 0.0)
+            self.assertEqual(tracker2.update().percent, 50.0)
+            self.assertEqual(tracker2.update().percpu, [0.0])
+
+    def test_net_io_rate_tracker(self):
+        nt = psutil._common.snetio
+        values = [{'eth0': nt(*[0] * 8)},
+                  {'eth0': nt(*[100] * 8), 'eth1': nt(*[10] * 8)}]
+        with mock.patch('psutil._timer', side_effect=[0, 2]):
+            with mock.patch('psutil.net_io_counters',
+                            side_effect=lambda **kw: values.pop(0)):
+                tracker = psutil.NetIORateTracker(pernic=True)
+                ret = tracker.update()
+        # new NICs have no baseline
+        self.assertEqual(list(ret), ['eth0'])
+        self.assertEqual(ret['eth0'], nt(*[50.0] * 8))
+        tracker = psutil.NetIORateTracker()
+        time.sleep(0.01)
+        self.assertIsInstance(tracker.update(), nt)
+
+    def test_disk_io_rate_tracker(self):
+        nt = psutil._common.sdiskio
+        values = [nt(*[0] * 6), nt(*[30] * 6)]
+        with mock.patch('psutil._timer', side_effect=[0, 3]):
+            with mock.patch('psutil.disk_io_counters',
+                            side_effect=lambda **kw: values.pop(0)):
+                tracker = psutil.DiskIORateTracker()
+                self.assertEqual(tracker.update(), nt(*[10.0] * 6))
+        # no disks
+        with mock.patch('psutil.disk_io_counters', return_value={}):
+            self.assertEqual(psutil.DiskIORateTracker(perdisk=True).update(),
+                             {})
+
+
 if __name__ == '__main__':
     run_test_module_by_name(__file__)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2009, Giampaolo Rodola'. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""
+A simple micro benchmark script which prints the speedup of
+Process.memory_full_info() on Linux when using /proc/{pid}/smaps_rollup
+(Linux >= 4.14) instead of parsing /proc/{pid}/smaps.
+The current process creates MAPPINGS memory mappings first, so that
+smaps is as big as the one of a JVM or a web browser.
+"""
+
+from __future__ import print_function, division
+import mmap
+import sys
+import timeit
+
+import psutil
+from psutil import _pslinux
+
+
+ITERATIONS = 100
+MAPPINGS = 5000
+p = psutil.Process()
+
+
+def call():
+    p.memory_full_info()
+
+
+def main():
+    if not psutil.LINUX:
+        sys.exit("platform not supported")
+    if not _pslinux.HAS_SMAPS_ROLLUP:
+        sys.exit("smaps_rollup is not supported by this kernel")
+
+    # Anonymous shared mappings are not merged by the kernel, so each
+    # one results in a separate smaps entry.
+    maps = [mmap.mmap(-1, mmap.PAGESIZE) for x in range(MAPPINGS)]
+    print("%s memory mappings, %s iterations (psutil %s):" % (
+        len(p.memory_maps(grouped=False)), ITERATIONS, psutil.__version__))
+
+    # "smaps" run
+    _pslinux.HAS_SMAPS_ROLLUP = False
+    try:
+        elapsed1 = timeit.timeit(call, number=ITERATIONS)
+    finally:
+        _pslinux.HAS_SMAPS_ROLLUP = True
+    print("smaps:        %.3f secs" % elapsed1)
+
+    # "smaps_rollup" run
+    elapsed2 = timeit.timeit(call, number=ITERATIONS)
+    print("smaps_rollup: %.3f secs" % elapsed2)
+
+    # done
+    if elapsed2 < elapsed1:
+        print("speedup: +%.2fx" % (elapsed1 / elapsed2))
+    elif elapsed2 > elapsed1:
+        print("slowdown: -%.2fx" % (elapsed2 / elapsed1))
+    else:
+        print("same speed")
+    for m in maps:
+        m.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -50,7 +50,12 @@ def main():
     templ = "%-16s %10s  %-7s %s"
     print(templ % ("Address", "RSS", "Mode", "Mapping"))
     total_rss = 0
-    for m in p.memory_maps(grouped=False):
+    if hasattr(p, "memory_maps_iter"):
+        # Linux: don't read all memory maps in memory at once.
+        maps = p.memory_maps_iter()
+    else:
+        maps = p.memory_maps(grouped=False)
+    for m in maps:
         total_rss += m.rss
         safe_print(templ % (
             m.addr.split('-')[0].zfill(16),
@@ -16,6 +16,9 @@ https://www.selenic.com/smem/
 
 Author: Giampaolo Rodola' <g.rodola@gmail.com>
 
+Memory maps are parsed in parallel by a pool of worker processes
+(one per CPU by default, see -j option).
+
 ~/svn/psutil$ ./scripts/procsmem.py
 PID     User    Cmdline                            USS     PSS    Swap     RSS
 ==============================================================================
@@ -36,6 +39,8 @@ PID     User    Cmdline                            USS     PSS    Swap     RSS
 """
 
 from __future__ import print_function
+import argparse
+import multiprocessing
 import sys
 
 import psutil
@@ -57,41 +62,83 @@ def convert_bytes(n):
     return "%sB" % n
 
 
+def collect(pids):
+    """Collect memory info of a chunk of PIDs (possibly in a worker
+    process). Return a list of (pid, info) tuples where info is None
+    in case of AccessDenied, else a (username, cmdline, uss, pss,
+    swap, rss) tuple.
+    """
+    ret = []
+    for pid in pids:
+        try:
+            p = psutil.Process(pid)
+            with p.oneshot():
+                mem = p.memory_full_info()
+                info = p.as_dict(attrs=["cmdline", "username"])
+        except psutil.AccessDenied:
+            ret.append((pid, None))
+        except psutil.NoSuchProcess:
+            pass
+        else:
+            if mem.uss:
+                ret.append((pid, (info["username"], info["cmdline"],
+                                  mem.uss, getattr(mem, "pss", ""),
+                                  getattr(mem, "swap", ""), mem.rss)))
+    return ret
+
+
+def collect_all(workers):
+    """Collect memory info of all processes. The PIDs list is split
+    in chunks which are processed by a pool of *workers* processes,
+    as parsing memory maps is CPU bound.
+    """
+    pids = psutil.pids()
+    if workers <= 1:
+        return collect(pids)
+    # use more chunks than workers so that the load stays balanced
+    # in case a chunk includes many big processes
+    chunksize = max(1, len(pids) // (workers * 4))
+    chunks = [pids[i:i + chunksize] for i in range(0, len(pids), chunksize)]
+    pool = multiprocessing.Pool(workers)
+    try:
+        ret = []
+        for result in pool.imap_unordered(collect, chunks):
+            ret.extend(result)
+        return ret
+    finally:
+        pool.close()
+        pool.join()
+
+
 def main():
+    parser = argparse.ArgumentParser(
+        description="show detailed memory usage about all processes")
+    parser.add_argument(
+        '--workers', '-j', type=int, default=psutil.cpu_count() or 1,
+        help="number of worker processes (default: number of CPUs)")
+    args = parser.parse_args()
+
     ad_pids = []
     procs = []
-    for p in psutil.process_iter():
-        with p.oneshot():
-            try:
-                mem = p.memory_full_info()
-                info = p.as_dict(attrs=["cmdline", "username"])
-            except psutil.AccessDenied:
-                ad_pids.append(p.pid)
-            except psutil.NoSuchProcess:
-                pass
-            else:
-                p._uss = mem.uss
-                p._rss = mem.rss
-                if not p._uss:
-                    continue
-                p._pss = getattr(mem, "pss", "")
-                p._swap = getattr(mem, "swap", "")
-                p._info = info
-                procs.append(p)
-
-    procs.sort(key=lambda p: p._uss)
+    for pid, info in collect_all(args.workers):
+        if info is None:
+            ad_pids.append(pid)
+        else:
+            procs.append((pid, ) + info)
+
+    procs.sort(key=lambda x: x[3])
     templ = "%-7s %-7s %-30s %7s %7s %7s %7s"
     print(templ % ("PID", "User", "Cmdline", "USS", "PSS", "Swap", "RSS"))
     print("=" * 78)
-    for p in procs[:86]:
+    for pid, username, cmdline, uss, pss, swap, rss in procs[:86]:
         line = templ % (
-            p.pid,
-            p._info["username"][:7],
-            " ".join(p._info["cmdline"])[:30],
-            convert_bytes(p._uss),
-            convert_bytes(p._pss) if p._pss != "" else "",
-            convert_bytes(p._swap) if p._swap != "" else "",
-            convert_bytes(p._rss),
+            pid,
+            username[:7],
+            " ".join(cmdline)[:30],
+            convert_bytes(uss),
+            convert_bytes(pss) if pss != "" else "",
+            convert_bytes(swap) if swap != "" else "",
+            convert_bytes(rss),
         )
         print(line)
     if ad_pids: